@@ -11,6 +11,7 @@ from importlib import import_module
 commands = {"install": ["install", "install_script"],
             "doc": ["doc", "doc_script"],
             "bib": ["bib", "bib_script"],
+            "bench": ["bench", "bench_script"],
             "run": ["run", "run_script"],
             "cosmo-generator": ["cosmo_input", "gui_script"],
             "create-image": ["containers", "create_image_script"],
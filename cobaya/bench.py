@@ -0,0 +1,310 @@
+"""
+.. module:: bench
+
+:Synopsis: Benchmarks of the overhead of the framework, and comparison with baselines
+
+Measures the throughput of the parts of Cobaya that do not depend on external codes
+(posterior evaluation for synthetic models made of the ``gaussian_mixture``, ``_test``
+and ``one`` likelihoods, addition of samples to a collection, loading chains from disk,
+post-processing and MCMC steps with fast-slow dragging) and the time needed to import
+Cobaya, so that regressions in the overhead of the framework can be detected without
+installing any cosmological code or data.
+
+Results are written as JSON, and can be compared against a stored baseline:
+
+.. code:: bash
+
+   $ cobaya-bench --output baseline.json
+   [... some changes later ...]
+   $ cobaya-bench --baseline baseline.json
+
+Throughputs are named ``[...]_per_s`` (larger is better), and times ``[...]_s``
+(smaller is better).
+
+"""
+
+# Global
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import tempfile
+import subprocess
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+# Local
+from cobaya import __version__
+from cobaya.model import get_model
+from cobaya.collection import SampleCollection
+from cobaya.output import get_output
+from cobaya.log import NoLogging, LoggedError, get_logger
+from cobaya.typing import InputDict
+from cobaya.tools import warn_deprecation
+
+_default_tolerance = 0.25
+_n_repeat = 3
+
+
+def _best_time(func: Callable, repeat: int = _n_repeat) -> float:
+    """
+    Minimum time taken by ``func()`` over ``repeat`` calls (less sensitive to noise).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def synthetic_info(dim: int = 2, n_components: int = 1) -> InputDict:
+    """
+    Returns the input of a synthetic model with a ``gaussian_mixture`` likelihood of
+    dimension ``dim``, plus ``n_components - 1`` further likelihoods: first a ``_test``
+    one (with two more sampled parameters and external priors), then ``one``'s.
+    """
+    info: InputDict = {
+        "likelihood": {"gaussian_mixture": {
+            "means": [np.zeros(dim)], "covs": [np.eye(dim)],
+            "input_params_prefix": "x", "output_params_prefix": "z"}},
+        "params": {"x_%d" % i: {"prior": {"min": -5, "max": 5}} for i in range(dim)}}
+    for i in range(1, n_components):
+        if i == 1:
+            info["likelihood"]["_test"] = None
+        else:
+            info["likelihood"]["one_%d" % i] = {"class": "one"}
+    return info
+
+
+def _random_points(model, n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.array([model.prior.reference(random_state=rng, warn_if_no_ref=False)
+                     for _ in range(n)])
+
+
+def bench_logposterior(quick=False) -> Dict[str, float]:
+    """
+    Evaluations of the posterior per second (without caching), for varying dimension
+    and number of likelihoods.
+    """
+    results = {}
+    n_evals = 200 if quick else 2000
+    for dim in [2, 16] if quick else [2, 16, 64]:
+        for n_components in [1, 4]:
+            model = get_model(synthetic_info(dim, n_components))
+            points = _random_points(model, n_evals)
+
+            def evaluate():
+                for point in points:
+                    model.logposterior(point, cached=False)
+
+            results["logposterior_d%d_c%d_per_s" % (dim, n_components)] = \
+                n_evals / _best_time(evaluate)
+            model.close()
+    return results
+
+
+def _filled_collection(model, n_rows: int, output=None) -> SampleCollection:
+    collection = SampleCollection(model, output, name="1")
+    for point in _random_points(model, n_rows):
+        result = model.logposterior(point)
+        collection.add(point, derived=result.derived, logpost=result.logpost,
+                       logpriors=result.logpriors, loglikes=result.loglikes)
+    return collection
+
+
+def bench_collection(quick=False) -> Dict[str, float]:
+    """
+    Samples added to a collection per second.
+    """
+    model = get_model(synthetic_info(16, 2))
+    n_rows = 1000 if quick else 10000
+    points = _random_points(model, n_rows)
+    results = [model.logposterior(point) for point in points]
+
+    def add():
+        collection = SampleCollection(model, name="1")
+        for point, result in zip(points, results):
+            collection.add(point, derived=result.derived, logpost=result.logpost,
+                           logpriors=result.logpriors, loglikes=result.loglikes)
+
+    return {"collection_add_per_s": n_rows / _best_time(add)}
+
+
+def bench_load(quick=False) -> Dict[str, float]:
+    """
+    Rows of chains loaded per second, for every output format.
+    """
+    model = get_model(synthetic_info(16, 2))
+    n_rows = 2000 if quick else 50000
+    collection = _filled_collection(model, n_rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for output_format in ["txt", "npy"]:
+            output = get_output(prefix=os.path.join(tmpdir, output_format), force=True,
+                                output_format=output_format)
+            out_collection = SampleCollection(model, output, name="1")
+            out_collection.append(collection)
+            out_collection.out_update()
+
+            def load():
+                SampleCollection(model, output, name="1",
+                                 file_name=out_collection.file_name, load=True)
+
+            results["load_%s_rows_per_s" % output_format] = n_rows / _best_time(load)
+    return results
+
+
+def bench_post(quick=False) -> Dict[str, float]:
+    """
+    Rows of a sample post-processed per second, adding and removing likelihoods.
+    """
+    from cobaya.post import post
+    info = synthetic_info(16, 2)
+    model = get_model(info)
+    n_rows = 500 if quick else 5000
+    collection = _filled_collection(model, n_rows)
+    info_post = dict(info, post={"suffix": "bench",
+                                 "add": {"likelihood": {"one": None}},
+                                 "remove": {"likelihood": {"_test": None}}})
+    return {"post_rows_per_s": n_rows / _best_time(lambda: post(info_post, collection))}
+
+
+def bench_mcmc(quick=False) -> Dict[str, float]:
+    """
+    Steps per second of the MCMC sampler with fast-slow dragging.
+    """
+    from cobaya.run import run
+    info = synthetic_info(4, 1)
+    fast = synthetic_info(4, 1)["likelihood"]["gaussian_mixture"]
+    info["likelihood"]["gaussian_mixture"]["speed"] = 10
+    info["likelihood"]["fast"] = dict(fast, input_params_prefix="y",
+                                      output_params_prefix="w", speed=1000,
+                                      **{"class": "gaussian_mixture"})
+    info["params"].update({"y_%d" % i: {"prior": {"min": -5, "max": 5}}
+                           for i in range(4)})
+    info["sampler"] = {"mcmc": {"drag": True, "oversample_power": 0.4,
+                                "measure_speeds": False, "Rminus1_stop": 0,
+                                "max_samples": 100 if quick else 1000,
+                                "burn_in": 0, "seed": 1}}
+    steps = []
+
+    def sample():
+        steps.append(run(info).sampler.n_steps_raw)
+
+    elapsed = _best_time(sample)
+    # seeded: same number of steps every time
+    return {"mcmc_drag_steps_per_s": steps[0] / elapsed}
+
+
+def bench_import(quick=False) -> Dict[str, float]:
+    """
+    Time to import Cobaya in a new interpreter, and to initialize a simple model.
+    """
+    results = {"import_s": _best_time(lambda: subprocess.run(
+        [sys.executable, "-c", "import cobaya"], check=True))}
+    info = synthetic_info(2, 1)
+    results["get_model_s"] = _best_time(lambda: get_model(info))
+    return results
+
+
+benchmarks: Dict[str, Callable[..., Dict[str, float]]] = {
+    "logposterior": bench_logposterior,
+    "collection": bench_collection,
+    "load": bench_load,
+    "post": bench_post,
+    "mcmc": bench_mcmc,
+    "import": bench_import}
+
+
+def run_benchmarks(names: Optional[Sequence[str]] = None, quick=False) -> dict:
+    """
+    Runs the given benchmarks (default: all of them, see ``benchmarks``), and returns
+    a dictionary with their results (under ``results``) and some information about
+    the environment in which they were run.
+    """
+    log = get_logger("bench")
+    names = list(names or benchmarks)
+    unknown = set(names).difference(benchmarks)
+    if unknown:
+        raise LoggedError(log, "Unknown benchmark(s) %r. Available ones: %r",
+                          sorted(unknown), list(benchmarks))
+    results: Dict[str, float] = {}
+    for name in names:
+        log.info("Running '%s' benchmark...", name)
+        with NoLogging(logging.WARNING):
+            results.update(benchmarks[name](quick=quick))
+    return {"cobaya": __version__, "python": platform.python_version(),
+            "numpy": np.__version__, "platform": platform.platform(),
+            "quick": quick, "results": results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float = _default_tolerance) \
+        -> List[str]:
+    """
+    Compares the results of :func:`run_benchmarks` with a baseline, and returns a list
+    of messages describing the benchmarks that are worse than the baseline by more than
+    a fraction ``tolerance`` (default: 25%).
+    """
+    regressions = []
+    for name, value in results["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        # throughputs: larger is better; times: smaller is better
+        ratio = value / base if name.endswith("_per_s") else base / value
+        if ratio < 1 - tolerance:
+            regressions.append("%s: %.4g (baseline: %.4g, %+.0f%%)" % (
+                name, value, base, 100 * (value / base - 1)))
+    return regressions
+
+
+def bench_script(args=None):
+    warn_deprecation()
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="cobaya bench",
+        description="Benchmarks the overhead of Cobaya, optionally comparing it with a "
+                    "baseline.")
+    parser.add_argument("benchmarks", action="store", nargs="*", metavar="benchmark",
+                        help="Benchmarks to run (default: all): %s" %
+                             ", ".join(benchmarks))
+    parser.add_argument("-o", "--output", action="store", metavar="results.json",
+                        help="File to write the results to, as JSON.")
+    parser.add_argument("-b", "--baseline", action="store", metavar="baseline.json",
+                        help="Results of a previous run to compare with. Exits with "
+                             "non-zero status if some benchmark is worse.")
+    parser.add_argument("-t", "--tolerance", action="store", type=float,
+                        default=_default_tolerance,
+                        help="Fraction by which a benchmark can be worse than the "
+                             "baseline before being reported (default: %g)." %
+                             _default_tolerance)
+    parser.add_argument("--quick", action="store_true",
+                        help="Run smaller (and noisier) versions of the benchmarks.")
+    arguments = parser.parse_args(args)
+    log = get_logger("bench")
+    results = run_benchmarks(arguments.benchmarks, quick=arguments.quick)
+    for name, value in results["results"].items():
+        print("%s : %.4g" % (name, value))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+        log.info("Results written to '%s'", arguments.output)
+    if arguments.baseline:
+        with open(arguments.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("quick") != results["quick"]:
+            log.warning("Comparing quick and full benchmarks: results may differ.")
+        regressions = compare(results, baseline, arguments.tolerance)
+        if regressions:
+            log.error("Benchmarks worse than the baseline by more than %g%%:\n   %s",
+                      100 * arguments.tolerance, "\n   ".join(regressions))
+            sys.exit(1)
+        log.info("No regressions with respect to the baseline.")
+
+
+if __name__ == '__main__':
+    bench_script()
@@ -8,7 +8,7 @@
 
 # Global
 import os
-import functools
+import ast
 import numpy as np
 import pandas as pd
 from getdist import MCSamples, chains
@@ -19,15 +19,65 @@ from math import isclose
 from cobaya.conventions import OutPar, minuslogprior_names, chi2_names, \
     derived_par_name_separator
 from cobaya.tools import load_DataFrame
-from cobaya.log import LoggedError, HasLogger, NoLogging
+from cobaya.log import LoggedError, HasLogger, NoLogging, get_logger
 from cobaya.model import LogPosterior
+from cobaya import tracing
 
 # Suppress getdist output
 chains.print_load_details = False
 
-# Size of fast numpy cache
-# (used to avoid "setting" in Pandas too often, which is expensive)
+log = get_logger(__name__)
+
+# Initial number of rows of the numpy buffer holding the samples
+# (grows geometrically when full, so that appending is amortized O(1))
 _default_cache_size = 200
+_growth_factor = 2
+
+
+# Binary (npy) output: header of a numpy .npy file (version 2.0) of records with one
+# float64 field per column, padded so that it can be updated in place as rows are
+# appended (up to 20 digits for the number of rows)
+_npy_magic = b"\x93NUMPY\x02\x00"
+_npy_align = 64
+
+
+def npy_header(columns, n_rows=0) -> bytes:
+    """
+    Returns the header of a binary sample file with the given columns and number of
+    rows. Its length does not depend on the number of rows.
+    """
+    header = repr({"descr": [(str(col), "<f8") for col in columns],
+                   "fortran_order": False, "shape": (n_rows,)})
+    length = len(_npy_magic) + 4 + len(header) - len(str(n_rows)) + 20 + 1
+    header += " " * (-length % _npy_align + 20 - len(str(n_rows))) + "\n"
+    return _npy_magic + np.uint32(len(header)).astype("<u4").tobytes() + \
+        header.encode("latin1")
+
+
+def load_npy_samples(file_name):
+    """
+    Loads a binary sample file as a (copy-on-write) memory map.
+
+    Returns the list of columns and the 2d array of samples.
+    """
+    with open(file_name, "rb") as inp:
+        magic = inp.read(len(_npy_magic) - 2)
+        version = inp.read(2)
+        if magic != _npy_magic[:-2] or version[0] not in (1, 2, 3):
+            raise LoggedError(log, "Not a binary sample file: %s", file_name)
+        length_dtype = "<u2" if version[0] == 1 else "<u4"
+        header_len = int(np.frombuffer(inp.read(np.dtype(length_dtype).itemsize),
+                                       dtype=length_dtype)[0])
+        header = ast.literal_eval(inp.read(header_len).decode("latin1"))
+        offset = inp.tell()
+    columns = [field[0] for field in header["descr"]]
+    if any(np.dtype(field[1]) != np.float64 for field in header["descr"]):
+        raise LoggedError(log, "Sample file %s contains non-float64 columns.", file_name)
+    n_rows = header["shape"][0]
+    if not n_rows:
+        return columns, np.empty((0, len(columns)))
+    return columns, np.memmap(file_name, dtype=np.float64, mode="c", offset=offset,
+                              shape=(n_rows, len(columns)))
 
 
 # Make sure that we don't reach the empty part of the dataframe
@@ -73,31 +123,94 @@ class BaseCollection(HasLogger):
         self.columns = columns
 
 
-def ensure_cache_dumped(method):
+class RunningMoments:
     """
-    Decorator for SampleCollection methods that need the cache cleaned before running.
+    Running weighted sums of the values of some columns of a 2d array of samples (and of
+    their pairwise products), accumulated as cumulative sums at the boundaries of blocks
+    of rows, so that the weighted mean and covariance of any range of rows can be
+    computed in O(d^2) operations (plus O(block_size * d^2) for the incomplete blocks at
+    the edges of the range), instead of O(N * d^2).
+
+    Values are shifted by the first sample before being summed, for numerical stability.
+    Rows must only be appended: if existing rows are modified, create a new instance.
     """
 
-    @functools.wraps(method)
-    def wrapper(self, *args, **kwargs):
-        self._cache_dump()
-        return method(self, *args, **kwargs)
+    block_size = 1024
 
-    return wrapper
+    def __init__(self, i_columns, i_weight):
+        self.i_columns = list(i_columns)
+        self.i_weight = i_weight
+        self.shift = None
+        d = len(self.i_columns)
+        # Cumulative sums at block boundaries: weight, squared weight, number of
+        # non-integer weights, weighted values and weighted products of values
+        self._sums = [(0., 0., 0, np.zeros(d), np.zeros((d, d)))]
+
+    def _block_sums(self, values):
+        x = values[:, self.i_columns] - self.shift
+        w = values[:, self.i_weight]
+        return (np.sum(w), np.sum(w ** 2), np.count_nonzero(np.round(w) != w),
+                w.dot(x), (x.T * w).dot(x))
+
+    def update(self, values):
+        """
+        Accumulates the sums of the complete blocks of rows of `values` not yet
+        accumulated.
+        """
+        if self.shift is None:
+            if not len(values):
+                return
+            self.shift = np.array(values[0, self.i_columns])
+        n_blocks = len(values) // self.block_size
+        for i in range(len(self._sums) - 1, n_blocks):
+            block_sums = self._block_sums(
+                values[i * self.block_size:(i + 1) * self.block_size])
+            self._sums.append(tuple(a + b for a, b in zip(self._sums[-1], block_sums)))
+
+    def sums(self, values, first, last):
+        """
+        Returns the sums over rows in the range `[first, last)` of `values` (whose rows
+        from `first` on must be the same as when the sums were accumulated).
+        """
+        self.update(values)
+        first_block = -(-first // self.block_size)
+        last_block = min(last // self.block_size, len(self._sums) - 1)
+        if first_block >= last_block:
+            return self._block_sums(values[first:last])
+        return tuple(
+            full - prev + head + tail for full, prev, head, tail in zip(
+                self._sums[last_block], self._sums[first_block],
+                self._block_sums(values[first:first_block * self.block_size]),
+                self._block_sums(values[last_block * self.block_size:last])))
+
+    def mean_and_cov(self, values, first, last):
+        """
+        Returns the weighted mean and covariance matrix of the rows in the range
+        `[first, last)` of `values`, as :func:`numpy.average` and :func:`numpy.cov`
+        with frequency weights (or analytic weights, if they are not integer).
+        """
+        sum_w, sum_w2, n_non_integer, sum_x, sum_xx = self.sums(values, first, last)
+        if not sum_w:
+            raise ZeroDivisionError("Weights sum to zero, can't be normalized")
+        mean = sum_x / sum_w
+        scatter = sum_xx - np.outer(sum_x, mean)
+        norm = sum_w - (sum_w2 / sum_w if n_non_integer else 1)
+        return self.shift + mean, np.atleast_2d(scatter / norm)
 
 
 class SampleCollection(BaseCollection):
     """
-    Holds a collection of samples, stored internally into a ``pandas.DataFrame``.
+    Holds a collection of samples, stored internally into a preallocated numpy array
+    (one column per parameter/likelihood) that grows geometrically when full.
 
-    The DataFrame itself is accessible as the ``SampleCollection.data`` property,
-    but slicing can be done on the ``SampleCollection`` itself
-    (returns a copy, not a view).
+    A ``pandas.DataFrame`` view of the samples is accessible as the
+    ``SampleCollection.data`` property, but slicing can be done on the
+    ``SampleCollection`` itself (returns a copy, not a view).
 
-    Note for developers: when expanding this class or inheriting from it, always access
-    the underlying DataFrame as `self.data` and not `self._data`, to ensure the cache has
-    been dumped. If you really need to access the actual attribute `self._data` in a
-    method, make sure to decorate it with `@ensure_cache_dumped`.
+    Note for developers: when expanding this class or inheriting from it, access the
+    samples as `self.data` (or `self.to_numpy()`), since the buffer `self._buffer`
+    contains unused rows beyond `len(self)`. If you modify the buffer directly, call
+    `self._set_values` or `self._invalidate_data` so that the DataFrame view is updated.
     """
 
     def __init__(self, model, output=None, cache_size=_default_cache_size, name=None,
@@ -105,12 +218,14 @@ class SampleCollection(BaseCollection):
                  onload_skip=0, onload_thin=1):
         super().__init__(model, name)
         self.cache_size = cache_size
+        self._data_frame = None
+        self._moments = None
         # Create/load the main data frame and the tracking indices
         # Create the DataFrame structure
         if output:
             if file_name:
                 self.file_name = file_name
-                self.driver = output.kind
+                self.driver = output.get_collection_kind(file_name)
             else:
                 self.file_name, self.driver = output.prepare_collection(
                     name=self.name, extension=extension)
@@ -167,17 +282,57 @@ class SampleCollection(BaseCollection):
             self._out_delete()
         if not resuming and not load:
             self.reset()
-        # Prepare fast numpy cache
         self._icol = {col: i for i, col in enumerate(self.columns)}
-        self._cache_reset()
 
     def reset(self):
-        """Create/reset the DataFrame."""
-        self._cache_reset()
-        self._data = pd.DataFrame(columns=self.columns)
+        """Create/reset the table of samples."""
+        self._data_columns = list(self.columns)
+        self._buffer = np.full((max(self.cache_size, 1), len(self.columns)), np.nan)
+        self._n = 0
+        self._invalidate_data()
         if getattr(self, "file_name", None):
             self._n_last_out = 0
 
+    def _set_values(self, values, columns=None, copy=True):
+        """
+        Replaces the samples with the given 2d array (or DataFrame), optionally with
+        a different set of columns.
+        """
+        if columns is not None:
+            self._data_columns = list(columns)
+        self._buffer = np.array(values, dtype=np.float64, ndmin=2, copy=copy)
+        if not self._buffer.size:
+            self._buffer = np.empty((0, len(self._data_columns)))
+        self._n = len(self._buffer)
+        self._invalidate_data()
+
+    def _set_data(self, data: pd.DataFrame):
+        if isinstance(data, pd.Series):  # single row
+            data = data.to_frame().T
+        self._set_values(data.to_numpy(dtype=np.float64), columns=data.columns)
+
+    def _invalidate_data(self, appended=False):
+        """
+        Invalidates the DataFrame view (and the running sums of the samples, unless the
+        buffer has only been appended to).
+        """
+        self._data_frame = None
+        if not appended:
+            self._moments = None
+
+    def _ensure_capacity(self, n):
+        """
+        Makes sure that there is room for `n` more rows, enlarging the buffer
+        geometrically if needed (new rows are filled with NaN's).
+        """
+        if self._n + n <= len(self._buffer):
+            return
+        capacity = max(self._n + n, _growth_factor * len(self._buffer), self.cache_size)
+        buffer = np.full((capacity, len(self._data_columns)), np.nan)
+        buffer[:self._n] = self._buffer[:self._n]
+        self._buffer = buffer
+        self._invalidate_data(appended=True)
+
     def add(self, values, derived=None, weight=1,
             logpost=None, logpriors=None, loglikes=None):
         """
@@ -234,86 +389,72 @@ class SampleCollection(BaseCollection):
                               "a log-likelihood and a log-prior.")
         return logpost, logpriors_sum, loglikes_sum
 
-    def _cache_reset(self):
-        self._cache = np.full((self.cache_size, len(self.columns)), np.nan)
-        self._cache_last = -1
-
     def _cache_add(self, values, logps, derived=None, weight=1, logpriors=None,
                    loglikes=None):
         """
-        Adds the given point to the cache. Dumps and resets the cache if full.
+        Adds the given point at the end of the buffer, enlarging it if full.
 
         `logps` must be a tuple `(logpost, sum(logpriors), sum(loglikes))`, where the last
         two elements can be `None`.
         """
-        if self._cache_last == self.cache_size - 1:
-            self._cache_dump()
-        self._cache_add_row(self._cache_last + 1, values, logps, derived=derived,
+        self._ensure_capacity(1)
+        self._cache_add_row(self._n, values, logps, derived=derived,
                             weight=weight, logpriors=logpriors, loglikes=loglikes)
-        self._cache_last += 1
+        self._n += 1
+        self._invalidate_data(appended=True)
 
     def _cache_add_row(self, pos, values, logps, derived=None, weight=1, logpriors=None,
                        loglikes=None):
         """
-        Adds the given point to the cache at the given position.
+        Adds the given point to the buffer at the given position.
 
         `logps` must be a tuple `(logpost, sum(logpriors), sum(loglikes))`, where the last
         two elements can be `None`.
         """
-        self._cache[pos, self._icol[OutPar.weight]] = weight if weight is not None else 1
-        self._cache[pos, self._icol[OutPar.minuslogpost]] = -logps[0]
+        self._buffer[pos, self._icol[OutPar.weight]] = weight if weight is not None else 1
+        self._buffer[pos, self._icol[OutPar.minuslogpost]] = -logps[0]
         for name, value in zip(self.sampled_params, values):
-            self._cache[pos, self._icol[name]] = value
+            self._buffer[pos, self._icol[name]] = value
         if logpriors is not None:
             for name, value in zip(self.minuslogprior_names, logpriors):
-                self._cache[pos, self._icol[name]] = -value
-            self._cache[pos, self._icol[OutPar.minuslogprior]] = - logps[1]
+                self._buffer[pos, self._icol[name]] = -value
+            self._buffer[pos, self._icol[OutPar.minuslogprior]] = - logps[1]
         if loglikes is not None:
             for name, value in zip(self.chi2_names, loglikes):
-                self._cache[pos, self._icol[name]] = -2 * value
-            self._cache[pos, self._icol[OutPar.chi2]] = -2 * logps[2]
+                self._buffer[pos, self._icol[name]] = -2 * value
+            self._buffer[pos, self._icol[OutPar.chi2]] = -2 * logps[2]
         if derived is not None:
             for name, value in zip(self.derived_params, derived):
-                self._cache[pos, self._icol[name]] = value
-
-    def _cache_dump(self):
-        """
-        Dumps the cache into the pandas table (unless empty).
-        """
-        if self._cache_last == -1:
-            return
-        self._enlarge(self._cache_last + 1)
-        self._data.iloc[len(self._data) - (self._cache_last + 1):len(self._data)] = \
-            self._cache[:self._cache_last + 1]
-        self._cache_reset()
-
-    def _enlarge(self, n):
-        """
-        Enlarges the DataFrame by `n` rows.
-        """
-        self._data = pd.concat([
-            self._data, pd.DataFrame(
-                np.nan, columns=self._data.columns,
-                index=np.arange(len(self._data), len(self._data) + n))])
+                self._buffer[pos, self._icol[name]] = value
 
     def append(self, collection):
         """
         Append another collection.
         Internal method: does not check for consistency!
         """
-        self._data = pd.concat([self.data[:len(self)], collection.data],
-                               ignore_index=True)
+        n = len(collection)
+        self._ensure_capacity(n)
+        self._buffer[self._n:self._n + n] = \
+            collection.data.reindex(columns=self._data_columns).to_numpy(np.float64)
+        self._n += n
+        self._invalidate_data(appended=True)
 
     def __len__(self):
-        return len(self._data) + (self._cache_last + 1)
+        return self._n
 
     def n_last_out(self):
         return self._n_last_out
 
-    @property  # type: ignore
-    @ensure_cache_dumped
-    def data(self):
-        return self._data
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        DataFrame of the samples, as a view of the internal buffer, which is only
+        valid until new samples are added.
+        """
+        if self._data_frame is None:
+            self._data_frame = pd.DataFrame(self._buffer[:self._n],
+                                            columns=self._data_columns, copy=False)
+        return self._data_frame
 
     # Make the dataframe printable (but only the filled ones!)
     def __repr__(self):
@@ -358,10 +499,13 @@ class SampleCollection(BaseCollection):
 
     @property
     def values(self) -> np.ndarray:
-        return self.data.to_numpy(dtype=np.float64)
+        return self._buffer[:self._n]
 
     def to_numpy(self, dtype=None, copy=False) -> np.ndarray:
-        return self.data.to_numpy(copy=copy, dtype=dtype or np.float64)
+        values = self._buffer[:self._n]
+        if dtype is not None and np.dtype(dtype) != values.dtype:
+            return values.astype(dtype)
+        return values.copy() if copy else values
 
     def _copy(self, data=None) -> 'SampleCollection':
         """
@@ -371,15 +515,16 @@ class SampleCollection(BaseCollection):
         no checks are performed on given data, so use with care (e.g. use with a slice of
         `self.data`).
         """
-        current_data = self.data
+        buffer, data_frame = self._buffer, self._data_frame
         if data is None:
-            data = current_data
-        # Avoids creating a copy of the data, to save memory
-        delattr(self, "_data")
-        self_copy = deepcopy(self)
-        setattr(self, "_data", current_data)
-        setattr(self_copy, "_data", data)
-        setattr(self_copy, "_n", data.last_valid_index() + 1)
+            data = self.data
+        # Avoids creating a copy of the buffer, to save memory
+        self._buffer, self._data_frame = None, None
+        try:
+            self_copy = deepcopy(self)
+        finally:
+            self._buffer, self._data_frame = buffer, data_frame
+        self_copy._set_data(data)
         return self_copy
 
     # Dummy function to avoid exposing `data` kwarg, since no checks are performed on it.
@@ -390,6 +535,20 @@ class SampleCollection(BaseCollection):
         return self._copy()
 
     # Statistical computations
+    def _running_mean_and_cov(self, first=None, last=None):
+        """
+        Weighted mean and covariance of the sampled parameters, computed from running
+        sums, which are accumulated as samples are added.
+        """
+        if self._moments is None:
+            self._moments = RunningMoments(
+                [self._data_columns.index(p) for p in self.sampled_params],
+                self._data_columns.index(OutPar.weight))
+        first, last, _ = slice(first, last).indices(self._n)
+        if last <= first:
+            raise ValueError("Empty range of samples [%d:%d]" % (first, last))
+        return self._moments.mean_and_cov(self.values, first, last)
+
     def mean(self, first=None, last=None, derived=False, pweight=False):
         """
         Returns the (weighted) mean of the parameters in the chain,
@@ -398,7 +557,12 @@ class SampleCollection(BaseCollection):
 
         If `pweight=True` (default `False`) weights every point with its probability.
         The estimate of the mean in this case is unstable; use carefully.
+
+        For the sampled parameters only, it is computed from running sums, in a time
+        that does not grow with the number of samples.
         """
+        if not derived and not pweight:
+            return self._running_mean_and_cov(first, last)[0]
         if pweight:
             logps = -self[OutPar.minuslogpost][first:last].to_numpy(dtype=np.float64,
                                                                     copy=True)
@@ -419,7 +583,12 @@ class SampleCollection(BaseCollection):
 
         If `pweight=True` (default `False`) weights every point with its probability.
         The estimate of the covariance matrix in this case is unstable; use carefully.
+
+        For the sampled parameters only, it is computed from running sums, in a time
+        that does not grow with the number of samples.
         """
+        if not derived and not pweight:
+            return self._running_mean_and_cov(first, last)[1]
         if pweight:
             logps = -self[OutPar.minuslogpost][first:last].to_numpy(dtype=np.float64,
                                                                     copy=True)
@@ -457,14 +626,12 @@ class SampleCollection(BaseCollection):
         except WeightedSampleError as e:
             raise LoggedError(self.log, "Error thinning: %s", e)
         else:
-            data = self._data.iloc[unique, :].copy()
-            data.iloc[:, 0] = counts
-            data.reset_index(drop=True, inplace=True)
+            values = self.values[unique]
+            values[:, 0] = counts
             if inplace:
-                self._data = data
-                self._n = self._data.last_valid_index() + 1
+                self._set_values(values)
             else:
-                return self._copy(data)
+                return self._copy(pd.DataFrame(values, columns=self._data_columns))
         return self
 
     def bestfit(self):
@@ -495,10 +662,10 @@ class SampleCollection(BaseCollection):
         return mcsamples
 
     def reweight(self, importance_weights):
-        self._cache_dump()
-        self._data[OutPar.weight] *= importance_weights
-        self._data = self.data[self._data.weight > 0].reset_index(drop=True)
-        self._n = self._data.last_valid_index() + 1
+        i_weight = self._data_columns.index(OutPar.weight)
+        values = self.values
+        values[:, i_weight] *= importance_weights
+        self._set_values(values[values[:, i_weight] > 0])
 
     # Saving and updating
     def _get_driver(self, method):
@@ -507,12 +674,12 @@ class SampleCollection(BaseCollection):
     # Load a pre-existing file
     def _out_load(self, **kwargs):
         self._get_driver("_load")(**kwargs)
-        self._cache_reset()
 
     # Dump/update/delete collection
 
     def out_update(self):
-        self._get_driver("_update")()
+        with tracing.span("write", "output"):
+            self._get_driver("_update")()
 
     def _out_delete(self):
         self._get_driver("_delete")()
@@ -520,10 +687,9 @@ class SampleCollection(BaseCollection):
     # txt driver
     def _load__txt(self, skip=0):
         self.log.debug("Skipping %d rows", skip)
-        self._data = load_DataFrame(self.file_name, skip=skip,
-                                    root_file_name=self.root_file_name)
-        self.log.info("Loaded %d sample points from '%s'", len(self._data),
-                      self.file_name)
+        self._set_data(load_DataFrame(self.file_name, skip=skip,
+                                      root_file_name=self.root_file_name))
+        self.log.info("Loaded %d sample points from '%s'", len(self), self.file_name)
 
     def _dump__txt(self):
         self._dump_slice__txt(0, len(self))
@@ -568,6 +734,51 @@ class SampleCollection(BaseCollection):
         except OSError:
             pass
 
+    # npy driver
+    def _load__npy(self, skip=0):
+        columns, values = load_npy_samples(self.file_name)
+        if 0 < skip < 1:
+            skip = int(round(skip * len(values)))
+        self.log.debug("Skipping %d rows", skip)
+        # Not copied: pages of the file are only read when accessed
+        self._set_values(values[int(skip):], columns=columns, copy=False)
+        self.log.info("Loaded %d sample points from '%s'", len(self), self.file_name)
+
+    def _dump__npy(self):
+        self._dump_slice__npy(0, len(self))
+
+    def _update__npy(self):
+        self._dump_slice__npy(self.n_last_out(), len(self))
+
+    def _dump_slice__npy(self, n_min=None, n_max=None):
+        if n_min is None or n_max is None:
+            raise LoggedError(self.log, "Needs to specify the limit n's to dump.")
+        if self._n_last_out == n_max:
+            return
+        self._n_last_out = n_max
+        if not n_min:
+            if os.path.exists(self.file_name):
+                raise LoggedError(self.log,
+                                  "Output file %s already exists (report bug)",
+                                  self.file_name)
+            with open(self.file_name, "wb") as out:
+                out.write(npy_header(self._data_columns, 0))
+        # Write the new rows first, and then update the number of rows in the header,
+        # so that the file is always readable, even if interrupted
+        header_len = len(npy_header(self._data_columns, 0))
+        row_size = np.dtype(np.float64).itemsize * len(self._data_columns)
+        with open(self.file_name, "r+b") as out:
+            out.seek(header_len + n_min * row_size)
+            out.write(np.ascontiguousarray(
+                self.values[n_min:n_max], dtype="<f8").tobytes())
+            out.truncate()
+            out.flush()
+            out.seek(0)
+            out.write(npy_header(self._data_columns, n_max))
+
+    def _delete__npy(self):
+        self._delete__txt()
+
     # dummy driver
     def _dump__dummy(self):
         pass
@@ -580,6 +791,7 @@ class SampleCollection(BaseCollection):
 
     # Make it picklable -- formatters are deleted
     # (they will be generated next time txt is dumped)
+    # and the unused rows of the buffer are dropped
     def __getstate__(self):
         attributes = super().__getstate__().copy()
         for attr in ['_numpy_fmts', '_header_formatter']:
@@ -587,6 +799,9 @@ class SampleCollection(BaseCollection):
                 del attributes[attr]
             except KeyError:
                 pass
+        if attributes.get("_buffer") is not None:
+            attributes["_buffer"] = attributes["_buffer"][:self._n]
+        attributes["_data_frame"] = None
         return attributes
 
 
@@ -649,8 +864,8 @@ class OnePoint(SampleCollection):
         super().add(*args, **kwargs)
 
     def increase_weight(self, increase):
-        # For some reason, faster than `self.data[Par.weight] += increase`
-        self.data.at[0, OutPar.weight] += increase
+        self._buffer[0, self._data_columns.index(OutPar.weight)] += increase
+        self._invalidate_data()
 
     # Restore original __repr__ (here, there is only 1 sample)
     def __repr__(self):
@@ -659,3 +874,6 @@ class OnePoint(SampleCollection):
     # Dumper changed: always force to print the single element.
     def _update__txt(self):
         self._dump_slice__txt(0, 1)
+
+    def _update__npy(self):
+        self._dump_slice__npy(0, 1)
@@ -1,4 +1,6 @@
 import time
+from copy import deepcopy
+import numpy as np
 from packaging import version
 from typing import Optional, Union, List
 
@@ -10,9 +12,15 @@ from cobaya.conventions import packages_path_input
 
 
 class Timer:
+    # number of most recent evaluation times kept for the percentiles
+    n_times = 1000
+
     def __init__(self):
         self.n = 0
+        self.n_failed = 0
         self.time_sum = 0.
+        # most recent evaluation times (except for the first one), in a circular buffer
+        self.times = np.empty(self.n_times)
         self._start = None
         self._time_func = getattr(time, "perf_counter", time.time)
         self._first_time = None
@@ -46,9 +54,24 @@ class Timer:
         else:
             self.n += 1
             self.time_sum += delta_time
+            self.times[(self.n - 2) % self.n_times] = delta_time
         if logger:
             logger.debug("Average evaluation time: %g s", self.get_time_avg())
 
+    def increment_failed(self):
+        self.n_failed += 1
+
+    def get_percentiles(self, q=(50, 90, 99)) -> Optional[np.ndarray]:
+        """
+        Returns the given percentiles of the last ``n_times`` evaluation times (excluding
+        the first evaluation, unless it is the only one), or ``None`` if never evaluated.
+        """
+        if self.n > 1:
+            return np.percentile(self.times[:min(self.n - 1, self.n_times)], q)
+        if self._first_time is not None:
+            return np.full(len(q), self._first_time)
+        return None
+
 
 class CobayaComponent(HasLogger, HasDefaults):
     """
@@ -174,6 +197,11 @@ class ComponentCollection(dict, HasLogger):
     Base class for a dictionary of components (e.g. likelihoods or theories)
     """
 
+    def __deepcopy__(self, memo=None):
+        new = super().__deepcopy__(memo)
+        new.update((name, deepcopy(component, memo)) for name, component in self.items())
+        return new
+
     def get_helper_theory_collection(self):
         return self
 
@@ -184,14 +212,18 @@ class ComponentCollection(dict, HasLogger):
         self[name] = component
 
     def dump_timing(self):
-        timers = [component for component in self.values() if component.timer]
+        timers = [component for component in self.values()
+                  if component.timer and component.timer.n]
         if timers:
             sep = "\n   "
             self.log.info(
                 "Average computation time:" + sep + sep.join(
-                    ["%s : %g s (%d evaluations, %g s total)" % (
-                        component.get_name(), component.timer.get_time_avg(),
-                        component.timer.n_avg(), component.timer.time_sum)
+                    ["%s : %g s (%d evaluations, %g s total; "
+                     "percentiles 50/90/99%%: %g/%g/%g s; %d failed)" % (
+                        (component.get_name(), component.timer.get_time_avg(),
+                         component.timer.n_avg(), component.timer.time_sum) +
+                        tuple(component.timer.get_percentiles()) +
+                        (component.timer.n_failed,))
                      for component in timers]))
 
     def get_versions(self, add_version_field=False) -> InfoDict:
@@ -458,7 +458,8 @@ def is_equal_info(info_old, info_new, strict=True, print_not_log=False, ignore_b
         myprint_debug = log.debug
     myname = inspect.stack()[0][3]
     ignore = set() if strict else \
-        {"debug", "debug_file", "resume", "force", packages_path_input, "test", "version"}
+        {"debug", "debug_file", "resume", "force", packages_path_input, "test", "version",
+         "component_threads", "trace"}
     ignore = ignore.union(ignore_blocks or [])
     if set(info for info in info_old if info_old[info] is not None) - ignore \
             != set(info for info in info_new if info_new[info] is not None) - ignore:
@@ -80,6 +80,7 @@ class Likelihood(Theory, LikelihoodInterface):
     functions (logp function for a given point)."""
 
     type: Optional[Union[list, str]] = []
+    _trace_category = "likelihood"
 
     def __init__(self, info: LikeDictIn = empty_dict,
                  name: Optional[str] = None,
@@ -131,6 +132,37 @@ class Likelihood(Theory, LikelihoodInterface):
         if derived is not None:
             state["derived"] = derived.copy()
 
+    def logp_batch(self, **params_values_arrays):
+        """
+        Optional vectorized version of :meth:`Likelihood.logp`: takes as keyword
+        arguments the parameter values as arrays with one element per point, and
+        returns an array of log likelihood values. To get the derived parameters, pass a
+        `_derived` keyword with an empty dictionary, to be filled with arrays of values.
+
+        If implemented, it is used by :meth:`~model.Model.logposterior_batch` when this
+        likelihood does not depend on any theory code.
+        """
+        raise NotImplementedError
+
+    def can_calculate_batch(self) -> bool:
+        return type(self).logp_batch is not Likelihood.logp_batch or \
+               type(self).calculate_batch is not Likelihood.calculate_batch
+
+    def calculate_batch(self, states, want_derived=True, **params_values_arrays):
+        """
+        Calculates the likelihood and any derived parameters for a batch of points,
+        using :meth:`Likelihood.logp_batch`.
+        """
+        derived: Optional[Dict[str, np.ndarray]] = {} if want_derived else None
+        logps = np.broadcast_to(
+            np.asarray(self.logp_batch(_derived=derived, **params_values_arrays),
+                       dtype=np.float64), len(states))
+        self.log.debug("Computed %d log-likelihoods", len(states))
+        for i, state in enumerate(states):
+            state["logp"] = logps[i]
+            if derived is not None:
+                state["derived"] = {p: values[i] for p, values in derived.items()}
+
     def wait(self):
         if self.delay:
             self.log.debug("Sleeping for %f seconds.", self.delay)
@@ -7,7 +7,10 @@
 """
 # Global
 import os
+import numpy as np
 from getdist import IniFile
+from scipy.linalg import solve_triangular
+from scipy.linalg.blas import dtrmv
 
 # Local
 from cobaya.log import LoggedError
@@ -78,3 +81,22 @@ class DataSetLikelihood(InstallableLikelihood):
 
     def init_params(self, ini):
         assert False, "init_params should be inherited"
+
+    @staticmethod
+    def _whitening_matrix(cov):
+        """
+        Inverse of the (lower) Cholesky factor of the covariance ``cov``, in Fortran
+        order, to be used with :meth:`DataSetLikelihood._whitened_chi_squared`.
+        """
+        cholesky = np.linalg.cholesky(cov)
+        return np.asfortranarray(
+            solve_triangular(cholesky, np.eye(len(cov)), lower=True, check_finite=False))
+
+    @staticmethod
+    def _whitened_chi_squared(whitening, x):
+        """
+        Chi squared of the residuals ``x``, given the whitening matrix of their
+        covariance, with a single triangular matrix-vector product.
+        """
+        whitened = dtrmv(whitening, x, lower=1)
+        return whitened.dot(whitened)
@@ -131,6 +131,40 @@ from cobaya.conventions import Const, packages_path_input
 from cobaya.typing import InfoDict
 from cobaya.likelihoods.base_classes import InstallableLikelihood
 
+# Theoretical predictions of each observable, as functions of the redshifts, the
+# angular diameter distances and Hubble rates (in km/s/Mpc) at them, f*sigma8 at them
+# and the sound horizon radius (only the quantities in _observable_quantities are given)
+_observable_functions = {
+    # Spherically-averaged distance, over sound horizon radius
+    "DV_over_rs": lambda z, DA, H, fsigma8, rs: np.cbrt(
+        ((1 + z) * DA) ** 2 * Const.c_km_s * z / H) / rs,
+    # Idem, inverse
+    "rs_over_DV": lambda z, DA, H, fsigma8, rs: np.cbrt(
+        ((1 + z) * DA) ** 2 * Const.c_km_s * z / H) ** (-1) * rs,
+    # Comoving angular diameter distance, over sound horizon radius
+    "DM_over_rs": lambda z, DA, H, fsigma8, rs: (1 + z) * DA / rs,
+    # Physical angular diameter distance, over sound horizon radius
+    "DA_over_rs": lambda z, DA, H, fsigma8, rs: DA / rs,
+    # Hubble distance [c/H(z)] over sound horizon radius.
+    "DH_over_rs": lambda z, DA, H, fsigma8, rs: 1 / (H / Const.c_km_s) / rs,
+    # Hubble parameter, times sound horizon radius
+    "Hz_rs": lambda z, DA, H, fsigma8, rs: H * rs,
+    # Diff Linear Growth Rate times present amplitude
+    "f_sigma8": lambda z, DA, H, fsigma8, rs: fsigma8,
+    # Anisotropy (Alcock-Paczynski) parameter
+    "F_AP": lambda z, DA, H, fsigma8, rs: (1 + z) * DA * H / Const.c_km_s}
+
+# Quantities from the theory needed by each observable
+_observable_quantities = {
+    "DV_over_rs": ("angular_diameter_distance", "Hubble", "rdrag"),
+    "rs_over_DV": ("angular_diameter_distance", "Hubble", "rdrag"),
+    "DM_over_rs": ("angular_diameter_distance", "rdrag"),
+    "DA_over_rs": ("angular_diameter_distance", "rdrag"),
+    "DH_over_rs": ("Hubble", "rdrag"),
+    "Hz_rs": ("Hubble", "rdrag"),
+    "f_sigma8": ("fsigma8",),
+    "F_AP": ("angular_diameter_distance", "Hubble")}
+
 
 class BAO(InstallableLikelihood):
     # Data type for aggregated chi2 (case sensitive)
@@ -229,8 +263,24 @@ class BAO(InstallableLikelihood):
                     self.log, "Couldn't find (inv)cov file '%s' in folder '%s'. " % (
                         self.cov_file or self.invcov_file,
                         data_file_path) + "Check your paths.")
-            self.logpdf = lambda x: (lambda x_: -0.5 * x_.dot(self.invcov).dot(x_))(
-                x - self.data["value"].values)
+            # x^T C^-1 x = |U^T x|^2, with U the Cholesky factor of C^-1 (cached)
+            self._invcov_factor_T = np.linalg.cholesky(self.invcov).T.copy()
+            self._data_vector = self.data["value"].values.astype(float)
+            self.logpdf = lambda x: (lambda x_: -0.5 * x_.dot(x_))(
+                self._invcov_factor_T.dot(x - self._data_vector))
+        # Rows of the data of each observable, and unique redshifts at which each theory
+        # quantity is needed (and the indices of the rows needing it in those)
+        observables = self.data["observable"].values
+        self._zs = self.data["z"].values.astype(float)
+        self._observable_rows = {obs: np.flatnonzero(observables == obs)
+                                 for obs in pd.unique(observables)}
+        self._quantity_zs = {}
+        for quantity in ["angular_diameter_distance", "Hubble", "fsigma8"]:
+            rows = np.flatnonzero([quantity in _observable_quantities.get(obs, ())
+                                   for obs in observables])
+            if len(rows):
+                self._quantity_zs[quantity] = (rows,) + tuple(
+                    np.unique(self._zs[rows], return_inverse=True))
 
     def get_requirements(self):
         # Requisites
@@ -278,45 +328,48 @@ class BAO(InstallableLikelihood):
         return requisites
 
     def theory_fun(self, z, observable):
-        # Functions to get the corresponding theoretical prediction:
-        # Spherically-averaged distance, over sound horizon radius
-        if observable == "DV_over_rs":
-            return np.cbrt(
-                ((1 + z) * self.provider.get_angular_diameter_distance(z)) ** 2 *
-                Const.c_km_s * z / self.provider.get_Hubble(z,
-                                                            units="km/s/Mpc")) / self.rs()
-        # Idem, inverse
-        elif observable == "rs_over_DV":
-            return np.cbrt(
-                ((1 + z) * self.provider.get_angular_diameter_distance(z)) ** 2 *
-                Const.c_km_s * z / self.provider.get_Hubble(z, units="km/s/Mpc")) ** (
-                       -1) * self.rs()
-        # Comoving angular diameter distance, over sound horizon radius
-        elif observable == "DM_over_rs":
-            return (1 + z) * self.provider.get_angular_diameter_distance(z) / self.rs()
-        # Physical angular diameter distance, over sound horizon radius
-        elif observable == "DA_over_rs":
-            return self.provider.get_angular_diameter_distance(z) / self.rs()
-        # Hubble distance [c/H(z)] over sound horizon radius.
-        elif observable == "DH_over_rs":
-            return 1 / self.provider.get_Hubble(z, units="1/Mpc") / self.rs()
-        # Hubble parameter, times sound horizon radius
-        elif observable == "Hz_rs":
-            return self.provider.get_Hubble(z, units="km/s/Mpc") * self.rs()
-        # Diff Linear Growth Rate times present amplitude
-        elif observable == "f_sigma8":
-            return self.provider.get_fsigma8(z)
-        # Anisotropy (Alcock-Paczynski) parameter
-        elif observable == "F_AP":
-            return ((1 + z) * self.provider.get_angular_diameter_distance(z) *
-                    self.provider.get_Hubble(z, units="km/s/Mpc")) / Const.c_km_s
+        # Functions to get the corresponding theoretical prediction (see
+        # _observable_functions): only the quantities needed are requested
+        needed = _observable_quantities[observable]
+        return _observable_functions[observable](
+            z,
+            self.provider.get_angular_diameter_distance(z)
+            if "angular_diameter_distance" in needed else None,
+            self.provider.get_Hubble(z, units="km/s/Mpc") if "Hubble" in needed else None,
+            self.provider.get_fsigma8(z) if "fsigma8" in needed else None,
+            self.rs() if "rdrag" in needed else None)
+
+    def theory_vector(self):
+        """
+        Theoretical predictions for all data points, fetching every quantity from the
+        theory once for all redshifts, and computing each type of observable at once.
+        """
+        values = {}
+        for quantity, (rows, zs, index) in self._quantity_zs.items():
+            if quantity == "angular_diameter_distance":
+                at_zs = self.provider.get_angular_diameter_distance(zs)
+            elif quantity == "Hubble":
+                at_zs = self.provider.get_Hubble(zs, units="km/s/Mpc")
+            else:
+                at_zs = self.provider.get_fsigma8(zs)
+            values[quantity] = np.empty(len(self._zs))
+            values[quantity][rows] = np.asarray(at_zs)[index]
+        rs = self.rs() if any("rdrag" in _observable_quantities[obs]
+                              for obs in self._observable_rows) else None
+        theory = np.empty(len(self._zs))
+        for obs, rows in self._observable_rows.items():
+            theory[rows] = _observable_functions[obs](
+                self._zs[rows], *(values[quantity][rows] if quantity in values else None
+                                  for quantity in
+                                  ["angular_diameter_distance", "Hubble", "fsigma8"]),
+                rs)
+        return theory
 
     def rs(self):
         return self.provider.get_param("rdrag") * self.rs_rescale
 
     def logp(self, **params_values):
-        theory = np.array([self.theory_fun(z, obs) for z, obs
-                           in zip(self.data["z"], self.data["observable"])]).T[0]
+        theory = self.theory_vector()
         if self.is_debug():
             for i, (z, obs, theo) in enumerate(
                     zip(self.data["z"], self.data["observable"], theory)):
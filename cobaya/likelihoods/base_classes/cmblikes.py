@@ -14,6 +14,7 @@ import numpy as np
 from typing import List
 from getdist import ParamNames, IniFile
 from scipy.linalg import sqrtm
+from scipy.sparse import csr_matrix
 
 # Local
 from cobaya.log import LoggedError
@@ -131,19 +132,10 @@ class CMBlikes(DataSetLikelihood):
         return cols
 
     def elements_to_matrix(self, X, M):
-        ix = 0
-        for i in range(self.nmaps):
-            M[i, 0:i] = X[ix:ix + i]
-            M[0:i, i] = X[ix:ix + i]
-            ix += i
-            M[i, i] = X[ix]
-            ix += 1
+        M[...] = X[..., self._matrix_elements]
 
     def matrix_to_elements(self, M, X):
-        ix = 0
-        for i in range(self.nmaps):
-            X[ix:ix + i + 1] = M[i, 0:i + 1]
-            ix += i + 1
+        X[...] = M[..., self._elements_i, self._elements_j]
 
     def read_cl_array(self, ini, file_stem, return_full=False):
         # read file of CL or bins (indexed by L)
@@ -201,9 +193,15 @@ class CMBlikes(DataSetLikelihood):
                                  (file_stem, b, windows % (b + 1)))
         if ini.hasKey(file_stem + '_fix_cl_file'):
             raise LoggedError(self.log, 'fix_cl_file not implemented yet')
+        bins.init_operator(self.nmaps_required)
         return bins
 
-    def init_map_cls(self, nmaps, order):
+    def init_map_cls(self, nmaps, order, stack=None):
+        """
+        Creates the cross-power spectra of the given maps. If ``stack`` is given, an array
+        with one row per pair of maps (in the order of ``numpy.tril_indices``), their
+        ``CL`` are views of its rows, so that they can be binned at once.
+        """
         if nmaps != len(order):
             raise LoggedError(self.log, 'init_map_cls: size mismatch')
 
@@ -213,13 +211,18 @@ class CMBlikes(DataSetLikelihood):
             CL: np.ndarray
 
         cls = np.empty((nmaps, nmaps), dtype=object)
+        ix = 0
         for i in range(nmaps):
             for j in range(i + 1):
                 CL = CrossPowerSpectrum()
                 cls[i, j] = CL
                 CL.map_ij = [order[i], order[j]]
                 CL.theory_ij = self.MapPair_to_Theory_i_j(order, [i, j])
-                CL.CL = np.zeros(self.pcl_lmax - self.pcl_lmin + 1)
+                if stack is None:
+                    CL.CL = np.zeros(self.pcl_lmax - self.pcl_lmin + 1)
+                else:
+                    CL.CL = stack[ix]
+                ix += 1
         return cls
 
     def init_params(self, ini):
@@ -298,6 +301,12 @@ class CMBlikes(DataSetLikelihood):
                 self.used_map_order.append(map_name)
                 ix += 1
         self.ncl = (self.nmaps * (self.nmaps + 1)) // 2
+        # Gather indices between the independent elements (in the order TT, ET, EE...)
+        # of the symmetric map-covariance matrices and the matrices themselves
+        self._elements_i, self._elements_j = np.tril_indices(self.nmaps)
+        self._matrix_elements = np.empty((self.nmaps, self.nmaps), dtype=int)
+        self._matrix_elements[self._elements_i, self._elements_j] = np.arange(self.ncl)
+        self._matrix_elements[self._elements_j, self._elements_i] = np.arange(self.ncl)
         self.pcl_lmax = ini.int('cl_lmax')
         self.pcl_lmin = ini.int('cl_lmin')
         self.binned = ini.bool('binned', True)
@@ -348,13 +357,12 @@ class CMBlikes(DataSetLikelihood):
         self.fiducial_sqrt_matrix = self.bandpower_matrix.copy()
         if self.cl_fiducial is not None and not cl_fiducial_includes_noise:
             self.cl_fiducial += self.cl_noise
-        for b in range(self.nbins_used):
-            self.elements_to_matrix(self.bandpowers[:, b], self.bandpower_matrix[b, :, :])
-            if self.cl_noise is not None:
-                self.elements_to_matrix(self.cl_noise[:, b], self.noise_matrix[b, :, :])
-            if self.cl_fiducial is not None:
-                self.elements_to_matrix(self.cl_fiducial[:, b],
-                                        self.fiducial_sqrt_matrix[b, :, :])
+        self.elements_to_matrix(self.bandpowers.T, self.bandpower_matrix)
+        if self.cl_noise is not None:
+            self.elements_to_matrix(self.cl_noise.T, self.noise_matrix)
+        if self.cl_fiducial is not None:
+            self.elements_to_matrix(self.cl_fiducial.T, self.fiducial_sqrt_matrix)
+            for b in range(self.nbins_used):
                 self.fiducial_sqrt_matrix[b, :, :] = (
                     sqrtm(self.fiducial_sqrt_matrix[b, :, :]))
         if self.like_approx == 'exact':
@@ -362,6 +370,9 @@ class CMBlikes(DataSetLikelihood):
         else:
             self.cov = self.ReadCovmat(ini)
             self.covinv = np.linalg.inv(self.cov)
+            # matrix elements of the bins gathered into the vector of the chi squared
+            self._used_i = self._elements_i[self.cl_used_index]
+            self._used_j = self._elements_j[self.cl_used_index]
         if 'linear_correction_fiducial_file' in ini.params:
             self.fid_correction = self.read_cl_array(ini, 'linear_correction_fiducial')
             self.linear_correction = self.read_bin_windows(ini,
@@ -392,7 +403,11 @@ class CMBlikes(DataSetLikelihood):
                              'set separately in .yaml file')
         self.aberration_coeff = ini.float('aberration_coeff', 0.0)
 
-        self.map_cls = self.init_map_cls(self.nmaps_required, self.required_order)
+        # theory spectra of the pairs of maps, updated in place and binned at once
+        self.map_cls_stack = np.zeros(((self.nmaps_required * (self.nmaps_required + 1))
+                                       // 2, self.pcl_lmax - self.pcl_lmin + 1))
+        self.map_cls = self.init_map_cls(self.nmaps_required, self.required_order,
+                                         stack=self.map_cls_stack)
 
     def ReadCovmat(self, ini):
         """Read the covariance matrix, and the array of which CL are in the covariance,
@@ -547,41 +562,44 @@ class CMBlikes(DataSetLikelihood):
 
     @staticmethod
     def transform(C, Chat, Cfhalf):
-        # HL transformation of the matrices
-        if C.shape[0] == 1:
-            rat = Chat[0, 0] / C[0, 0]
-            C[0, 0] = (np.sign(rat - 1) *
-                       np.sqrt(2 * np.maximum(0, rat - np.log(rat) - 1)) *
-                       Cfhalf[0, 0] ** 2)
+        """
+        HL transformation of the matrices ``C`` (in place), given the data ``Chat`` and
+        the square root of the fiducial ``Cfhalf``. All of them can be stacks of matrices
+        (along the leading axes), transformed at once with batched operations.
+        """
+        if C.shape[-1] == 1:
+            rat = Chat[..., 0, 0] / C[..., 0, 0]
+            C[..., 0, 0] = (np.sign(rat - 1) *
+                            np.sqrt(2 * np.maximum(0, rat - np.log(rat) - 1)) *
+                            Cfhalf[..., 0, 0] ** 2)
             return
         diag, U = np.linalg.eigh(C)
-        rot = U.T.dot(Chat).dot(U)
         roots = np.sqrt(diag)
-        for i, root in enumerate(roots):
-            rot[i, :] /= root
-            rot[:, i] /= root
-        U.dot(rot.dot(U.T), rot)
-        diag, rot = np.linalg.eigh(rot)
+        rot = (np.swapaxes(U, -1, -2) @ Chat @ U /
+               (roots[..., :, None] * roots[..., None, :]))
+        diag, rot = np.linalg.eigh(U @ rot @ np.swapaxes(U, -1, -2))
         diag = np.sign(diag - 1) * np.sqrt(2 * np.maximum(0, diag - np.log(diag) - 1))
-        Cfhalf.dot(rot, U)
-        for i, d in enumerate(diag):
-            rot[:, i] = U[:, i] * d
-        rot.dot(U.T, C)
+        U = Cfhalf @ rot
+        C[...] = U * diag[..., None, :] @ np.swapaxes(U, -1, -2)
 
     def exact_chi_sq(self, C, Chat, L):
-        if C.shape[0] == 1:
-            return ((2 * L + 1) * self.fsky *
-                    (Chat[0, 0] / C[0, 0] - 1 - np.log(Chat[0, 0] / C[0, 0])))
-        else:
-            M = np.linalg.inv(C).dot(Chat)
-            return ((2 * L + 1) * self.fsky *
-                    (np.trace(M) - self.nmaps - np.linalg.slogdet(M)[1]))
+        """
+        Exact full-sky chi squared of the matrices ``C`` given the data ``Chat`` at
+        multipole(s) ``L``. ``C`` and ``Chat`` can be stacks of matrices (along the
+        leading axes), with ``L`` an array of the same length: returns then an array.
+        """
+        if C.shape[-1] == 1:
+            rat = Chat[..., 0, 0] / C[..., 0, 0]
+            return (2 * L + 1) * self.fsky * (rat - 1 - np.log(rat))
+        M = np.linalg.solve(C, Chat)
+        return ((2 * L + 1) * self.fsky *
+                (np.trace(M, axis1=-2, axis2=-1) - self.nmaps -
+                 np.linalg.slogdet(M)[1]))
 
     def logp(self, **data_params):
         cls = self.provider.get_Cl(ell_factor=True)
         return self.log_likelihood(cls, **data_params)
 
-    # noinspection PyUnboundLocalVariable
     def log_likelihood(self, dls, **data_params):
         r"""
         Get log likelihood from the dls (CMB C_l scaled by L(L+1)/2\pi)
@@ -591,47 +609,33 @@ class CMBlikes(DataSetLikelihood):
         :return: log likelihood
         """
         self.get_theory_map_cls(dls, data_params)
-        C = np.empty((self.nmaps, self.nmaps))
-        big_x = np.empty(self.nbins_used * self.ncl_used)
-        vecp = np.empty(self.ncl)
-        chisq = 0
+        # stack of the theory matrices of all bins, processed at once
         if self.binned:
-            binned_theory = self.get_binned_map_cls(self.map_cls)
+            C = self.get_binned_map_cls(self.map_cls_stack)[:, self._matrix_elements]
         else:
-            Cs = np.zeros((self.nbins_used, self.nmaps, self.nmaps))
+            C = np.zeros((self.nbins_used, self.nmaps, self.nmaps))
             for i in range(self.nmaps):
                 for j in range(i + 1):
                     CL = self.map_cls[i, j]
                     if CL is not None:
-                        Cs[:, i, j] = CL.CL[self.bin_min - self.pcl_lmin:
-                                            self.bin_max - self.pcl_lmin + 1]
-                        Cs[:, j, i] = CL.CL[self.bin_min - self.pcl_lmin:
-                                            self.bin_max - self.pcl_lmin + 1]
-        for b in range(self.nbins_used):
-            if self.binned:
-                self.elements_to_matrix(binned_theory[b, :], C)
-            else:
-                C[:, :] = Cs[b, :, :]
-            if self.cl_noise is not None:
-                C += self.noise_matrix[b]
-            if self.like_approx == 'exact':
-                chisq += self.exact_chi_sq(
-                    C, self.bandpower_matrix[b], self.bin_min + b)
-                continue
-            elif self.like_approx == 'HL':
-                try:
-                    self.transform(
-                        C, self.bandpower_matrix[b], self.fiducial_sqrt_matrix[b])
-                except np.linalg.LinAlgError:
-                    self.log.debug("Likelihood computation failed.")
-                    return -np.inf
-            elif self.like_approx == 'gaussian':
-                C -= self.bandpower_matrix[b]
-            self.matrix_to_elements(C, vecp)
-            big_x[b * self.ncl_used:(b + 1) * self.ncl_used] = vecp[
-                self.cl_used_index]
+                        C[:, i, j] = CL.CL[self.bin_min - self.pcl_lmin:
+                                           self.bin_max - self.pcl_lmin + 1]
+                        C[:, j, i] = CL.CL[self.bin_min - self.pcl_lmin:
+                                           self.bin_max - self.pcl_lmin + 1]
+        if self.cl_noise is not None:
+            C += self.noise_matrix
         if self.like_approx == 'exact':
-            return -0.5 * chisq
+            return -0.5 * np.sum(self.exact_chi_sq(
+                C, self.bandpower_matrix, self.bin_min + np.arange(self.nbins_used)))
+        elif self.like_approx == 'HL':
+            try:
+                self.transform(C, self.bandpower_matrix, self.fiducial_sqrt_matrix)
+            except np.linalg.LinAlgError:
+                self.log.debug("Likelihood computation failed.")
+                return -np.inf
+        elif self.like_approx == 'gaussian':
+            C -= self.bandpower_matrix
+        big_x = C[:, self._used_i, self._used_j].ravel()
         return -0.5 * self._fast_chi_squared(self.covinv, big_x)
 
 
@@ -639,6 +643,7 @@ class BinWindows:
     cols_in: np.ndarray
     cols_out: np.ndarray
     binning_matrix: np.ndarray
+    binning_operator: csr_matrix
 
     def __init__(self, lmin, lmax, nbins, ncl):
         self.lmin = lmin
@@ -646,12 +651,43 @@ class BinWindows:
         self.nbins = nbins
         self.ncl = ncl
 
+    def init_operator(self, nmaps):
+        """
+        Builds a sparse operator binning at once the flattened stack of theory spectra of
+        ``nmaps`` maps (one row per pair i >= j, in the order of ``numpy.tril_indices``)
+        into the bandpowers, flattened as (bin, spectrum).
+        """
+        n_ell = self.binning_matrix.shape[-1]
+        rows, cols = [np.empty(0, dtype=int)], [np.empty(0, dtype=int)]
+        values = [np.empty(0)]
+        for i, ((x, y), ix_out) in enumerate(zip(self.cols_in.T, self.cols_out)):
+            if ix_out < 0 or x < 0 or y < 0:
+                continue
+            b, ell = np.nonzero(self.binning_matrix[i])
+            rows.append(b * self.ncl + ix_out)
+            cols.append(((x * (x + 1)) // 2 + y) * n_ell + ell)
+            values.append(self.binning_matrix[i, b, ell])
+        # repeated entries (same input and output spectra) are summed
+        self.binning_operator = csr_matrix(
+            (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(self.nbins * self.ncl, (nmaps * (nmaps + 1)) // 2 * n_ell))
+
     def bin(self, theory_cl, cls=None):
+        """
+        Bins the theory spectra, given either as the array of cross-power spectra of
+        pairs of maps, or as their stack (see :meth:`BinWindows.init_operator`).
+        """
         if cls is None:
             cls = np.zeros((self.nbins, self.ncl))
+        if theory_cl.dtype != object:
+            cls += (self.binning_operator @ theory_cl.ravel()).reshape(
+                self.nbins, self.ncl)
+            return cls
         for i, ((x, y), ix_out) in enumerate(zip(self.cols_in.T, self.cols_out)):
+            if ix_out < 0 or x < 0 or y < 0:  # unused spectra, as in the operator
+                continue
             cl = theory_cl[x, y]
-            if cl is not None and ix_out >= 0:
+            if cl is not None:
                 cls[:, ix_out] += np.dot(self.binning_matrix[i, :, :], cl.CL)
         return cls
 
@@ -55,6 +55,7 @@ import copy
 from cobaya.likelihoods.base_classes import DataSetLikelihood
 from cobaya.log import LoggedError
 from cobaya.conventions import Const
+from cobaya.theories.cosmo import PowerSpectrumEvaluator
 
 # DES data types
 def_DES_types = ['xip', 'xim', 'gammat', 'wtheta']
@@ -128,28 +129,6 @@ def get_def_cuts():  # pragma: no cover
     return ranges
 
 
-try:
-    import numba
-except ImportError:
-    numba = None
-else:
-
-    @numba.njit("void(float64[::1],float64[::1],float64[::1],float64[::1])")
-    def _get_lensing_dots(wq_b, chis, n_chi, dchis):
-        for i, chi in enumerate(chis):
-            wq_b[i] = np.dot(n_chi[i:], (1 - chi / chis[i:]) * dchis[i:])
-
-
-    @numba.njit("void(float64[:,::1],float64[:,::1],float64[::1],float64)")
-    def _limber_PK_terms(powers, ks, dchifac, kmax):
-        for ix in range(powers.shape[0]):
-            for i in range(powers.shape[1]):
-                if 1e-4 <= ks[ix, i] < kmax:
-                    powers[ix, i] *= dchifac[i]
-                else:
-                    powers[ix, i] = 0
-
-
 class DES(DataSetLikelihood):
     install_options = {"github_repository": "CobayaSampler/des_data",
                        "github_release": "v1.0"}
@@ -396,6 +375,54 @@ class DES(DataSetLikelihood):
         # Interpolator z sampling
         assert self.zmax <= 5, "z max too large!"
         self.zs_interp = np.linspace(0, self.zmax, 100)
+        self.init_projection()
+
+    def init_projection(self):
+        """
+        Precomputes the parts of the projection of the power spectrum into correlation
+        functions that do not depend on the theory: the multipoles of the Limber
+        integrals, the B-spline basis of the power spectra at the fixed redshifts, the
+        indices of the (upper-triangular) lensing kernel, the bin pairs of each data type,
+        and the linear operators interpolating the C_L and transforming them into
+        correlation functions at the angular bins.
+        """
+        self.ls_cl = np.hstack((np.arange(2., 100 - 4 / self.acc, 4 / self.acc),
+                                np.exp(np.linspace(np.log(100.), np.log(self.l_max),
+                                                   int(50 * self.acc)))))
+        self._pk_evaluator = PowerSpectrumEvaluator(self.zs)
+        self._lensing_kernel_indices = np.triu_indices(len(self.zs))
+        self._pairs = {}
+        for i, tp in enumerate(self.data_types):
+            pairs = np.array(self.bin_pairs[i], dtype=int).reshape(-1, 2)
+            self._pairs[tp] = pairs[:, 0], pairs[:, 1]
+        if not self.use_hankel:
+            # The (cubic) spline interpolation of the C_L at the ls_bessel is linear in
+            # the C_L: compose it with the Bessel transforms of the three orders
+            interpolation = np.array([_spline(self.ls_cl, unit)(self.ls_bessel)
+                                      for unit in np.eye(len(self.ls_cl))])
+            self._cl_to_corrs = [interpolation.dot(js) for js in self.bessel_cache]
+
+    def lensing_efficiencies(self, chis, dchis, n_chi):
+        """
+        Lensing efficiencies at ``chis`` of the sources with distributions ``n_chi``
+        (one row per bin), as their product with the upper-triangular lensing kernel.
+        """
+        i, j = self._lensing_kernel_indices
+        kernel = np.zeros((len(chis), len(chis)))
+        kernel[i, j] = (1 - chis[i] / chis[j]) * dchis[j]
+        return n_chi.dot(kernel.T)
+
+    def limber_power(self, PKs, chis, dchifac):
+        """
+        Power spectra of the interpolators ``PKs`` (stacked along the first axis) at the
+        Limber wavenumbers (L + 1/2) / chi of every multipole ``ls_cl`` (rows) and
+        comoving distance ``chis`` (columns), times the weights of the integral along the
+        line of sight.
+        """
+        ks = np.outer(self.ls_cl + 0.5, 1 / chis)
+        powers = self._pk_evaluator.P(PKs, ks)
+        kmaxs = np.array([PK.kmax for PK in PKs])[:, np.newaxis, np.newaxis]
+        return np.where((ks >= 1e-4) & (ks < kmaxs), powers * dchifac, 0)
 
     def get_requirements(self):
         return {
@@ -423,9 +450,8 @@ class DES(DataSetLikelihood):
         c = Const.c_km_s * 1e3  # m/s
 
         if any(t in self.used_types for t in ["gammat", "wtheta"]):
-            qgal = []
+            qgal = np.empty((self.nwbins, len(chis)))
             for b in range(self.nwbins):
-                qgal.append([])
                 zshift = self.zs - lens_photoz_errors[b]
                 n_chi = Hs * self.zbin_w_sp[b](zshift)
                 n_chi[zshift < 0] = 0
@@ -437,19 +463,12 @@ class DES(DataSetLikelihood):
                             intrinsic_alignment_alpha) * 0.0134 / D_growth)
             Alignment_z /= (chis * (1 + self.zs) * 3 * h2 * (1e5 / c) ** 2 / 2)
 
-            wq = np.empty((self.nzbins, len(chis)))
-            wq_b = np.empty(chis.shape)
-
+            n_chi = np.empty((self.nzbins, len(chis)))
             for b in range(self.nzbins):
                 zshift = self.zs - wl_photoz_errors[b]
-                n_chi = Hs * self.zbin_sp[b](zshift)
-                n_chi[zshift < 0] = 0
-                if numba:
-                    _get_lensing_dots(wq_b, chis, n_chi, dchis)
-                else:
-                    for i, chi in enumerate(chis):
-                        wq_b[i] = np.dot(n_chi[i:], (1 - chi / chis[i:]) * dchis[i:])
-                wq[b] = wq_b - Alignment_z * n_chi
+                n_chi[b] = Hs * self.zbin_sp[b](zshift)
+                n_chi[b][zshift < 0] = 0
+            wq = self.lensing_efficiencies(chis, dchis, n_chi) - Alignment_z * n_chi
 
             if PKWeyl is not None:
                 if 'gammat' in self.used_types:
@@ -458,49 +477,34 @@ class DES(DataSetLikelihood):
                 qs = chis * wq
             else:
                 qs = 3 * omegam * h2 * (1e5 / c) ** 2 * chis * (1 + self.zs) / 2 * wq
-        ls_cl = np.hstack((np.arange(2., 100 - 4 / self.acc, 4 / self.acc),
-                           np.exp(np.linspace(np.log(100.), np.log(self.l_max),
-                                              int(50 * self.acc)))))
+        ls_cl = self.ls_cl
         # Get the angular power spectra and transform back
         dchifac = dchis / chis ** 2
-        if numba:
-            ks = np.outer(ls_cl + 0.5, 1 / chis)
-            tmp = PKdelta.P(self.zs, ks, grid=False)
-            _limber_PK_terms(tmp, ks, dchifac, PKdelta.kmax)
-        else:
-            tmp = np.empty((ls_cl.shape[0], chis.shape[0]))
-            weight = np.empty(chis.shape)
-            for ix, l in enumerate(ls_cl):
-                k = (l + 0.5) / chis
-                weight[:] = dchifac
-                weight[k < 1e-4] = 0
-                weight[k >= PKdelta.kmax] = 0
-                tmp[ix, :] = weight * PKdelta.P(self.zs, k, grid=False)
-
-        if PKWeyl is not None:
-            if numba:
-                tmplens = PKWeyl.P(self.zs, ks, grid=False)
-                _limber_PK_terms(tmplens, ks, dchifac, PKWeyl.kmax)
-            else:
-                tmplens = np.empty((ls_cl.shape[0], chis.shape[0]))
-                for ix, l in enumerate(ls_cl):
-                    k = (l + 0.5) / chis
-                    weight[:] = dchifac
-                    weight[k < 1e-4] = 0
-                    weight[k >= PKWeyl.kmax] = 0
-                    tmplens[ix, :] = weight * PKWeyl.P(self.zs, k, grid=False)
-        else:
-            tmplens = tmp
+        # the Weyl potential power spectrum (if used) in the last row
+        powers = self.limber_power(
+            [PKdelta] + ([PKWeyl] if PKWeyl is not None else []), chis, dchifac)
+        tmp, tmplens = powers[0], powers[-1]
         corrs_th_p = np.empty((self.nzbins, self.nzbins), dtype=object)
         corrs_th_m = np.empty((self.nzbins, self.nzbins), dtype=object)
         corrs_th_w = np.empty((self.nwbins, self.nwbins), dtype=object)
         corrs_th_t = np.empty((self.nwbins, self.nzbins), dtype=object)
+        # C_L of all the bin pairs of each type at once (one row per pair)
+        cls = {}
+        if 'xip' in self.used_types or 'xim' in self.used_types:
+            f1s, f2s = self._pairs['xip']
+            cls['xip'] = (qs[f1s] * qs[f2s]).dot(tmplens.T)
+        if 'gammat' in self.used_types:
+            f1s, f2s = self._pairs['gammat']
+            cls['gammat'] = (qgal[f1s] * qs[f2s]).dot(tmp.T)
+        if 'wtheta' in self.used_types:
+            f1s, f2s = self._pairs['wtheta']
+            cls['wtheta'] = (qgal[f1s] * qgal[f2s]).dot(tmp.T)
         if self.use_hankel:  # pragma: no cover
             # Note that the absolute value of the correlation depends
             # on what you do about L_min (e.g. 1 vs 2 vs 0 makes a difference).
-            if 'xip' in self.used_types or 'xim' in self.used_types:
-                for (f1, f2) in self.bin_pairs[self.data_types.index('xip')]:
-                    cl = _spline(ls_cl, np.dot(tmplens, qs[f1] * qs[f2]))
+            if 'xip' in cls:
+                for f1, f2, cl_pair in zip(*self._pairs['xip'], cls['xip']):
+                    cl = _spline(ls_cl, cl_pair)
                     fac = ((1 + shear_calibration_parameters[f1]) * (
                             1 + shear_calibration_parameters[f2]) / 2 / np.pi)
                     corrs_th_p[f1, f2] = self.hankel0.transform(cl,
@@ -509,37 +513,38 @@ class DES(DataSetLikelihood):
                     corrs_th_m[f1, f2] = self.hankel4.transform(cl,
                                                                 self.theta_bins_radians,
                                                                 ret_err=False) * fac
-            if 'gammat' in self.used_types:
-                for (f1, f2) in self.bin_pairs[self.data_types.index('gammat')]:
-                    cl = _spline(ls_cl, np.dot(tmp, qgal[f1] * qs[f2]))
+            if 'gammat' in cls:
+                for f1, f2, cl_pair in zip(*self._pairs['gammat'], cls['gammat']):
+                    cl = _spline(ls_cl, cl_pair)
                     fac = (1 + shear_calibration_parameters[f2]) / 2 / np.pi
                     corrs_th_t[f1, f2] = self.hankel2.transform(
                         cl, self.theta_bins_radians, ret_err=False) * fac
-            if 'wtheta' in self.used_types:
-                for (f1, f2) in self.bin_pairs[self.data_types.index('wtheta')]:
-                    cl = _spline(ls_cl, np.dot(tmp, qgal[f1] * qgal[f2]))
+            if 'wtheta' in cls:
+                for f1, f2, cl_pair in zip(*self._pairs['wtheta'], cls['wtheta']):
+                    cl = _spline(ls_cl, cl_pair)
                     corrs_th_w[f1, f2] = self.hankel0.transform(cl,
                                                                 self.theta_bins_radians,
                                                                 ret_err=False) / 2 / np.pi
         else:
-            j0s, j2s, j4s = self.bessel_cache
-            ls_bessel = self.ls_bessel
-            if 'xip' in self.used_types or 'xim' in self.used_types:
-                for (f1, f2) in self.bin_pairs[self.data_types.index('xip')]:
-                    cl = _spline(ls_cl, np.dot(tmplens, qs[f1] * qs[f2]))(ls_bessel)
-                    fac = (1 + shear_calibration_parameters[f1]) * (
-                            1 + shear_calibration_parameters[f2])
-                    corrs_th_p[f1, f2] = np.dot(cl, j0s) * fac
-                    corrs_th_m[f1, f2] = np.dot(cl, j4s) * fac
-            if 'gammat' in self.used_types:
-                for (f1, f2) in self.bin_pairs[self.data_types.index('gammat')]:
-                    cl = _spline(ls_cl, np.dot(tmp, qgal[f1] * qs[f2]))(ls_bessel)
-                    corrs_th_t[f1, f2] = np.dot(cl, j2s) * (
-                            1 + shear_calibration_parameters[f2])
-            if 'wtheta' in self.used_types:
-                for (f1, f2) in self.bin_pairs[self.data_types.index('wtheta')]:
-                    cl = _spline(ls_cl, np.dot(tmp, qgal[f1] * qgal[f2]))(ls_bessel)
-                    corrs_th_w[f1, f2] = np.dot(cl, j0s)
+            cl_to_j0, cl_to_j2, cl_to_j4 = self._cl_to_corrs
+            if 'xip' in cls or 'gammat' in cls:
+                shear_factors = 1 + np.array(shear_calibration_parameters, dtype=float)
+            if 'xip' in cls:
+                f1s, f2s = self._pairs['xip']
+                fac = (shear_factors[f1s] * shear_factors[f2s])[:, None]
+                for f1, f2, xip, xim in zip(f1s, f2s, cls['xip'].dot(cl_to_j0) * fac,
+                                            cls['xip'].dot(cl_to_j4) * fac):
+                    corrs_th_p[f1, f2] = xip
+                    corrs_th_m[f1, f2] = xim
+            if 'gammat' in cls:
+                f1s, f2s = self._pairs['gammat']
+                corrs = cls['gammat'].dot(cl_to_j2) * shear_factors[f2s][:, None]
+                for f1, f2, gammat in zip(f1s, f2s, corrs):
+                    corrs_th_t[f1, f2] = gammat
+            if 'wtheta' in cls:
+                f1s, f2s = self._pairs['wtheta']
+                for f1, f2, wtheta in zip(f1s, f2s, cls['wtheta'].dot(cl_to_j0)):
+                    corrs_th_w[f1, f2] = wtheta
         return [corrs_th_p, corrs_th_m, corrs_th_t, corrs_th_w]
 
     def make_vector(self, arrays):
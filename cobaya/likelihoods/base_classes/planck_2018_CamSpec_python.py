@@ -163,6 +163,8 @@ class Planck2018CamSpecPython(DataSetLikelihood):
             l_min = np.min(lmin[self.cl_used])
             self.lnrat[l_min:] = np.log(self.ls[l_min:] / np.float64(pivot))
 
+        self.init_theory_indices(max_l)
+
         import hashlib
         cache_file = self.dataset_filename.replace('.dataset',
                                                    '_covinv_%s.npy' % hashlib.md5(
@@ -175,6 +177,21 @@ class Planck2018CamSpecPython(DataSetLikelihood):
             if use_cache:
                 np.save(cache_file, self.covinv.astype(np.float32))
 
+    def init_theory_indices(self, max_l):
+        # Indices gathering the theory and foregrounds into the data vector, ordered by
+        # spectrum: first the temperature ones, then TE and EE
+        used = [i for i in range(self.Nspec) if self.used_sizes[i] > 0]
+        self._spectrum_index = np.concatenate(
+            [np.full(self.used_sizes[i], i, dtype=int) for i in used])
+        self._data_ells = np.concatenate(
+            [np.asarray(self.ell_ranges[i], dtype=int) for i in used])
+        n_T = np.count_nonzero(self._spectrum_index <= 3)
+        n_TE = np.count_nonzero(self._spectrum_index == 4)
+        self._theory_blocks = [slice(0, n_T), slice(n_T, n_T + n_TE),
+                               slice(n_T + n_TE, len(self._spectrum_index))]
+        self._foreground_indices = (self._spectrum_index[:n_T] * (max_l + 1) +
+                                    self._data_ells[:n_T])
+
     def get_foregrounds(self, data_params):
 
         sz_bandpass100_nom143 = 2.022
@@ -251,21 +268,14 @@ class Planck2018CamSpecPython(DataSetLikelihood):
     def chi_squared(self, CT, CTE, CEE, data_params):
 
         cals = self.get_cals(data_params)
+        theory = np.empty(self.data_vector.shape)
+        for cl, block in zip([CT, CTE, CEE], self._theory_blocks):
+            if block.stop > block.start:
+                theory[block] = cl[self._data_ells[block]]
         if np.any(self.cl_used[:4]):
-            foregrounds = self.get_foregrounds(data_params)
-        delta_vector = self.data_vector.copy()
-        ix = 0
-        for i, (cal, n) in enumerate(zip(cals, self.used_sizes)):
-            if n > 0:
-                if i <= 3:
-                    # noinspection PyUnboundLocalVariable
-                    delta_vector[ix:ix + n] -= (CT[self.ell_ranges[i]] +
-                                                foregrounds[i][self.ell_ranges[i]]) / cal
-                elif i == 4:
-                    delta_vector[ix:ix + n] -= CTE[self.ell_ranges[i]] / cal
-                elif i == 5:
-                    delta_vector[ix:ix + n] -= CEE[self.ell_ranges[i]] / cal
-                ix += n
+            theory[self._theory_blocks[0]] += self.get_foregrounds(
+                data_params).ravel()[self._foreground_indices]
+        delta_vector = self.data_vector - theory / cals[self._spectrum_index]
         return self._fast_chi_squared(self.covinv, delta_vector)
 
     def logp(self, **data_params):
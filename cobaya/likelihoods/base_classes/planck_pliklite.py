@@ -12,6 +12,7 @@ from .dataset file.
 # Global
 import os
 import numpy as np
+from scipy.sparse import csr_matrix
 
 # Local
 from cobaya.likelihoods.base_classes import DataSetLikelihood
@@ -113,7 +114,25 @@ class PlanckPlikLite(DataSetLikelihood):
         assert (self.nbins == cov.shape[0] == data.shape[0])
         self.X_data = data[self.used_indices, 1]
         self.cov = cov[np.ix_(self.used_indices, self.used_indices)]
-        self.invcov = np.linalg.inv(self.cov)
+        self._whitening = self._whitening_matrix(self.cov)
+        # Sparse operator binning at once the used spectra, concatenated in the range
+        # [_cl_lmin, _cl_lmax], into the used bandpowers
+        self._used_cls = [i for i in range(3) if len(self.used_bins[i])]
+        self._cl_lmin = min(self.blmin[self.used_bins[i][0]] for i in self._used_cls)
+        self._cl_lmax = max(self.blmax[self.used_bins[i][-1]] for i in self._used_cls)
+        n_ell = self._cl_lmax - self._cl_lmin + 1
+        rows, cols, values = [], [], []
+        row = 0
+        for j, i in enumerate(self._used_cls):
+            for b in self.used_bins[i]:
+                ells = np.arange(self.blmin[b], self.blmax[b] + 1)
+                rows.append(np.full(len(ells), row))
+                cols.append(j * n_ell + ells - self._cl_lmin)
+                values.append(self.weights[ells])
+                row += 1
+        self._binning_operator = csr_matrix(
+            (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(self.used_indices), len(self._used_cls) * n_ell))
 
     def get_requirements(self):
         # State requisites to the theory code
@@ -132,16 +151,13 @@ class PlanckPlikLite(DataSetLikelihood):
         return lmin, lmax, m
 
     def get_chi_squared(self, L0, ctt, cte, cee, calPlanck=1):
-        cl = np.empty(self.used_indices.shape)
-        ix = 0
-        for tp, cell in enumerate([ctt, cte, cee]):
-            for i in self.used_bins[tp]:
-                cl[ix] = np.dot(cell[self.blmin[i] - L0:self.blmax[i] - L0 + 1],
-                                self.weights[self.blmin[i]:self.blmax[i] + 1])
-                ix += 1
+        cells = [ctt, cte, cee]
+        cl = self._binning_operator.dot(np.concatenate(
+            [cells[i][self._cl_lmin - L0:self._cl_lmax - L0 + 1]
+             for i in self._used_cls]))
         cl /= calPlanck ** 2
         diff = self.X_data - cl
-        return self._fast_chi_squared(self.invcov, diff)
+        return self._whitened_chi_squared(self._whitening, diff)
 
     def chi_squared(self, c_l_arr, calPlanck=1):
         r"""
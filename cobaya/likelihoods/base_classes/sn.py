@@ -105,12 +105,16 @@ After this, mention the path to this likelihood when you include it in an input
 # Global
 import numpy as np
 import os
+from collections import OrderedDict
+from scipy.linalg import cho_factor, cho_solve
 
 # Local
 from cobaya.log import LoggedError
 from cobaya.likelihoods.base_classes import DataSetLikelihood
 
 _twopi = 2 * np.pi
+# Max memory of the inverse covariances of the marginalization grid computed at once
+_grid_chunk_bytes = 2 ** 27
 
 
 # noinspection PyUnresolvedReferences
@@ -121,6 +125,9 @@ class SN(DataSetLikelihood):
     install_options = {"github_repository": "CobayaSampler/sn_data",
                        "github_release": "v1.3"}
 
+    # Number of factorized covariance matrices kept (for different alpha, beta)
+    covmat_cache_size: int = 4
+
     def init_params(self, ini):
 
         self.twoscriptmfit = ini.bool('twoscriptmfit')
@@ -199,8 +206,9 @@ class SN(DataSetLikelihood):
                     os.path.join(self.path, ini.string('%s_covmat_file' % name)))
         self.alphabeta_covmat = (len(self.covs.items()) > 1 or
                                  self.covs.get('mag', None) is None)
-        self._last_alpha = np.inf
-        self._last_beta = np.inf
+        self._factorizations: OrderedDict = OrderedDict()
+        if not self.covmat_cache_size or self.covmat_cache_size < 1:
+            raise LoggedError(self.log, "'covmat_cache_size' must be a positive integer.")
         self.marginalize = getattr(self, "marginalize", False)
         assert self.covs
         # jla_prep
@@ -242,16 +250,16 @@ class SN(DataSetLikelihood):
                                 beta_i * self.step_width_beta)
                         _int_points += 1
             self.log.debug('Marignalizing alpha, beta over %s points' % _int_points)
-            self.marge_grid = np.empty(_int_points)
             self.int_points = _int_points
             self.alpha_grid = self.alpha_grid[:_int_points]
             self.beta_grid = self.beta_grid[:_int_points]
-            self.invcovs = np.empty(_int_points, dtype=object)
+            # Grid points whose inverse covariances are computed at once (bounded memory)
+            self._grid_chunk = max(1, _grid_chunk_bytes // (8 * self.nsn ** 2))
+            self._grid_terms = None
             if self.precompute_covmats:
-                for i, (alpha, beta) in enumerate(zip(self.alpha_grid, self.beta_grid)):
-                    self.invcovs[i] = self.inverse_covariance_matrix(alpha, beta)
+                self._grid_terms = self.grid_terms(slice(None))
         elif not self.alphabeta_covmat:
-            self.inverse_covariance_matrix()
+            self._fixed_terms = self._scriptm_terms(self.inverse_covariance_matrix())
 
     def get_requirements(self):
         # State requisites to the theory code
@@ -267,15 +275,15 @@ class SN(DataSetLikelihood):
         return cov.reshape((self.nsn, self.nsn))
 
     def inverse_covariance_matrix(self, alpha=0, beta=0):
+        self.invcov = np.linalg.inv(self.covariance_matrix(alpha, beta))
+        return self.invcov
+
+    def covariance_matrix(self, alpha=0, beta=0):
         if 'mag' in self.covs:
             invcovmat = self.covs['mag'].copy()
         else:
             invcovmat = 0
         if self.alphabeta_covmat:
-            if np.isclose(alpha, self._last_alpha) and np.isclose(beta, self._last_beta):
-                return self.invcov
-            self._last_alpha = alpha
-            self._last_beta = beta
             alphasq = alpha * alpha
             betasq = beta * beta
             alphabeta = alpha * beta
@@ -296,8 +304,136 @@ class SN(DataSetLikelihood):
         else:
             delta = self.pre_vars
         np.fill_diagonal(invcovmat, invcovmat.diagonal() + delta)
-        self.invcov = np.linalg.inv(invcovmat)
-        return self.invcov
+        return invcovmat
+
+    def covariance_factorization(self, alpha=0, beta=0) -> dict:
+        """
+        Cholesky factorization of the covariance matrix for the given alpha and beta,
+        together with the solutions for the vectors of script-M offsets (that depend only
+        on alpha and beta, see :meth:`SN._scriptm_terms`).
+
+        The results for the last ``covmat_cache_size`` values of (alpha, beta) are kept,
+        so that the O(n^3) factorization is not repeated when e.g. the sampler goes back
+        to the current point after rejecting a proposal, or varies only other parameters.
+        """
+        key = (alpha, beta)
+        terms = self._factorizations.get(key)
+        if terms is not None:
+            self._factorizations.move_to_end(key)
+            return terms
+        factor = cho_factor(self.covariance_matrix(alpha, beta), lower=True,
+                            check_finite=False)
+        terms = self._scriptm_terms(
+            lambda vectors: cho_solve(factor, vectors, check_finite=False))
+        terms["factor"] = factor
+        self._factorizations[key] = terms
+        while len(self._factorizations) > self.covmat_cache_size:
+            self._factorizations.popitem(last=False)
+        return terms
+
+    def _scriptm_terms(self, solve) -> dict:
+        """
+        Products of the inverse covariance with the vectors of script-M offsets, given
+        either an inverse covariance matrix (or a stack of them) or a function solving
+        the covariance for a set of column vectors.
+        """
+        vectors = (np.array([self.A1, self.A2]).T if self.twoscriptmfit
+                   else np.ones((self.nsn, 1)))
+        if callable(solve):
+            solved = np.moveaxis(solve(vectors), -1, 0)
+        else:
+            solved = np.moveaxis(solve.dot(vectors), -1, 0)
+        terms = {"invcov_A1": solved[0]}
+        if self.twoscriptmfit:
+            terms["invcov_A2"] = solved[1]
+        return terms
+
+    def _diagonal_weights(self, alpha, beta):
+        """
+        Inverse variances of the magnitudes (can be arrays of alpha and beta values, one
+        per row).
+        """
+        alpha = np.reshape(alpha, np.shape(alpha) + (1,) * (np.ndim(alpha) > 0))
+        beta = np.reshape(beta, np.shape(beta) + (1,) * (np.ndim(beta) > 0))
+        return 1.0 / (self.pre_vars + alpha * alpha * self.stretch_var +
+                      beta * beta * self.colour_var +
+                      2.0 * alpha * self.cov_mag_stretch -
+                      2.0 * beta * self.cov_mag_colour -
+                      2.0 * alpha * beta * self.cov_stretch_colour)
+
+    def grid_terms(self, grid_slice: slice) -> dict:
+        """
+        Terms of the chi squared of the points of the alpha, beta marginalization grid
+        that do not depend on the theory: the stacked inverse covariance matrices
+        (computed a few at a time, to bound the memory used), and their products with the
+        alpha- and beta-dependent offsets of the magnitudes and with the vectors of
+        script-M offsets.
+        """
+        alphas = self.alpha_grid[grid_slice]
+        betas = self.beta_grid[grid_slice]
+        n_points = len(alphas)
+        invcovs = np.empty((n_points, self.nsn, self.nsn))
+        for i in range(0, n_points, self._grid_chunk):
+            invcovs[i:i + self._grid_chunk] = np.linalg.inv(np.array(
+                [self.covariance_matrix(alpha, beta) for alpha, beta in
+                 zip(alphas[i:i + self._grid_chunk], betas[i:i + self._grid_chunk])]))
+        offsets = np.outer(alphas, self.stretch) - np.outer(betas, self.colour)
+        weights = self._diagonal_weights(alphas, betas)
+        terms = self._scriptm_terms(invcovs)
+        terms.update({"invcovs": invcovs, "offsets": offsets,
+                      "weights": weights / np.sum(weights, axis=-1, keepdims=True),
+                      "invcov_offsets": np.einsum("gij,gj->gi", invcovs, offsets)})
+        return terms
+
+    def grid_chi2s(self, residuals, Mb=0, terms=None) -> np.ndarray:
+        """
+        Chi squared of the points (or a subset, if the given ``terms``, see
+        :meth:`SN.grid_terms`) of the alpha, beta marginalization grid, for the given
+        residuals ``mag - lumdists``, computed at once with batched products.
+        """
+        terms = terms or self._grid_terms
+        invcovs = terms["invcovs"]
+        if self.use_abs_mag:
+            estimated_scriptm = np.full(len(invcovs), Mb + 25.)
+        else:
+            estimated_scriptm = terms["weights"].dot(residuals)
+        diffmag = residuals + terms["offsets"] - estimated_scriptm[:, None]
+        # inverse covariances times diffmag, with a single product over the whole stack
+        invvars = (invcovs.reshape(-1, self.nsn).dot(residuals).reshape(
+            len(invcovs), self.nsn) + terms["invcov_offsets"] -
+                   estimated_scriptm[:, None] * terms["invcov_A1"])
+        if self.twoscriptmfit:
+            # the script-M offset vectors are the scriptmcut selections A1 + A2 = 1
+            invvars -= estimated_scriptm[:, None] * terms["invcov_A2"]
+        return self._chi2(invvars, diffmag, terms)
+
+    def _chi2(self, invvars, diffmag, terms):
+        """
+        Chi squared (analytically marginalized over script-M, unless using an absolute
+        magnitude), given the inverse covariance times ``diffmag`` and the products of the
+        inverse covariance with the vectors of script-M offsets. Arrays can be stacked
+        along a first axis.
+        """
+        amarg_A = np.sum(invvars * diffmag, axis=-1)
+        if self.twoscriptmfit:
+            amarg_B = invvars.dot(self.A1)
+            amarg_C = invvars.dot(self.A2)
+            amarg_D = terms["invcov_A1"].dot(self.A2)
+            amarg_E = terms["invcov_A1"].dot(self.A1)
+            amarg_F = terms["invcov_A2"].dot(self.A2)
+            tempG = amarg_F - amarg_D * amarg_D / amarg_E
+            assert np.all(tempG >= 0)
+            if self.use_abs_mag:
+                return amarg_A + np.log(amarg_E / _twopi) + np.log(tempG / _twopi)
+            return (amarg_A + np.log(amarg_E / _twopi) +
+                    np.log(tempG / _twopi) - amarg_C * amarg_C / tempG -
+                    amarg_B * amarg_B * amarg_F / (amarg_E * tempG) +
+                    2.0 * amarg_B * amarg_C * amarg_D / (amarg_E * tempG))
+        amarg_B = np.sum(invvars, axis=-1)
+        amarg_E = np.sum(terms["invcov_A1"], axis=-1)
+        if self.use_abs_mag:
+            return amarg_A + np.log(amarg_E / _twopi)
+        return amarg_A + np.log(amarg_E / _twopi) - amarg_B ** 2 / amarg_E
 
     def alpha_beta_logp(self, lumdists, alpha=0, beta=0, Mb=0, invcovmat=None):
         if self.alphabeta_covmat:
@@ -319,8 +455,6 @@ class SN(DataSetLikelihood):
                 estimated_scriptm = np.sum((self.mag - lumdists) * invvars) / wtval
             diffmag = (self.mag - lumdists + alpha * self.stretch -
                        beta * self.colour - estimated_scriptm)
-            if invcovmat is None:
-                invcovmat = self.inverse_covariance_matrix(alpha, beta)
         else:
             if self.use_abs_mag:
                 estimated_scriptm = Mb + 25
@@ -329,37 +463,18 @@ class SN(DataSetLikelihood):
                 wtval = np.sum(invvars)
                 estimated_scriptm = np.sum((self.mag - lumdists) * invvars) / wtval
             diffmag = self.mag - lumdists - estimated_scriptm
-            invcovmat = self.invcov
-
-        invvars = invcovmat.dot(diffmag)
-        amarg_A = invvars.dot(diffmag)
 
-        if self.twoscriptmfit:
-            # could simplify this..
-            amarg_B = invvars.dot(self.A1)
-            amarg_C = invvars.dot(self.A2)
-            invvars = invcovmat.dot(self.A1)
-            amarg_D = invvars.dot(self.A2)
-            amarg_E = invvars.dot(self.A1)
-            invvars = invcovmat.dot(self.A2)
-            amarg_F = invvars.dot(self.A2)
-            tempG = amarg_F - amarg_D * amarg_D / amarg_E
-            assert tempG >= 0
-            if self.use_abs_mag:
-                chi2 = amarg_A + np.log(amarg_E / _twopi) + np.log(tempG / _twopi)
-            else:
-                chi2 = (amarg_A + np.log(amarg_E / _twopi) +
-                        np.log(tempG / _twopi) - amarg_C * amarg_C / tempG -
-                        amarg_B * amarg_B * amarg_F / (amarg_E * tempG) +
-                        2.0 * amarg_B * amarg_C * amarg_D / (amarg_E * tempG))
+        if invcovmat is not None:
+            terms = self._scriptm_terms(invcovmat)
+            invvars = invcovmat.dot(diffmag)
+        elif self.alphabeta_covmat:
+            # solve with the (cached) Cholesky factorization: no explicit inverse
+            terms = self.covariance_factorization(alpha, beta)
+            invvars = cho_solve(terms["factor"], diffmag, check_finite=False)
         else:
-            amarg_B = np.sum(invvars)
-            amarg_E = np.sum(invcovmat)
-            if self.use_abs_mag:
-                chi2 = amarg_A + np.log(amarg_E / _twopi)
-            else:
-                chi2 = amarg_A + np.log(amarg_E / _twopi) - amarg_B ** 2 / amarg_E
-        return - chi2 / 2
+            terms = self._fixed_terms
+            invvars = self.invcov.dot(diffmag)
+        return - self._chi2(invvars, diffmag, terms) / 2
 
     def logp(self, **params_values):
         angular_diameter_distances = \
@@ -372,15 +487,21 @@ class SN(DataSetLikelihood):
         else:
             Mb = 0
         if self.marginalize:
-            # Should parallelize this loop
-            for i in range(self.int_points):
-                self.marge_grid[i] = - self.alpha_beta_logp(
-                    lumdists, self.alpha_grid[i],
-                    self.beta_grid[i], Mb,
-                    invcovmat=self.invcovs[i])
-            grid_best = np.min(self.marge_grid)
+            if self.use_abs_mag and self.alphabeta_covmat:
+                self.log.warning("You seem to be using JLA with the absolute magnitude "
+                                 "module. JLA uses a different callibration, the Mb "
+                                 "module only works with Pantheon SNe!")
+            residuals = self.mag - lumdists
+            if self._grid_terms is not None:
+                marge_grid = self.grid_chi2s(residuals, Mb) / 2
+            else:
+                marge_grid = np.concatenate([
+                    self.grid_chi2s(residuals, Mb,
+                                    self.grid_terms(slice(i, i + self._grid_chunk))) / 2
+                    for i in range(0, self.int_points, self._grid_chunk)])
+            grid_best = np.min(marge_grid)
             return - grid_best + np.log(
-                np.sum(np.exp(- self.marge_grid[self.marge_grid != np.inf] + grid_best)) *
+                np.sum(np.exp(- marge_grid[marge_grid != np.inf] + grid_best)) *
                 self.step_width_alpha * self.step_width_beta)
         else:
             if self.alphabeta_covmat:
@@ -136,6 +136,28 @@ class GaussianMixture(Likelihood):
             return logsumexp([gauss.logpdf(x) for gauss in self.gaussians],
                              b=self.weights)
 
+    def logp_batch(self, **params_values):
+        """
+        Computes the log-likelihood for arrays of values of the parameters.
+        """
+        # Prepare the array of points, one per row
+        x = np.array([params_values[p] for p in self.input_params]).T
+        # Fill the derived parameters
+        derived = params_values.get("_derived")
+        if derived is not None:
+            n = self.d()
+            for i in range(self.n_modes):
+                standard = (x - self.means[i]).dot(self.inv_choleskyL[i].T)
+                derived.update(
+                    (p, v) for p, v in
+                    zip(list(self.output_params)[i * n:(i + 1) * n], standard.T))
+        # Compute the likelihood and return
+        logps = np.array([np.atleast_1d(gauss.logpdf(x)) for gauss in self.gaussians])
+        if len(self.gaussians) == 1:
+            return logps[0]
+        else:
+            return logsumexp(logps, b=np.reshape(self.weights, (-1, 1)), axis=0)
+
 
 # Scripts to generate random means and covariances #######################################
 
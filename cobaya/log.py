@@ -207,11 +207,16 @@ class HasLogger:
     # Copying and pickling
     def __deepcopy__(self, memo=None):
         new = (lambda cls: cls.__new__(cls))(self.__class__)
-        new.__dict__ = {k: deepcopy(v) for k, v in self.__dict__.items() if k != "log"}
+        if memo is not None:  # references back to this object point to the copy
+            memo[id(self)] = new
+        new.__dict__ = {k: deepcopy(v, memo) for k, v in self.__dict__.items()
+                        if k != "log"}
+        if hasattr(self, "log"):  # loggers are shared, not copied
+            new.log = self.log
         return new
 
     def __getstate__(self):
-        return deepcopy(self).__dict__
+        return {k: v for k, v in self.__dict__.items() if k != "log"}
 
     def __setstate__(self, d):
         self.__dict__ = d
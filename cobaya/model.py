@@ -8,6 +8,7 @@
 # Global
 from contextlib import contextmanager
 from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from itertools import chain
 from typing import NamedTuple, Sequence, Mapping, Iterable, Optional, \
     Union, List, Any, Dict, Set
@@ -25,6 +26,8 @@ from cobaya.prior import Prior
 from cobaya.likelihood import LikelihoodCollection, AbsorbUnusedParamsLikelihood, \
     is_LikelihoodInterface
 from cobaya.theory import TheoryCollection, Theory, Provider
+from cobaya.persistent_cache import get_signature
+from cobaya import tracing
 from cobaya.log import LoggedError, logger_setup, get_logger, is_debug, HasLogger
 from cobaya.yaml import yaml_dump
 from cobaya.tools import deepcopy_where_possible, are_different_params_lists, \
@@ -130,7 +133,8 @@ class Model(HasLogger):
                  info_theory: Optional[TheoriesDict] = None,
                  packages_path=None, timing=None, allow_renames=True, stop_at_error=False,
                  post=False, skip_unused_theories=False,
-                 dropped_theory_params: Optional[Iterable[str]] = None):
+                 dropped_theory_params: Optional[Iterable[str]] = None,
+                 component_threads: Optional[int] = None):
         self.set_logger()
         self._updated_info: InputDict = {
             "params": deepcopy_where_possible(info_params),
@@ -138,7 +142,8 @@ class Model(HasLogger):
         if not self._updated_info["likelihood"]:
             raise LoggedError(self.log, "No likelihood requested!")
         for k, v in (("prior", info_prior), ("theory", info_theory),
-                     (packages_path_input, packages_path), ("timing", timing)):
+                     (packages_path_input, packages_path), ("timing", timing),
+                     ("component_threads", component_threads)):
             if v not in (None, {}):
                 self._updated_info[k] = deepcopy_where_possible(v)  # type: ignore
         self.parameterization = Parameterization(self._updated_info["params"],
@@ -158,6 +163,9 @@ class Model(HasLogger):
         # Assign input/output parameters
         self._assign_params(info_likelihood, info_theory, dropped_theory_params)
         self._set_dependencies_and_providers(skip_unused_theories=skip_unused_theories)
+        self._component_threads: Optional[int] = None
+        self._component_pool: Optional[ThreadPoolExecutor] = None
+        self.set_component_threads(component_threads)
         # Add to the updated info some values that are only available after initialisation
         self._updated_info = recursive_update(
             self._updated_info, self.get_versions(add_version_field=True))
@@ -239,18 +247,47 @@ class Model(HasLogger):
         self.log.debug("Got input parameters: %r", input_params)
         loglikes = np.zeros(len(self.likelihood))
         need_derived = self.requires_derived or return_derived
-        for (component, like_index), param_dep in zip(self._component_order.items(),
-                                                      self._params_of_dependencies):
-            depend_list = [input_params[p] for p in param_dep]
-            params = {p: input_params[p] for p in component.input_params}
-            compute_success = component.check_cache_and_compute(
-                params, want_derived=need_derived,
-                dependency_params=depend_list, cached=cached)
+        compute_success = self._compute_components(
+            zip(self._component_order.items(), self._params_of_dependencies),
+            input_params, loglikes, derived_dict if return_derived else None,
+            need_derived=need_derived, cached=cached)
+        if not compute_success:
+            loglikes[:] = -np.inf
+        if make_finite:
+            loglikes = np.nan_to_num(loglikes)
+        if return_derived:
+            # Turn the derived params dict into a list and return
             if not compute_success:
-                loglikes[:] = -np.inf
+                derived_list = [np.nan] * len(self.output_params)
+            else:
+                for chi2_name, indices in self._chi2_names:
+                    derived_dict[chi2_name] = -2 * sum(loglikes[i] for i in indices)
+                derived_list = [derived_dict[p] for p in self.output_params]
+            return loglikes, derived_list
+        return loglikes
+
+    def _compute_components(self, components_and_dependencies, input_params, loglikes,
+                            derived_dict=None, need_derived=True, cached=True) -> bool:
+        # Computes in order the given ((component, like_index), param_dep) items,
+        # filling the loglikes array and the derived_dict (if not None).
+        # Returns False if some calculation failed.
+        if self._component_threads:
+            components_and_dependencies = list(components_and_dependencies)
+            if not self._compute_concurrently(
+                    components_and_dependencies, input_params, need_derived, cached):
                 self.log.debug("Calculation failed, skipping rest of calculations ")
-                break
-            if return_derived:
+                return False
+        for (component, like_index), param_dep in components_and_dependencies:
+            if not self._component_threads:
+                depend_list = [input_params[p] for p in param_dep]
+                params = {p: input_params[p] for p in component.input_params}
+                compute_success = component.check_cache_and_compute(
+                    params, want_derived=need_derived,
+                    dependency_params=depend_list, cached=cached)
+                if not compute_success:
+                    self.log.debug("Calculation failed, skipping rest of calculations ")
+                    return False
+            if derived_dict is not None:
                 derived_dict.update(component.current_derived)
             # Add chi2's to derived parameters
             if like_index is not None:
@@ -262,18 +299,104 @@ class Model(HasLogger):
                         "Likelihood %s has not returned a valid log-likelihood, "
                         "but %r instead.", component,
                         component.current_logp)  # type: ignore
-        if make_finite:
-            loglikes = np.nan_to_num(loglikes)
-        if return_derived:
-            # Turn the derived params dict into a list and return
-            if not compute_success:
-                derived_list = [np.nan] * len(self.output_params)
-            else:
+        return True
+
+    def _compute_concurrently(self, components_and_dependencies, input_params,
+                              need_derived=True, cached=True) -> bool:
+        # Computes the given ((component, like_index), param_dep) items in the thread
+        # pool, each of them as soon as the components it depends on have been computed.
+        # If some calculation fails, no more are started.
+        # Returns False if some calculation failed.
+        to_do = {component: param_dep
+                 for (component, _), param_dep in components_and_dependencies}
+        if self._component_pool is None:
+            self._component_pool = ThreadPoolExecutor(
+                max_workers=self._component_threads, thread_name_prefix="component")
+        running: Dict[Any, Theory] = {}
+        success = True
+        try:
+            while to_do or running:
+                if success:
+                    for component, param_dep in list(to_do.items()):
+                        if any(dep in to_do or dep in running.values()
+                               for dep in self._dependencies.get(component, [])):
+                            continue
+                        running[self._component_pool.submit(
+                            component.check_cache_and_compute,
+                            {p: input_params[p] for p in component.input_params},
+                            want_derived=need_derived,
+                            dependency_params=[input_params[p] for p in param_dep],
+                            cached=cached)] = component
+                        to_do.pop(component)
+                elif not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    running.pop(future)
+                    success = success and future.result()
+        finally:
+            wait(running)
+        return success
+
+    def logps_batch(self, input_params_list, return_derived=True, cached=True):
+        """
+        Computes the likelihoods and (if ``return_derived``) the output parameters
+        (derived parameters computed by the components, and chi2's) for a list of input
+        parameter dicts, as :meth:`Model.logps` does for a single point.
+
+        Components that implement a vectorized calculation and that neither depend on
+        nor provide for other components are computed for all points at once.
+        The rest are computed point by point, in the usual order.
+
+        Returns a tuple of arrays ``(loglikes, derived)``, with a row per point.
+        """
+        n_points = len(input_params_list)
+        loglikes = np.zeros((n_points, len(self.likelihood)))
+        success = np.ones(n_points, dtype=bool)
+        derived_dicts: List[ParamValuesDict] = [{} for _ in range(n_points)]
+        need_derived = self.requires_derived or return_derived
+        sequential = []
+        for (component, like_index), param_dep in zip(self._component_order.items(),
+                                                      self._params_of_dependencies):
+            if component not in self._batch_components:
+                sequential.append(((component, like_index), param_dep))
+                continue
+            states = component.check_cache_and_compute_batch(
+                [{p: input_params[p] for p in component.input_params}
+                 for input_params in input_params_list],
+                dependency_params=[[input_params[p] for p in param_dep]
+                                   for input_params in input_params_list],
+                want_derived=need_derived, cached=cached)
+            for i, state in enumerate(states):
+                if state is None:
+                    success[i] = False
+                    continue
+                if return_derived:
+                    derived_dicts[i].update(state.get("derived") or {})
+                if like_index is not None:
+                    try:
+                        loglikes[i, like_index] = float(state["logp"])
+                    except TypeError:
+                        raise LoggedError(
+                            self.log,
+                            "Likelihood %s has not returned a valid log-likelihood, "
+                            "but %r instead.", component, state["logp"])
+        derived = np.full((n_points, len(self.output_params) if return_derived else 0),
+                          np.nan)
+        for i, input_params in enumerate(input_params_list):
+            if success[i] and sequential:
+                self.provider.set_current_input_params(input_params)
+                success[i] = self._compute_components(
+                    sequential, input_params, loglikes[i],
+                    derived_dicts[i] if return_derived else None,
+                    need_derived=need_derived, cached=cached)
+            if not success[i]:
+                loglikes[i] = -np.inf
+            if return_derived and success[i]:
                 for chi2_name, indices in self._chi2_names:
-                    derived_dict[chi2_name] = -2 * sum(loglikes[i] for i in indices)
-                derived_list = [derived_dict[p] for p in self.output_params]
-            return loglikes, derived_list
-        return loglikes
+                    derived_dicts[i][chi2_name] = -2 * sum(loglikes[i, indices])
+                derived[i] = [derived_dicts[i][p] for p in self.output_params]
+        return loglikes, derived
 
     def loglikes(self, params_values=None, return_derived=True, make_finite=False,
                  cached=True):
@@ -402,18 +525,19 @@ class Model(HasLogger):
 
         # Notice that we don't use the make_finite in the prior call,
         # to correctly check if we have to compute the likelihood
-        logps = self.prior.logps_internal(params_values_array)
-        if logps == -np.inf:
-            logpriors = [-np.inf] * (1 + len(self.prior.external))
-            logpost = -np.inf
-        else:
-            input_params = self.parameterization.to_input(params_values_array)
-            logpriors = [logps]
-            if self.prior.external:
-                logpriors.extend(self.prior.logps_external(input_params))
-                logpost = sum(logpriors)
+        with tracing.span("prior", "prior"):
+            logps = self.prior.logps_internal(params_values_array)
+            if logps == -np.inf:
+                logpriors = [-np.inf] * (1 + len(self.prior.external))
+                logpost = -np.inf
             else:
-                logpost = logps
+                input_params = self.parameterization.to_input(params_values_array)
+                logpriors = [logps]
+                if self.prior.external:
+                    logpriors.extend(self.prior.logps_external(input_params))
+                    logpost = sum(logpriors)
+                else:
+                    logpost = logps
 
         if logps != -np.inf:
             # noinspection PyUnboundLocalVariable
@@ -431,6 +555,71 @@ class Model(HasLogger):
         return LogPosterior(logpost=logpost, logpriors=logpriors,
                             loglikes=loglikes, derived=derived_sampler)
 
+    def logposterior_batch(self, points, return_derived=True, make_finite=False,
+                           cached=True) -> LogPosterior:
+        """
+        Takes an array of sampled parameter values, with one point per row
+        (i.e. with shape ``(n_points, n_sampled_params)``) and parameters in the same
+        order as in the input. When in doubt, you can get the correct order as
+        ``list([your_model].parameterization.sampled_params())``.
+
+        Returns a ``logposterior`` ``NamedTuple``, with the same fields as
+        :meth:`Model.logposterior`, but with one row per point: ``logpost`` is an array
+        of size ``n_points``, and ``logpriors``, ``loglikes`` and ``derived`` are 2d
+        arrays with a row per point. For points with null prior, the values of
+        ``loglikes`` and ``derived`` are NaN.
+
+        The prior is evaluated for all points at once, and so are likelihoods (and
+        theories) implementing a vectorized calculation (see
+        :meth:`~theory.Theory.calculate_batch` and
+        :meth:`~likelihood.Likelihood.logp_batch`) that do not depend on other
+        components. The rest of the components are computed point by point.
+
+        To ignore the derived parameters, make ``return_derived=False``.
+
+        If ``make_finite=True``, it will try to represent infinities as the largest real
+        numbers allowed by machine precision.
+
+        If ``cached=False`` (default: True), it ignores previously computed results that
+        could be reused.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim == 1:
+            points = points.reshape((1, -1))
+        if points.ndim != 2 or points.shape[1] != self.prior.d():
+            raise LoggedError(
+                self.log, "Wrong shape for array of points: it's %r and it should be "
+                          "(n_points, %d).", points.shape, self.prior.d())
+        if not np.all(np.isfinite(points)):
+            raise LoggedError(self.log, "Got non-finite parameter values.")
+        n_points = len(points)
+        logpriors = np.full((n_points, len(self.prior)), -np.inf)
+        logpriors[:, 0] = self.prior.logps_internal(points)
+        i_valid = np.flatnonzero(logpriors[:, 0] != -np.inf)
+        input_values = self.parameterization.to_input_batch(points[i_valid])
+        input_names = list(self.parameterization.input_params())
+        input_params_list = [dict(zip(input_names, values)) for values in input_values]
+        if self.prior.external:
+            for i, input_params in zip(i_valid, input_params_list):
+                logpriors[i, 1:] = self.prior.logps_external(input_params)
+        loglikes = np.full((n_points, len(self.likelihood)), np.nan)
+        derived = np.full((n_points, len(self.parameterization.derived_params())
+                           if return_derived else 0), np.nan)
+        logpost = np.sum(logpriors, axis=1)
+        if len(i_valid):
+            loglikes[i_valid], output_derived = self.logps_batch(
+                input_params_list, return_derived=return_derived, cached=cached)
+            logpost[i_valid] += np.sum(loglikes[i_valid], axis=1)
+            if return_derived:
+                derived[i_valid] = self.parameterization.to_derived_batch(
+                    output_derived, input_values)
+        if make_finite:
+            logpriors = np.nan_to_num(logpriors)
+            loglikes[i_valid] = np.nan_to_num(loglikes[i_valid])
+            logpost = np.nan_to_num(logpost)
+        return LogPosterior(logpost=logpost, logpriors=logpriors,
+                            loglikes=loglikes, derived=derived)
+
     def logpost(self, params_values, make_finite=False, cached=True) -> float:
         """
         Takes an array or dictionary of sampled parameter values.
@@ -487,11 +676,40 @@ class Model(HasLogger):
         self.likelihood.dump_timing()
         self.theory.dump_timing()
 
+    def set_component_threads(self, threads: Optional[int]):
+        """
+        Sets the number of threads used to compute concurrently the components that do
+        not depend on each other (e.g. different likelihoods depending only on the same
+        theory code), each of them as soon as those it depends on have been computed.
+
+        Pays off when the components release the GIL most of the time (e.g. computations
+        in compiled code or large numpy operations).
+
+        If ``None`` or ``1`` (default), all components are computed sequentially.
+        """
+        if self._component_pool is not None:
+            self._component_pool.shutdown()
+            self._component_pool = None
+        # The pool is created when first needed (and not copied or pickled)
+        self._component_threads = threads if threads and threads > 1 else None
+
+    # Copying and pickling: the thread pool of the copy is created again when needed
+    def __deepcopy__(self, memo=None):
+        pool, self._component_pool = self._component_pool, None
+        try:
+            return super().__deepcopy__(memo)
+        finally:
+            self._component_pool = pool
+
+    def __getstate__(self):
+        return dict(super().__getstate__(), _component_pool=None)
+
     # Python magic for the "with" statement
     def __enter__(self):
         return self
 
     def __exit__(self, exception_type=None, exception_value=None, traceback=None):
+        self.set_component_threads(None)
         self.likelihood.__exit__(exception_type, exception_value, traceback)
         self.theory.__exit__(exception_type, exception_value, traceback)
 
@@ -760,6 +978,17 @@ class Model(HasLogger):
         self.provider = Provider(self, requirement_providers)
         for component in components:
             component.initialize_with_provider(self.provider)
+        # Components that can be computed for many points at once when evaluating
+        # batches: vectorized, and neither depending on nor providing for others
+        depended_on = set(chain(*self._dependencies.values()))
+        self._batch_components: Set[Theory] = set(
+            c for c in self._component_order if c.can_calculate_batch()
+            and not self._dependencies.get(c) and c not in depended_on
+            and not c.input_params_extra)
+        # Open persistent caches, now that the requested products are known
+        for component in components:
+            if component.persistent_cache:
+                component.set_persistent_cache(self.get_component_signature(component))
 
     def add_requirements(self, requirements):
         """
@@ -1097,6 +1326,40 @@ class Model(HasLogger):
         for theory in self.components:
             theory.set_cache_size(n_states)
 
+    def get_cache_stats(self) -> Dict[str, InfoDict]:
+        """
+        Gets the statistics of the cache of computed states of each theory and
+        likelihood (see :meth:`~theory.Theory.get_cache_stats`).
+
+        :return: dictionary of cache statistics, indexed by component name
+        """
+        return {component.get_name(): component.get_cache_stats()
+                for component in self.components}
+
+    def get_component_signature(self, component: Theory) -> str:
+        """
+        Gets a hash identifying the results of a theory or likelihood, save for the
+        values of its input parameters: its name, version, options and requested
+        products, the code of its class and the paths of its data, as well as those of
+        the components on which it depends.
+
+        Used to index its states in the persistent cache
+        (see :meth:`~theory.Theory.set_persistent_cache`).
+        """
+        ignored_options = {"speed", "stop_at_error", "persistent_cache", "version"}
+
+        def component_signature(c):
+            info = (self._updated_info.get("theory") or {}).get(c.get_name()) or \
+                   self._updated_info["likelihood"].get(c.get_name()) or {}
+            return (c.get_name(), c.get_version(), type(c),
+                    {k: v for k, v in info.items() if k not in ignored_options},
+                    self._must_provide.get(c),
+                    {attr: getattr(c, attr, None) for attr in ("path", "packages_path")})
+
+        return get_signature(*(component_signature(c) for c in
+                               [component] + sorted(self._dependencies.get(component, []),
+                                                    key=lambda c: c.get_name())))
+
     def get_auto_covmat(self, params_info=None, random_state=None):
         """
         Tries to get an automatic covariance matrix for the current model and data.
@@ -1156,6 +1419,53 @@ class Model(HasLogger):
         for component, speed in zip(self.components, measured_speeds):
             component.set_measured_speed(speed)
 
+    def get_timing_stats(self, percentiles=(50, 90, 99)) -> Dict[str, InfoDict]:
+        """
+        Returns a dictionary with the statistics of the evaluations of each theory code
+        and likelihood recorded while timing was on (see :meth:`Model.set_timing_on`):
+        number of timed evaluations ``n`` (not counting the first one, which may be
+        slower, unless it is the only one), their ``mean`` and ``total`` time, the given
+        ``percentiles`` of the evaluation times (as ``p50``, etc.), the number of
+        ``failed`` evaluations, and the ``hits`` and ``misses`` of the cache of states.
+        """
+        stats = {}
+        for component in self.components:
+            component_stats: InfoDict = {
+                k: v for k, v in component.get_cache_stats().items()
+                if k in ["hits", "misses"]}
+            timer = component.timer
+            if timer:
+                component_stats.update({"n": timer.n_avg(), "mean": timer.get_time_avg(),
+                                        "total": timer.time_sum,
+                                        "failed": timer.n_failed})
+                values = timer.get_percentiles(percentiles)
+                for i, q in enumerate(percentiles):
+                    component_stats["p%g" % q] = \
+                        None if values is None else float(values[i])
+            stats[component.get_name()] = component_stats
+        return stats
+
+    def get_timed_evaluation_times(self, since=None):
+        """
+        Returns the average evaluation times of the different components, as recorded by
+        their timers (timing must be on, see :meth:`Model.set_timing_on`), together with
+        the current state of the timers.
+
+        If the state of the timers returned by a previous call is passed as ``since``,
+        only the evaluations after that call are taken into account.
+
+        The time of components that have not been evaluated since then is ``None``.
+        """
+        state = [(component.timer.n, component.timer.time_sum) if component.timer
+                 else (0, 0.) for component in self.components]
+        times = []
+        for (n, time_sum), (n_since, time_sum_since) in zip(
+                state, since or [(0, 0.)] * len(state)):
+            # the first evaluation is not included in the timer sum (see Timer)
+            n_new = n - max(n_since, 1)
+            times.append((time_sum - time_sum_since) / n_new if n_new > 0 else None)
+        return times, state
+
 
 def get_model(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
               debug: Optional[bool] = None,
@@ -1170,7 +1480,7 @@ def get_model(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
     ignored_info = []
     for k in list(info):
         if k not in ["params", "likelihood", "prior", "theory", packages_path_input,
-                     "timing", "stop_at_error", "auto_params"]:
+                     "timing", "stop_at_error", "auto_params", "component_threads"]:
             value = info.pop(k)  # type: ignore
             if value is not None and (not isinstance(value, Mapping) or value):
                 ignored_info.append(k)
@@ -1187,7 +1497,8 @@ def get_model(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
                  updated_info.get("prior"), updated_info.get("theory"),
                  packages_path=info.get(packages_path_input),
                  timing=updated_info.get("timing"),
-                 stop_at_error=info.get("stop_at_error", False))
+                 stop_at_error=info.get("stop_at_error", False),
+                 component_threads=info.get("component_threads"))
 
 
 def load_info_overrides(info_or_yaml_or_file, debug, stop_at_error,
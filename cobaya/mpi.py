@@ -9,7 +9,7 @@
 import os
 import sys
 import functools
-from typing import List, Iterable, Union, Callable, Any, Optional
+from typing import List, Iterable, Iterator, Union, Callable, Any, Optional
 import numpy as np
 import time
 from enum import IntEnum
@@ -187,6 +187,40 @@ def array_gather(list_of_data, root=0) -> List[np.ndarray]:
     return [np.array(i) for i in zip_gather(list_of_data, root=root)]
 
 
+def dynamic_range(n: int, root: int = 0) -> Iterator[int]:
+    """
+    Yields the integers in ``range(n)``, each of them to a single process: every time a
+    process asks for a new one, it gets the next one not yet taken by any process, so
+    that work is balanced dynamically between processes.
+
+    Must be called (and exhausted) by all processes, since it uses an atomic counter
+    held in a one-sided-communication window of the ``root`` process.
+    """
+    if not more_than_one_process():
+        yield from range(n)
+        return
+    mpi, comm = get_mpi(), get_mpi_comm()
+    counter = np.zeros(1, dtype=np.int64)
+    window = mpi.Win.Allocate(counter.itemsize if rank() == root else 0,
+                              counter.itemsize, comm=comm)
+    try:
+        if rank() == root:
+            window.Lock(root)
+            window.Put(counter, root)
+            window.Unlock(root)
+        comm.Barrier()
+        one = np.ones(1, dtype=np.int64)
+        while True:
+            window.Lock(root)
+            window.Fetch_and_op(one, counter, root, op=mpi.SUM)
+            window.Unlock(root)
+            if counter[0] >= n:
+                break
+            yield int(counter[0])
+    finally:
+        window.Free()
+
+
 # set if being run from pytest
 capture_manager: Any = None
 
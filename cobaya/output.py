@@ -29,6 +29,8 @@ from cobaya import mpi
 # Default output type and extension
 _kind = "txt"
 _ext = "txt"
+# Collection drivers (output formats) and their file extensions
+_kinds_ext = {"txt": "txt", "npy": "npy"}
 
 
 class FileLock:
@@ -136,9 +138,13 @@ class Output(HasLogger):
     @mpi.set_from_root(("force", "folder", "prefix", "kind", "ext",
                         "_resuming", "prefix_regexp_str", "log"))
     def __init__(self, prefix, resume=resume_default, force=False, infix=None,
-                 output_prefix=None):
+                 output_prefix=None, output_format=None):
         self.name = "output"
         self.set_logger(self.name)
+        if output_format and output_format not in _kinds_ext:
+            raise LoggedError(
+                self.log, "Unknown output format %r. Valid ones are %r.",
+                output_format, list(_kinds_ext))
         # MARKED FOR DEPRECATION IN v3.0
         # -- also remove output_prefix kwarg above
         if output_prefix is not None:
@@ -175,8 +181,8 @@ class Output(HasLogger):
             self.folder, self.prefix, infix=infix, ext=Extension.dill)
         self._resuming = False
         # Output kind and collection extension
-        self.kind = _kind
-        self.ext = _ext
+        self.kind = output_format or _kind
+        self.ext = _kinds_ext[self.kind] if output_format else _ext
         if os.path.isfile(self.file_updated):
             self.log.info(
                 "Found existing info files with the requested output prefix: '%s'",
@@ -215,6 +221,17 @@ class Output(HasLogger):
             return extension.lstrip(".")
         return self.ext
 
+    def get_collection_kind(self, file_name):
+        """
+        Returns the collection driver for the given file name, deduced from its
+        extension, or `Output.kind` if not recognized.
+        """
+        extension = os.path.splitext(file_name)[1].lstrip(".")
+        for kind, kind_extension in _kinds_ext.items():
+            if extension == kind_extension:
+                return kind
+        return self.kind
+
     def add_suffix(self, suffix, separator="_"):
         """
         Returns the full output prefix (folder and file name prefix) combined with a
@@ -447,7 +464,7 @@ class Output(HasLogger):
             self.folder,
             self.prefix + ("." if self.prefix else "") + (name + "." if name else "") +
             self.sanitize_collection_extension(extension))
-        return file_name, self.kind
+        return file_name, self.get_collection_kind(file_name)
 
     def collection_regexp(self, name=None, extension=None):
         """
@@ -455,6 +472,8 @@ class Output(HasLogger):
 
         Use `name` for particular types of collections (default: any number).
         Pass `False` to mean there is nothing between the output prefix and the extension.
+
+        If no `extension` is given, matches the extension of any output format.
         """
         if name is None:
             name = r"\d+\."
@@ -462,9 +481,13 @@ class Output(HasLogger):
             name = ""
         else:
             name = re.escape(name) + r"\."
-        extension = self.sanitize_collection_extension(extension)
-        return re.compile(self.prefix_regexp_str + name +
-                          re.escape(extension.lower()) + "$")
+        if extension:
+            extension_regexp = re.escape(
+                self.sanitize_collection_extension(extension).lower())
+        else:
+            extension_regexp = "(" + "|".join(
+                re.escape(ext) for ext in sorted(set(_kinds_ext.values()))) + ")"
+        return re.compile(self.prefix_regexp_str + name + extension_regexp + "$")
 
     def is_collection_file_name(self, file_name, name=None, extension=None):
         """
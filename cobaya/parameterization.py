@@ -10,8 +10,10 @@
 import numpy as np
 from numbers import Real
 from itertools import chain
+from operator import itemgetter
 from copy import deepcopy
-from typing import Mapping, Sequence, Dict, Set, List, Tuple, Any, Callable, Union
+from typing import Mapping, Sequence, Dict, Set, List, Tuple, Any, Callable, Union, \
+    Optional
 
 # Local
 from cobaya.typing import ParamsDict, ParamDict, ParamInput, \
@@ -205,6 +207,7 @@ class Parameterization(HasLogger):
 
         self._wrapped_input_funcs, self._wrapped_derived_funcs = \
             self._get_wrapped_functions_evaluation_order()
+        self._compile_evaluation_plan()
 
         # Useful mapping: input params that vary if each sample is varied
         self._sampled_input_dependence = {s: [i for i in self._input
@@ -265,12 +268,16 @@ class Parameterization(HasLogger):
     def to_input(self, sampled_params_values) -> ParamValuesDict:
         # Gets all current sampled and input derived parameters as a dictionary,
         # including dropped parameters. Result is not a copy and must not be modified.
+        if not isinstance(sampled_params_values, dict):
+            # Array of sampled values: use the precompiled plan
+            self._sampled = dict(zip(self._sampled_names, sampled_params_values))
+            input_params = self._input
+            input_params.update(self._sampled)
+            self._evaluate_plan(self._input_plan, input_params, input_params)
+            return input_params
 
         # Store sampled params, so that derived can depend on them
-        if not isinstance(sampled_params_values, dict):
-            sampled_params_values = dict(zip(self._sampled, sampled_params_values))
-        else:
-            sampled_params_values = sampled_params_values.copy()
+        sampled_params_values = sampled_params_values.copy()
         self._sampled = sampled_params_values
 
         # First include all sampled input parameters,
@@ -281,31 +288,89 @@ class Parameterization(HasLogger):
             for p, (func, args, to_set) in self._wrapped_input_funcs.items():
                 for arg in to_set:
                     args[arg] = self._input.get(arg, sampled_params_values.get(arg))
-                self._input[p] = self._call_param_func(p, func, args)
+                self._input[p] = self._call_param_func(p, func, list(args),
+                                                       list(args.values()))
         return self._input
 
-    def to_derived(self, output_params_values) -> ParamValuesDict:
+    def to_derived(self, output_params_values, input_params=None) -> ParamValuesDict:
+        # Input parameters default to the last ones computed by to_input.
+        # Result is not a copy and must not be modified.
+        if input_params is None:
+            input_params = self._input
         if not isinstance(output_params_values, dict):
-            output_params_values = dict(zip(self._output, output_params_values))
+            # Sequence of output values: use the precompiled plan
+            derived = self._derived
+            namespace = dict(zip(self._output, output_params_values))
+            for p in self._directly_output:
+                derived[p] = namespace[p]
+            for p in self._derived_inputs:
+                derived[p] = input_params[p]
+            namespace.update(input_params)
+            self._evaluate_plan(self._derived_plan, namespace, derived)
+            return derived
         # Fill first derived parameters which are direct output parameters
         for p in self._directly_output:
             self._derived[p] = output_params_values[p]
         for p in self._derived_inputs:
-            self._derived[p] = self._input[p]
+            self._derived[p] = input_params[p]
         # Then evaluate the functions
         if self._wrapped_derived_funcs:
             for p, (func, args, to_set) in self._wrapped_derived_funcs.items():
                 for arg in to_set:
-                    val = self._input.get(arg)
+                    val = input_params.get(arg)
                     if val is None:
                         val = output_params_values.get(arg)
                         if val is None:
                             val = self._derived.get(arg)
 
                     args[arg] = val
-                self._derived[p] = self._call_param_func(p, func, args)
+                self._derived[p] = self._call_param_func(p, func, list(args),
+                                                         list(args.values()))
         return self._derived
 
+    def to_input_batch(self, points) -> np.ndarray:
+        """
+        Returns the values of the input parameters (columns, in the order of
+        :meth:`~Parameterization.input_params`) for an array of sampled parameter values
+        (one point per row).
+
+        Parameter functions are evaluated for all points at once if they accept arrays
+        (checked with the first point when first called), and point by point otherwise.
+        """
+        points = np.atleast_2d(points)
+        values = np.empty((len(points), len(self._input)))
+        values[:] = [self._constant.get(p, np.nan) for p in self._input]
+        values[:, self._sampled_input_indices] = points
+        for p, func, args, _, _ in self._input_plan:
+            values[:, self._input_indices[p]] = self._call_param_func_batch(
+                p, func, args, [values[:, self._input_indices[arg]] for arg in args])
+        return values
+
+    def to_derived_batch(self, output_values, input_values, out=None) -> np.ndarray:
+        """
+        Returns the values of the derived parameters (columns, in the order of
+        :meth:`~Parameterization.derived_params`), given the arrays of values of output
+        parameters (in the order of :meth:`~Parameterization.output_params`) and of input
+        parameters (as returned by :meth:`~Parameterization.to_input_batch`), with one
+        point per row.
+
+        If ``out`` is given, the values are written into it, and it is returned.
+        """
+        input_values = np.atleast_2d(input_values)
+        output_values = np.asarray(output_values, dtype=np.float64).reshape(
+            (len(input_values), len(self._output)))
+        if out is None:
+            out = np.empty((len(input_values), len(self._derived)))
+        out[:, self._directly_output_columns] = \
+            output_values[:, self._directly_output_indices]
+        out[:, self._derived_inputs_columns] = \
+            input_values[:, [self._input_indices[p] for p in self._derived_inputs]]
+        sources = (input_values, output_values, out)
+        for p, func, args, _, _ in self._derived_plan:
+            out[:, self._derived_indices[p]] = self._call_param_func_batch(
+                p, func, args, [sources[i][:, j] for i, j in self._derived_columns[p]])
+        return out
+
     def check_sampled(self, **sampled_params) -> ParamValuesDict:
         """
         Check that the input dictionary contains all the sampled parameters,
@@ -392,20 +457,94 @@ class Parameterization(HasLogger):
 
         return {p: get_label(p, info) for p, info in self._infos.items()}
 
-    def _call_param_func(self, p, func, kwargs):
+    def _call_param_func(self, p, func, args, values):
+        # arguments passed by position: ``args`` are the names of those of ``func``
         try:
-            return func(**kwargs)
-        except NameError as exception:
+            return func(*values)
+        except Exception as exception:
+            self._param_func_failed(p, args, exception)
+            raise
+
+    def _param_func_failed(self, p, args, exception):
+        if isinstance(exception, NameError):
             unknown = str(exception).split("'")[1]
             raise LoggedError(
                 self.log, "Unknown variable '%s' was referenced in the definition of "
                           "the parameter '%s', with arguments %r.", unknown, p,
-                list(kwargs))
-        except:
-            self.log.error("Function for parameter '%s' failed at evaluation "
-                           "and threw the following exception:", p)
+                list(args))
+        self.log.error("Function for parameter '%s' failed at evaluation "
+                       "and threw the following exception:", p)
+
+    def _evaluate_plan(self, plan, namespace, results):
+        # Evaluates the functions of an evaluation plan, in order, taking their arguments
+        # from ``namespace``, and storing their values both in it and in ``results``
+        try:
+            for p, func, args, get_args, single_arg in plan:
+                results[p] = namespace[p] = \
+                    func(get_args(namespace)) if single_arg else func(*get_args(namespace))
+        except Exception as exception:
+            # noinspection PyUnboundLocalVariable
+            self._param_func_failed(p, args, exception)
             raise
 
+    def _call_param_func_batch(self, p, func, args, columns):
+        # Evaluates the function for all points at once if it was found to be
+        # vectorized, or the first time it is called and it gives the same result as
+        # the point-by-point evaluation for the first point. Otherwise, point by point.
+        n_points = len(columns[0])
+        if self._vectorized.get(p) is not False and n_points:
+            try:
+                with np.errstate(all="ignore"):
+                    result = np.asarray(func(*columns), dtype=np.float64)
+            except Exception:
+                result = None
+            if result is not None and result.shape == (n_points,):
+                if self._vectorized.get(p) is None:
+                    first = self._call_param_func(p, func, args,
+                                                  [column[0] for column in columns])
+                    self._vectorized[p] = bool(
+                        np.isclose(result[0], first, rtol=1e-12, equal_nan=True))
+                if self._vectorized[p]:
+                    return result
+            else:
+                self._vectorized[p] = False
+        return [self._call_param_func(p, func, args, list(values))
+                for values in zip(*columns)]
+
+    def _compile_evaluation_plan(self):
+        # Precomputes the evaluation of the parameter functions, in evaluation order,
+        # as lists of (param, function, argument names, argument getter, whether it has
+        # a single argument), and the positions of the parameters for arrays of points.
+        # For derived parameter functions, the columns of the arguments are given as
+        # (source, column), with source 0, 1, 2 meaning input, output and derived.
+        self._sampled_names = list(self._sampled)
+        self._input_indices = {p: i for i, p in enumerate(self._input)}
+        self._sampled_input_indices = [self._input_indices[p]
+                                       for p in self._sampled_names]
+        self._input_plan = [(p, self._input_funcs[p], self._input_args[p],
+                             itemgetter(*self._input_args[p]),
+                             len(self._input_args[p]) == 1)
+                            for p in self._wrapped_input_funcs]
+        self._derived_plan = [(p, self._derived_funcs[p], self._derived_args[p],
+                               itemgetter(*self._derived_args[p]),
+                               len(self._derived_args[p]) == 1)
+                              for p in self._wrapped_derived_funcs]
+        output_indices = {p: i for i, p in enumerate(self._output)}
+        self._derived_indices = {p: i for i, p in enumerate(self._derived)}
+        self._directly_output_indices = [output_indices[p] for p in self._directly_output]
+        self._directly_output_columns = [self._derived_indices[p]
+                                         for p in self._directly_output]
+        self._derived_inputs_columns = [self._derived_indices[p]
+                                        for p in self._derived_inputs]
+        self._derived_columns = {}
+        for p in self._wrapped_derived_funcs:
+            self._derived_columns[p] = [
+                (0, self._input_indices[arg]) if arg in self._input_indices else
+                (1, output_indices[arg]) if arg in output_indices else
+                (2, self._derived_indices[arg]) for arg in self._derived_args[p]]
+        # whether each function can be evaluated for arrays of points (None if unknown)
+        self._vectorized: Dict[str, Optional[bool]] = {}
+
     def _get_wrapped_functions_evaluation_order(self):
         # get evaluation order for input and derived parameter function
         # and pre-prepare argument dicts
@@ -437,10 +576,8 @@ class Parameterization(HasLogger):
 
                     if set(args).issubset(self._constant):
                         # all inputs are constant, so output is constant and precomputed
-                        self._constant[p] = \
-                            self._call_param_func(p, func,
-                                                  {arg: self._constant[arg] for arg in
-                                                   args})
+                        self._constant[p] = self._call_param_func(
+                            p, func, args, [self._constant[arg] for arg in args])
                         output[p] = self._constant[p]
                     else:
                         # Store function, argument dict with constants pre-filled,
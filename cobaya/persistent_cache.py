@@ -0,0 +1,247 @@
+"""
+.. module:: persistent_cache
+
+:Synopsis: On-disk cache of states computed by theories and likelihoods
+
+Persistent cache for the states computed by :class:`theory.Theory` components, shared
+between runs (e.g. when re-running chains or post-processing them, or when profiling
+a likelihood repeatedly with the same parameter values).
+
+States are stored as pickled blobs in an sqlite database, indexed by a hash of the
+component's name, version, code, options, requested products and data paths (and those
+of the components it depends on), together with the values of the parameters on which it
+depends.
+The total size of the stored states is capped, evicting the least recently used ones.
+
+"""
+
+# Global
+import io
+import os
+import re
+import time
+import types
+import pickle
+import marshal
+import hashlib
+import inspect
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, Any
+
+# Local
+from cobaya.log import HasLogger
+from cobaya.tools import get_cache_path
+
+default_max_size_mb = 1000
+_timeout = 60  # seconds waiting for a lock held by a different process
+
+
+@lru_cache(maxsize=None)
+def _file_hash(path: str, mtime: float) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_code_signature(obj: Any) -> str:
+    """
+    Returns a string identifying a function or class that is stable across processes:
+    its name and source, and a hash of the file where it is defined (so that changes to
+    helper functions or data defined in the same file are accounted for too).
+    """
+    obj = getattr(obj, "__func__", obj)  # bound methods
+    parts = [getattr(obj, "__module__", None) or "", getattr(obj, "__qualname__", "")]
+    try:
+        parts.append(inspect.getsource(obj))
+    except (OSError, TypeError):  # e.g. defined interactively, or built-in
+        if hasattr(obj, "__code__"):
+            parts.append(marshal.dumps(obj.__code__).hex())
+    try:
+        path = inspect.getsourcefile(obj)
+        parts.append(_file_hash(path, os.path.getmtime(path)))
+    except (OSError, TypeError):
+        pass
+    return "\n".join(parts)
+
+
+class _SignaturePickler(pickle.Pickler):
+    """
+    Pickler that stores functions and classes by their code (see
+    :func:`get_code_signature`) instead of by reference.
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, (types.FunctionType, types.MethodType, type)):
+            return get_code_signature(obj)
+        return None
+
+
+def get_signature(*objects: Any) -> str:
+    """
+    Returns a hash identifying the given (preferably picklable) objects.
+
+    Functions and classes are identified by their source code, so that the signature
+    changes if they are modified, and is the same for lambdas and closures defined by
+    the same code in different processes.
+    """
+    hasher = hashlib.sha256()
+    for obj in objects:
+        buffer = io.BytesIO()
+        try:
+            _SignaturePickler(buffer, protocol=4).dump(obj)
+            hasher.update(buffer.getvalue())
+        except Exception:  # e.g. open handles: fall back to address-less representation
+            hasher.update(re.sub(r" at 0x[0-9a-fA-F]+", "", repr(obj)).encode())
+    return hasher.hexdigest()
+
+
+class PersistentCache(HasLogger):
+    """
+    sqlite-backed, size-capped, least-recently-used cache of computed states.
+
+    ``signature`` identifies the computation (see :func:`get_signature`), and is combined
+    with the key of each state (see :meth:`theory.StateCache.get_key`).
+    """
+
+    def __init__(self, name: str, signature: str, path: Optional[str] = None,
+                 max_size_mb: float = default_max_size_mb):
+        self.set_logger(name=name)
+        if not path:
+            path = os.path.join(get_cache_path(), "states")
+        if not os.path.splitext(path)[1]:
+            os.makedirs(path, exist_ok=True)
+            path = os.path.join(path, name.replace(".", "_") + ".sqlite")
+        self.path = os.path.abspath(path)
+        self.signature = signature.encode()
+        self.max_size = int(max_size_mb * 1024 ** 2)
+        self._lock = threading.Lock()
+        self._warned_unpicklable = False
+        self._connection = sqlite3.connect(
+            self.path, timeout=_timeout, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS states (key TEXT PRIMARY KEY, state BLOB, "
+                "size INTEGER, last_used REAL)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS states_last_used ON states(last_used)")
+            # Running total of the size of the stored states, kept up to date by triggers
+            # (also when the file is shared by several processes)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS total_size (size INTEGER)")
+            if self._connection.execute(
+                    "SELECT COUNT(*) FROM total_size").fetchone()[0] == 0:
+                self._connection.execute(
+                    "INSERT INTO total_size "
+                    "SELECT COALESCE(SUM(size), 0) FROM states")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS states_insert AFTER INSERT ON states "
+                "BEGIN UPDATE total_size SET size = size + NEW.size; END")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS states_delete AFTER DELETE ON states "
+                "BEGIN UPDATE total_size SET size = size - OLD.size; END")
+        self.mpi_debug("Using persistent cache of states at %s", self.path)
+
+    def _hash(self, key: tuple) -> Optional[str]:
+        try:
+            return hashlib.sha256(self.signature + pickle.dumps(key, protocol=4)) \
+                .hexdigest()
+        except Exception:  # unpicklable parameter values: cannot be stored
+            return None
+
+    def get(self, key: tuple, want_derived=False) -> Optional[Dict]:
+        """
+        Returns the state stored with this key, or None if not stored (or if derived
+        parameters are wanted but were not computed for the stored state).
+        """
+        hashed = self._hash(key)
+        if hashed is None:
+            return None
+        try:
+            with self._lock, self._connection:
+                row = self._connection.execute(
+                    "SELECT state FROM states WHERE key=?", (hashed,)).fetchone()
+                if row is None:
+                    return None
+                try:
+                    state = pickle.loads(row[0])
+                except Exception as excpt:
+                    # e.g. stored by a different version of the code: discard it
+                    self.log.debug("Discarding unreadable state from persistent "
+                                   "cache: %r", excpt)
+                    self._connection.execute("DELETE FROM states WHERE key=?", (hashed,))
+                    return None
+                if want_derived and state["derived"] is None:
+                    return None
+                self._connection.execute(
+                    "UPDATE states SET last_used=? WHERE key=?", (time.time(), hashed))
+        except sqlite3.Error as excpt:
+            self.log.debug("Could not retrieve state from persistent cache: %r", excpt)
+            return None
+        self.log.debug("Re-using results from persistent cache")
+        return state
+
+    def add(self, key: tuple, state: Dict):
+        """
+        Stores the state, evicting the least recently used ones if the total size of the
+        stored states exceeds the maximum size.
+        """
+        hashed = self._hash(key)
+        if hashed is None:
+            return
+        try:
+            blob = pickle.dumps(state, protocol=4)
+        except Exception as excpt:
+            if not self._warned_unpicklable:
+                self.log.warning("Computed states cannot be stored in the persistent "
+                                 "cache: %r", excpt)
+                self._warned_unpicklable = True
+            return
+        if len(blob) > self.max_size:
+            return
+        try:
+            with self._lock, self._connection:
+                # (not INSERT OR REPLACE, which does not fire the delete trigger)
+                self._connection.execute("DELETE FROM states WHERE key=?", (hashed,))
+                self._connection.execute(
+                    "INSERT INTO states VALUES (?, ?, ?, ?)",
+                    (hashed, sqlite3.Binary(blob), len(blob), time.time()))
+                self._evict()
+        except sqlite3.Error as excpt:
+            self.log.debug("Could not store state in persistent cache: %r", excpt)
+
+    def _evict(self):
+        total = self._connection.execute("SELECT size FROM total_size").fetchone()[0]
+        if total <= self.max_size:
+            return
+        # Cumulative sizes from the least recently used on, until under the maximum
+        excess = total - self.max_size
+        removed = 0
+        evicted = []
+        for hashed, size in self._connection.execute(
+                "SELECT key, size FROM states ORDER BY last_used ASC"):
+            evicted.append((hashed,))
+            removed += size
+            if removed >= excess:
+                break
+        self._connection.executemany("DELETE FROM states WHERE key=?", evicted)
+        self.log.debug("Evicted %d states from persistent cache", len(evicted))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM states").fetchone()[0]
+
+    def clear(self):
+        """
+        Removes all stored states (also those of other computations sharing the file).
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM states")
+
+    def close(self):
+        """
+        Closes the connection to the database.
+        """
+        with self._lock:
+            self._connection.close()
@@ -9,7 +9,10 @@
 import os
 import sys
 import time
-from itertools import chain
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
 from typing import List, Union, NamedTuple, Optional
 import numpy as np
 
@@ -17,7 +20,7 @@ from cobaya import mpi
 from cobaya.collection import SampleCollection
 from cobaya.conventions import prior_1d_name, OutPar, get_chi2_name, \
     undo_chi2_name, get_minuslogpior_name, separator_files, minuslogprior_names, \
-    packages_path_input
+    chi2_names, packages_path_input
 from cobaya.input import update_info, add_aggregated_chi2_params, load_input_dict
 from cobaya.log import logger_setup, get_logger, is_debug, LoggedError
 from cobaya.model import Model
@@ -52,6 +55,8 @@ class OutputOptions:
     # but want to dump out regularly, so set _reweight_after as minimum to check first
     reweight_after = 100
     output_inteveral_s = 60
+    # number of input points processed at once (likelihoods are called in batches)
+    chunk_size = 1000
 
 
 class PostTuple(NamedTuple):
@@ -76,6 +81,189 @@ class DummyModel:
         self.likelihood = list(info_likelihood)
 
 
+class ChunkEvaluator:
+    """
+    Computes the new priors, likelihoods and derived parameters of chunks of points of
+    the input sample, returning those of the points with non-null posterior.
+
+    Can be sent to other processes, where the model for the added priors and likelihoods
+    (and, if needed, the regenerated input priors) is created again from its input.
+    """
+
+    def __init__(self, model_kwargs, params_in, info_prior_regenerate,
+                 prior_recompute_1d, mlprior_names_add, chi2_names_add,
+                 minuslogprior_names_out, chi2_names_out, derived_params_out,
+                 sampled_params_in, remove_params, inv_types, added_params):
+        self.model_kwargs = deepcopy_where_possible(model_kwargs)
+        self.params_in = params_in
+        self.info_prior_regenerate = info_prior_regenerate
+        self.prior_recompute_1d = prior_recompute_1d
+        self.mlprior_names_add = mlprior_names_add
+        self.chi2_names_add = chi2_names_add
+        self.minuslogprior_names_out = minuslogprior_names_out
+        self.chi2_names_out = chi2_names_out
+        self.derived_params_out = derived_params_out
+        self.sampled_params_in = sampled_params_in
+        self.remove_params = remove_params
+        self.inv_types = inv_types
+        self.added_params = added_params
+        self.model_add: Optional[Model] = None
+        self.log = get_logger(__name__)
+
+    def initialize(self, model_add: Optional[Model] = None):
+        """
+        Creates the model of the added priors and likelihoods (unless given) and the
+        rest of the auxiliary objects.
+        """
+        self.model_add = model_add or Model(**deepcopy_where_possible(self.model_kwargs))
+        self.parameterization = Parameterization(self.model_kwargs["info_params"])
+        self.prior_regenerate = None
+        if self.info_prior_regenerate:
+            self.prior_regenerate = Prior(
+                Parameterization(self.params_in, ignore_unused_sampled=True),
+                self.info_prior_regenerate)
+            self.regenerated_prior_names = minuslogprior_names(
+                self.info_prior_regenerate)
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items()
+                if k in ["model_kwargs", "params_in", "info_prior_regenerate",
+                         "prior_recompute_1d", "mlprior_names_add", "chi2_names_add",
+                         "minuslogprior_names_out", "chi2_names_out",
+                         "derived_params_out", "sampled_params_in", "remove_params",
+                         "inv_types", "added_params"]}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.model_add = None
+        self.log = get_logger(__name__)
+
+    def __call__(self, values: np.ndarray, names_in: List[str]) -> list:
+        """
+        Evaluates a chunk of points (rows of ``values``, with columns ``names_in``).
+
+        Returns a list of tuples ``(i, logpriors, loglikes, derived)``, where ``i`` is
+        the index of the point in the chunk, for the points with non-null posterior.
+        """
+        if self.model_add is None:
+            self.initialize()
+        log = self.log
+        model_add = self.model_add
+        i_name_in = {name: i for i, name in enumerate(names_in)}
+        i_kept_in = [i for i, name in enumerate(names_in)
+                     if name not in self.remove_params]
+        # Old priors and likelihoods (column, or None to be taken as null)
+        i_minuslogpriors_in = [i_name_in.get(name)
+                               for name in self.minuslogprior_names_out]
+        i_chi2s_in = [i_name_in.get(name) for name in self.chi2_names_out]
+        # Add/remove priors
+        if self.prior_recompute_1d:
+            sampled = values[:, [i_name_in[p] for p in self.sampled_params_in]]
+            logps_1d = model_add.prior.logps_internal(sampled)
+        points_params = []
+        points_logpriors = []
+        for i, point in enumerate(values):
+            if self.prior_recompute_1d:
+                if logps_1d[i] == -np.inf:
+                    continue
+                priors_add = [logps_1d[i]]
+            else:
+                priors_add = []
+            all_params = self.parameterization.to_input(
+                {names_in[j]: point[j] for j in i_kept_in}).copy()
+            if model_add.prior.external:
+                priors_add.extend(model_add.prior.logps_external(all_params))
+            logpriors_add = dict(zip(self.mlprior_names_add, priors_add))
+            logpriors_new = [logpriors_add.get(name, -point[j] if j is not None else 0)
+                             for name, j in zip(self.minuslogprior_names_out,
+                                                i_minuslogpriors_in)]
+            if self.prior_regenerate:
+                regenerated = dict(zip(self.regenerated_prior_names,
+                                       self.prior_regenerate.logps_external(all_params)))
+                for _i, name in enumerate(self.minuslogprior_names_out):
+                    if name in self.regenerated_prior_names:
+                        logpriors_new[_i] = regenerated[name]
+            if is_debug(log):
+                log.debug("Point: %r", dict(zip(names_in, point)))
+                log.debug("New set of priors: %r",
+                          dict(zip(self.minuslogprior_names_out, logpriors_new)))
+            if -np.inf in logpriors_new:
+                continue
+            points_params.append((i, all_params))
+            points_logpriors.append(logpriors_new)
+        # Add/remove likelihoods and/or (re-)calculate derived parameters
+        if points_params:
+            loglikes_add_points, output_derived_points = model_add.logps_batch(
+                [all_params for _, all_params in points_params])
+        else:
+            loglikes_add_points, output_derived_points = [], []
+        points_kept = []
+        for (i, all_params), logpriors_new, loglikes_add, output_derived in zip(
+                points_params, points_logpriors, loglikes_add_points,
+                output_derived_points):
+            point = values[i]
+            loglikes_add = dict(zip(self.chi2_names_add, loglikes_add))
+            output_derived = dict(zip(model_add.output_params, output_derived))
+            loglikes_new = [loglikes_add.get(name,
+                                             -0.5 * point[j] if j is not None else 0)
+                            for name, j in zip(self.chi2_names_out, i_chi2s_in)]
+            if is_debug(log):
+                log.debug("New set of likelihoods: %r",
+                          dict(zip(self.chi2_names_out, loglikes_new)))
+                if output_derived:
+                    log.debug("New set of derived parameters: %r", output_derived)
+            if -np.inf in loglikes_new:
+                continue
+            all_params.update(output_derived)
+            all_params.update(
+                self.parameterization.to_derived(all_params, input_params=all_params))
+            derived = {param: all_params.get(param) for param in self.derived_params_out}
+            # We need to recompute the aggregated chi2 by hand
+            for type_, likes in self.inv_types.items():
+                derived[get_chi2_name(type_)] = sum(
+                    -2 * lvalue for lname, lvalue
+                    in zip(self.chi2_names_out, loglikes_new)
+                    if undo_chi2_name(lname) in likes)
+            if is_debug(log):
+                log.debug("New derived parameters: %r",
+                          {p: derived[p] for p in self.derived_params_out
+                           if p in self.added_params})
+            points_kept.append((i, logpriors_new, loglikes_new, list(derived.values())))
+        return points_kept
+
+
+# Evaluator of the process, when post-processing with a local pool of processes
+_process_evaluator: Optional[ChunkEvaluator] = None
+
+
+def _initialize_process(evaluator_dump: bytes, debug=None):
+    global _process_evaluator
+    logger_setup(debug)
+    _process_evaluator = _loads(evaluator_dump)
+    _process_evaluator.initialize()
+
+
+def _evaluate_in_process(values: np.ndarray, names_in: List[str]) -> list:
+    assert _process_evaluator is not None
+    return _process_evaluator(values, names_in)
+
+
+def _dumps(obj) -> bytes:
+    try:
+        import dill
+    except ImportError:
+        return pickle.dumps(obj)
+    return dill.dumps(obj)
+
+
+def _loads(dump: bytes):
+    try:
+        import dill
+    except ImportError:
+        return pickle.loads(dump)
+    return dill.loads(dump)
+
+
 @mpi.sync_state
 def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
          sample: Union[SampleCollection, List[SampleCollection], None] = None
@@ -139,11 +327,9 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
             # look for un-numbered output files
             files = output_in.find_collections(name=False)
         if files:
-            if mpi.size() > len(files):
-                raise LoggedError(log, "Number of MPI processes (%s) is larger than "
-                                       "the number of sample files (%s)",
-                                  mpi.size(), len(files))
-            for num in range(mpi.rank(), len(files), mpi.size()):
+            # With MPI, all processes load all samples, and their chunks of points
+            # are shared dynamically between processes (see below)
+            for num in range(len(files)):
                 in_collections += [SampleCollection(
                     dummy_model_in, output_in,
                     onload_thin=thin, onload_skip=skip, load=True, file_name=files[num],
@@ -155,6 +341,17 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
     else:
         raise LoggedError(log, "No output from where to load from, "
                                "nor input collections given.")
+    # Chunks of points shared between MPI processes (otherwise, each process processes
+    # the collections that it was passed), or between processes of a local pool
+    share_chunks = mpi.more_than_one_process() and not sample
+    processes = info_post.get("processes") or 1
+    if processes > 1 and mpi.more_than_one_process():
+        raise LoggedError(log, "Cannot use a pool of %d local processes "
+                               "when running with MPI.", processes)
+    if processes > 1 and sys.version_info < (3, 7):
+        log.warning("A pool of local processes needs Python 3.7 or later. "
+                    "Post-processing sequentially.")
+        processes = 1
     if any(len(c) <= 1 for c in in_collections):
         raise LoggedError(
             log, "Not enough samples for post-processing. Try using a larger sample, "
@@ -319,7 +516,9 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
             raise LoggedError(log, "You need to provide a '%s' for your output chains.",
                               "suffix")
         out_prefix += separator_files + "post" + separator_files + suffix
-    output_out = get_output(prefix=out_prefix, force=info.get("force"))
+    output_out = get_output(prefix=out_prefix, force=info.get("force"),
+                            output_format=info_post.get("output_format",
+                                                        info.get("output_format")))
     output_out.set_lock()
 
     if output_out and not output_out.force and output_out.find_collections():
@@ -339,36 +538,41 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
 
     dummy_model_out = DummyModel(out_combined_params, out_combined["likelihood"],
                                  info_prior=out_combined["prior"])
-    out_func_parameterization = Parameterization(out_params_with_computed)
 
     # TODO: check allow_renames=False?
-    model_add = Model(out_params_with_computed, add["likelihood"],
-                      info_prior=add.get("prior"), info_theory=out_combined["theory"],
-                      packages_path=(info_post.get(packages_path_input) or
-                                     info.get(packages_path_input)),
-                      allow_renames=False, post=True,
-                      stop_at_error=info.get('stop_at_error', False),
-                      skip_unused_theories=True, dropped_theory_params=dropped_theory)
+    model_kwargs = dict(info_params=out_params_with_computed,
+                        info_likelihood=deepcopy_where_possible(add["likelihood"]),
+                        info_prior=add.get("prior"), info_theory=out_combined["theory"],
+                        packages_path=(info_post.get(packages_path_input) or
+                                       info.get(packages_path_input)),
+                        allow_renames=False, post=True,
+                        stop_at_error=info.get('stop_at_error', False),
+                        skip_unused_theories=True, dropped_theory_params=dropped_theory)
+    model_add = Model(**model_kwargs)
     # Remove auxiliary "one" before dumping -- 'add' *is* info_out["post"]["add"]
     add["likelihood"].pop("one")
-    out_collections = [SampleCollection(dummy_model_out, output_out, name=c.name,
-                                        cache_size=OutputOptions.default_post_cache_size)
-                       for c in in_collections]
+    # If the chunks are shared between MPI processes, the root one collects the results
+    if not share_chunks or mpi.is_main_process():
+        out_collections = [
+            SampleCollection(dummy_model_out, output_out, name=c.name,
+                             cache_size=OutputOptions.default_post_cache_size)
+            for c in in_collections]
+    else:
+        out_collections = []
     # TODO: should maybe add skip/thin to out_combined, so can tell post-processed?
     output_out.check_and_dump_info(info_out, out_combined, check_compatible=False)
     collection_in = in_collections[0]
-    collection_out = out_collections[0]
+    minuslogprior_names_out = minuslogprior_names(dummy_model_out.prior)
+    chi2_names_out = chi2_names(dummy_model_out.likelihood)
 
     last_percent = None
-    known_constants = dummy_model_out.parameterization.constant_params()
-    known_constants.update(dummy_model_in.parameterization.constant_params())
     missing_params = dummy_model_in.parameterization.sampled_params().keys() - set(
         collection_in.columns)
     if missing_params:
         raise LoggedError(log, "Input samples do not contain expected sampled parameter "
                                "values: %s", missing_params)
 
-    missing_priors = set(name for name in collection_out.minuslogprior_names if
+    missing_priors = set(name for name in minuslogprior_names_out if
                          name not in mlprior_names_add
                          and name not in collection_in.columns)
     if _minuslogprior_1d_name in missing_priors:
@@ -376,22 +580,24 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
     if prior_recompute_1d:
         missing_priors.discard(_minuslogprior_1d_name)
         mlprior_names_add.insert(0, _minuslogprior_1d_name)
-    prior_regenerate: Optional[Prior]
+    info_prior_regenerate = None
     if missing_priors and "prior" in info_in:
         # in case there are input priors that are not stored in input samples
         # e.g. when postprocessing GetDist/CosmoMC-format chains
         in_names = minuslogprior_names(info_in["prior"])
-        info_prior = {piname: inf for (piname, inf), in_name in
-                      zip(info_in["prior"].items(), in_names) if
-                      in_name in missing_priors}
-        regenerated_prior_names = minuslogprior_names(info_prior)
-        missing_priors.difference_update(regenerated_prior_names)
-        prior_regenerate = Prior(dummy_model_in.parameterization, info_prior)
-    else:
-        prior_regenerate = None
-        regenerated_prior_names = None
+        info_prior_regenerate = {piname: inf for (piname, inf), in_name in
+                                 zip(info_in["prior"].items(), in_names) if
+                                 in_name in missing_priors}
+        missing_priors.difference_update(minuslogprior_names(info_prior_regenerate))
     if missing_priors:
         raise LoggedError(log, "Missing priors: %s", missing_priors)
+    evaluator = ChunkEvaluator(
+        model_kwargs, params_in, info_prior_regenerate, prior_recompute_1d,
+        mlprior_names_add, chi2_names_add, minuslogprior_names_out, chi2_names_out,
+        list(dummy_model_out.parameterization.derived_params()),
+        list(dummy_model_in.parameterization.sampled_params()), remove_params,
+        inv_types, list(add["params"]))
+    evaluator.initialize(model_add)
 
     mpi.sync_processes()
     output_in.check_lock()
@@ -399,23 +605,65 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
     # 4. Main loop! Loop over input samples and adjust as required.
     if mpi.is_main_process():
         log.info("Running post-processing...")
+    chunk_size = OutputOptions.chunk_size
+    pool = None
+    if processes > 1:
+        log.info("Starting a pool of %d processes.", processes)
+        pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_process,
+            initargs=(_dumps(evaluator), info.get("debug")))
     difflogmax: Optional[float] = None
     to_do = sum(len(c) for c in in_collections)
     weights = []
     done = 0
     last_dump_time = time.time()
-    for collection_in, collection_out in zip(in_collections, out_collections):
+    for k, collection_in in enumerate(in_collections):
+        names_in = list(collection_in.data.columns)
+        firsts = range(0, len(collection_in), chunk_size)
+        # Process the input sample in chunks: 1d priors and vectorized likelihoods
+        # are computed for all the points in a chunk at once. The results are
+        # assembled in order, also if computed in parallel.
+        if share_chunks:
+            # Chunks are handed to the MPI processes as they finish the previous ones,
+            # and the results of each sample are collected by the root process
+            shared_results = {}
+            for i_chunk in mpi.dynamic_range(len(firsts)):
+                first = firsts[i_chunk]
+                shared_results[first] = evaluator(
+                    collection_in.values[first:first + chunk_size], names_in)
+                mpi.check_errors()
+            log.debug("Processed %d out of %d chunks of points of sample %d.",
+                      len(shared_results), len(firsts), k + 1)
+            all_results = mpi.gather(shared_results)
+            if not mpi.is_main_process():
+                continue
+            for results in all_results[1:]:
+                shared_results.update(results)
+            chunks_results = (shared_results.pop(first) for first in firsts)
+        elif pool:
+            chunks_results = pool.map(
+                _evaluate_in_process,
+                (collection_in.values[first:first + chunk_size] for first in firsts),
+                repeat(names_in))
+        else:
+            chunks_results = (
+                evaluator(collection_in.values[first:first + chunk_size], names_in)
+                for first in firsts)
+        collection_out = out_collections[k]
         importance_weights = []
+        # -logpost of the input points added before the reweighting offset is known
+        minuslogpost_in_added: List[float] = []
 
         def set_difflogmax():
             nonlocal difflogmax
-            difflog = (collection_in[OutPar.minuslogpost].to_numpy(dtype=np.float64)[:len(collection_out)]
+            difflog = (np.array(minuslogpost_in_added)
                        - collection_out[OutPar.minuslogpost].to_numpy(dtype=np.float64))
             difflogmax = np.max(difflog)
             if abs(difflogmax) < 1:
                 difflogmax = 0  # keep simple when e.g. very similar
             log.debug("difflogmax: %g", difflogmax)
-            if mpi.more_than_one_process():
+            if mpi.more_than_one_process() and not share_chunks:
                 difflogmax = max(mpi.allgather(difflogmax))
             if mpi.is_main_process():
                 log.debug("Set difflogmax: %g", difflogmax)
@@ -423,100 +671,49 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
             importance_weights.extend(_weights)
             collection_out.reweight(_weights)
 
-        for i, point in collection_in.data.iterrows():
-            all_params = point.to_dict()
-            for p in remove_params:
-                all_params.pop(p, None)
-            log.debug("Point: %r", point)
-            sampled = np.array([all_params[param] for param in
-                                dummy_model_in.parameterization.sampled_params()])
-            all_params = out_func_parameterization.to_input(all_params).copy()
-
-            # Add/remove priors
-            if prior_recompute_1d:
-                priors_add = [model_add.prior.logps_internal(sampled)]
-                if priors_add[0] == -np.inf:
-                    continue
-            else:
-                priors_add = []
-            if model_add.prior.external:
-                priors_add.extend(model_add.prior.logps_external(all_params))
-
-            logpriors_add = dict(zip(mlprior_names_add, priors_add))
-            logpriors_new = [logpriors_add.get(name, - point.get(name, 0))
-                             for name in collection_out.minuslogprior_names]
-            if prior_regenerate:
-                regenerated = dict(zip(regenerated_prior_names,
-                                       prior_regenerate.logps_external(all_params)))
-                for _i, name in enumerate(collection_out.minuslogprior_names):
-                    if name in regenerated_prior_names:
-                        logpriors_new[_i] = regenerated[name]
-
-            if is_debug(log):
-                log.debug("New set of priors: %r",
-                          dict(zip(dummy_model_out.prior, logpriors_new)))
-            if -np.inf in logpriors_new:
-                continue
-            # Add/remove likelihoods and/or (re-)calculate derived parameters
-            loglikes_add, output_derived = model_add.logps(all_params)
-            loglikes_add = dict(zip(chi2_names_add, loglikes_add))
-            output_derived = dict(zip(model_add.output_params, output_derived))
-            loglikes_new = [loglikes_add.get(name, -0.5 * point.get(name, 0))
-                            for name in collection_out.chi2_names]
-            if is_debug(log):
-                log.debug("New set of likelihoods: %r",
-                          dict(zip(dummy_model_out.likelihood, loglikes_new)))
-                if output_derived:
-                    log.debug("New set of derived parameters: %r", output_derived)
-            if -np.inf in loglikes_new:
-                continue
-            all_params.update(output_derived)
-
-            all_params.update(out_func_parameterization.to_derived(all_params))
-            derived = {param: all_params.get(param)
-                       for param in dummy_model_out.parameterization.derived_params()}
-            # We need to recompute the aggregated chi2 by hand
-            for type_, likes in inv_types.items():
-                derived[get_chi2_name(type_)] = sum(
-                    -2 * lvalue for lname, lvalue
-                    in zip(collection_out.chi2_names, loglikes_new)
-                    if undo_chi2_name(lname) in likes)
-            if is_debug(log):
-                log.debug("New derived parameters: %r",
-                          {p: derived[p]
-                           for p in dummy_model_out.parameterization.derived_params()
-                           if p in add["params"]})
-            # Save to the collection (keep old weight for now)
-            weight = point.get(OutPar.weight)
-            mpi.check_errors()
-            if difflogmax is None and i > OutputOptions.reweight_after and \
+        i_name_in = {name: i for i, name in enumerate(names_in)}
+        i_sampled_in = [i_name_in[p] for p in evaluator.sampled_params_in]
+        for first, points_kept in zip(firsts, chunks_results):
+            values = collection_in.values[first:first + chunk_size]
+            sampled = values[:, i_sampled_in]
+            if not share_chunks:
+                mpi.check_errors()
+            if difflogmax is None and first > OutputOptions.reweight_after and \
                     time.time() - last_dump_time > OutputOptions.output_inteveral_s / 2:
                 set_difflogmax()
                 collection_out.out_update()
-
-            if difflogmax is not None:
-                logpost_new = sum(logpriors_new) + sum(loglikes_new)
-                importance_weight = np.exp(logpost_new + point.get(OutPar.minuslogpost)
-                                           - difflogmax)
-                weight = weight * importance_weight
-                importance_weights.append(importance_weight)
-                if time.time() - last_dump_time > OutputOptions.output_inteveral_s:
-                    collection_out.out_update()
-                    last_dump_time = time.time()
-
-            if weight > 0:
-                collection_out.add(sampled, derived=derived.values(), weight=weight,
-                                   logpriors=logpriors_new, loglikes=loglikes_new)
+            # Save to the collection
+            weights_in = values[:, i_name_in[OutPar.weight]]
+            minuslogposts_in = values[:, i_name_in[OutPar.minuslogpost]]
+            for i, logpriors_new, loglikes_new, derived in points_kept:
+                weight = weights_in[i]
+                if difflogmax is not None:
+                    logpost_new = sum(logpriors_new) + sum(loglikes_new)
+                    importance_weight = np.exp(
+                        logpost_new + minuslogposts_in[i] - difflogmax)
+                    weight = weight * importance_weight
+                    importance_weights.append(importance_weight)
+                if weight > 0:
+                    collection_out.add(sampled[i], derived=derived,
+                                       weight=weight, logpriors=logpriors_new,
+                                       loglikes=loglikes_new)
+                    if difflogmax is None:
+                        minuslogpost_in_added.append(minuslogposts_in[i])
+            if difflogmax is not None and \
+                    time.time() - last_dump_time > OutputOptions.output_inteveral_s:
+                collection_out.out_update()
+                last_dump_time = time.time()
 
             # Display progress
-            percent = int(np.round((i + done) / to_do * 100))
+            percent = int(np.round((first + len(values) + done) / to_do * 100))
             if percent != last_percent and not percent % 5:
                 last_percent = percent
-                progress_bar(log, percent, " (%d/%d)" % (i + done, to_do))
+                progress_bar(log, percent,
+                             " (%d/%d)" % (first + len(values) + done, to_do))
 
         if difflogmax is None:
             set_difflogmax()
-        if not collection_out.data.last_valid_index():
+        if not len(collection_out):
             raise LoggedError(
                 log, "No elements in the final sample. Possible causes: "
                      "added a prior or likelihood valued zero over the full sampled "
@@ -524,8 +721,8 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
         collection_out.out_update()
         weights.append(np.array(importance_weights))
         done += len(collection_in)
-
-    assert difflogmax is not None
+    if pool:
+        pool.shutdown()
     points = 0
     tot_weight = 0
     min_weight = np.inf
@@ -545,10 +742,16 @@ def post(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
         max_output_weight = max(max_output_weight, np.max(output_weights))
         sum_w2 += np.dot(output_weights, output_weights)
 
+    stats = [tot_weight, min_weight, max_weight, max_output_weight, sum_w2,
+             points, points_removed]
+    if share_chunks:
+        # Only the root process has the resulting samples: share the rest of the results
+        difflogmax, weights, stats = mpi.share(
+            (difflogmax, weights, stats) if mpi.is_main_process() else None)
+    assert difflogmax is not None
     (tot_weights, min_weights, max_weights, max_output_weights, sum_w2s, points_s,
-     points_removed_s) = mpi.zip_gather(
-        [tot_weight, min_weight, max_weight, max_output_weight, sum_w2,
-         points, points_removed])
+     points_removed_s) = (((stat,) for stat in stats) if share_chunks
+                          else mpi.zip_gather(stats))
 
     if mpi.is_main_process():
         output_out.clear_lock()
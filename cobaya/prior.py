@@ -339,7 +339,8 @@ Just give it a try and it should work fine, but, in case you need the details:
 import numpy as np
 import numbers
 from types import MethodType
-from typing import Sequence, NamedTuple, Callable, Optional, Mapping, List
+from typing import Sequence, NamedTuple, Callable, Optional, Mapping, List, Dict, \
+    Union
 
 # Local
 from cobaya.conventions import prior_1d_name
@@ -358,6 +359,40 @@ class ExternalPrior(NamedTuple):
     params: Sequence[str]
 
 
+class PriorFamily(NamedTuple):
+    """
+    Group of parameters sharing the family of their 1d prior pdf, whose log-densities
+    are evaluated together with a single vectorized call.
+    """
+    indices: np.ndarray
+    logpdf: Callable
+
+
+def _family_logpdf(dist_name, pdfs) -> Callable:
+    """
+    Returns a function computing the log-densities of a list of frozen scipy pdf's
+    of the same family, for an array of values with the parameters in the last axis.
+    Values must be within the support of the pdf's.
+    """
+    shape_names = [name.strip() for name in (pdfs[0].dist.shapes or "").split(",")
+                   if name.strip()]
+    arg_names = shape_names + ["loc", "scale"]
+    args = []
+    for pdf in pdfs:
+        args.append({"loc": 0, "scale": 1})
+        args[-1].update(zip(arg_names, pdf.args))
+        args[-1].update(pdf.kwds)
+    shapes = [np.array([pdf_args[name] for pdf_args in args]) for name in shape_names]
+    loc = np.array([pdf_args["loc"] for pdf_args in args], dtype=np.float64)
+    scale = np.array([pdf_args["scale"] for pdf_args in args], dtype=np.float64)
+    if dist_name == "norm":
+        const = -np.log(scale) - 0.5 * np.log(2 * np.pi)
+        inv_scale = 1 / scale
+        return lambda x: const - 0.5 * ((x - loc) * inv_scale) ** 2
+    dist = pdfs[0].dist
+    return lambda x: dist.logpdf(x, *shapes, loc=loc, scale=scale)
+
+
 class Prior(HasLogger):
     """
     Class managing the prior and reference pdf's.
@@ -417,7 +452,14 @@ class Prior(HasLogger):
         self._non_uniform_indices = np.array(
             [i for i in range(len(self.pdf)) if i not in self._uniform_indices],
             dtype=int)
-        self._non_uniform_logpdf = [self.pdf[i].logpdf for i in self._non_uniform_indices]
+        # Group non-uniform pdf's by family, to evaluate them together
+        family_indices: Dict[str, List[int]] = {}
+        for i in self._non_uniform_indices:
+            family_indices.setdefault(self.pdf[i].dist.name, []).append(i)
+        self._non_uniform_families = [
+            PriorFamily(np.array(indices, dtype=int),
+                        _family_logpdf(name, [self.pdf[i] for i in indices]))
+            for name, indices in family_indices.items()]
         self._upper_limits = self._bounds[:, 1].copy()
         self._lower_limits = self._bounds[:, 0].copy()
         self._uniform_logp = -np.sum(np.log(self._upper_limits[self._uniform_indices] -
@@ -522,17 +564,21 @@ class Prior(HasLogger):
                           "(see help of this function on how to fix this).")
         return np.array([pdf.rvs(n, random_state=random_state) for pdf in self.pdf]).T
 
-    def logps(self, x: np.ndarray) -> List[float]:
+    def logps(self, x: np.ndarray) -> Union[List[float], np.ndarray]:
         """
-        Takes a point (sampled parameter values, in the correct order).
+        Takes a point (sampled parameter values, in the correct order), or an array of
+        points with one point per row.
 
         Returns:
            An array of the prior log-probability densities of the given point
            or array of points. The first element on the list is the products
            of 1d priors specified in the ``params`` block, and the following
            ones (if present) are the priors specified in the ``prior`` block
-           in the same order.
+           in the same order. For an array of points, a 2d array is returned,
+           with one row per point.
         """
+        if np.ndim(x) > 1:
+            return self._logps_points(x)
         logps = self.logps_internal(x)
         if logps != -np.inf:
             if self.external:
@@ -543,36 +589,67 @@ class Prior(HasLogger):
         else:
             return [-np.inf] * (1 + len(self.external))
 
+    def _logps_points(self, x: np.ndarray) -> np.ndarray:
+        # Version of logps for an array of points (one per row)
+        x = np.asarray(x, dtype=np.float64)
+        logps = np.full((len(x), len(self)), -np.inf)
+        logps[:, 0] = self._logps_internal_points(x)
+        if self.external:
+            i_valid = np.flatnonzero(logps[:, 0] != -np.inf)
+            input_names = list(self._parameterization.input_params())
+            for i, input_values in zip(
+                    i_valid, self._parameterization.to_input_batch(x[i_valid])):
+                logps[i, 1:] = self.logps_external(dict(zip(input_names, input_values)))
+        return logps
+
     def logp(self, x: np.ndarray):
         """
-        Takes a point (sampled parameter values, in the correct order).
+        Takes a point (sampled parameter values, in the correct order), or an array of
+        points with one point per row.
 
         Returns:
            The prior log-probability density of the given point or array of points.
         """
-        return np.sum(self.logps(x), axis=0)
+        return np.sum(self.logps(x), axis=-1)
 
-    def logps_internal(self, x: np.ndarray) -> float:
+    def logps_internal(self, x: np.ndarray) -> Union[float, np.ndarray]:
         """
-        Takes a point (sampled parameter values, in the correct order).
+        Takes a point (sampled parameter values, in the correct order), or an array of
+        points with one point per row.
 
         Returns:
            The prior log-probability density of the given point
            or array of points, only including the products
            of 1d priors specified in the ``params`` block, no external priors
         """
+        if np.ndim(x) > 1:
+            return self._logps_internal_points(x)
         self.log.debug("Evaluating prior at %r", x)
-        if all(x <= self._upper_limits) and all(x >= self._lower_limits):
-            logps = self._uniform_logp + (sum([logpdf(xi) for logpdf, xi in
-                                               zip(self._non_uniform_logpdf,
-                                                   x[self._non_uniform_indices])])
-                                          if len(self._non_uniform_indices) else 0)
+        if (x <= self._upper_limits).all() and (x >= self._lower_limits).all():
+            logps = self._uniform_logp + self._non_uniform_logps_sum(x)
         else:
             logps = -np.inf
 
         self.log.debug("Got logpriors = %r", logps)
         return logps
 
+    def _logps_internal_points(self, x: np.ndarray) -> np.ndarray:
+        # Vectorized version of logps_internal for an array of points (one per row)
+        x = np.asarray(x, dtype=np.float64)
+        logps = np.full(len(x), -np.inf)
+        in_bounds = np.all((x <= self._upper_limits) & (x >= self._lower_limits), axis=1)
+        logps[in_bounds] = self._uniform_logp + self._non_uniform_logps_sum(x[in_bounds])
+        return logps
+
+    def _non_uniform_logps_sum(self, x: np.ndarray):
+        # Sum of the log-densities of non-uniform 1d priors, for a point or an array of
+        # points (one per row) within the prior bounds.
+        # One vectorized call per family of pdf's.
+        logps = 0
+        for family in self._non_uniform_families:
+            logps = logps + np.sum(family.logpdf(x[..., family.indices]), axis=-1)
+        return logps
+
     def logps_external(self, input_params) -> List[float]:
         """Evaluates the logprior using the external prior only."""
         return [ext.logp(**{p: input_params[p] for p in ext.params})
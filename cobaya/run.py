@@ -22,7 +22,7 @@ from cobaya.yaml import yaml_dump
 from cobaya.input import update_info
 from cobaya.tools import warn_deprecation, recursive_update, sort_cosmetic
 from cobaya.post import post, PostTuple
-from cobaya import mpi
+from cobaya import mpi, tracing
 
 
 class InfoSamplerTuple(NamedTuple):
@@ -100,7 +100,8 @@ def run(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
                             "as e.g. `sampler: {mcmc: None}.`")
         infix = "minimize" if which_sampler == "minimize" else None
         with get_output(prefix=info.get("output"), resume=info.get("resume"),
-                        force=info.get("force"), infix=infix) as out:
+                        force=info.get("force"), infix=infix,
+                        output_format=info.get("output_format")) as out:
             # 2. Update the input info with the defaults for each component
             updated_info = update_info(info)
             if is_debug(logger_run):
@@ -137,7 +138,8 @@ def run(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
                        packages_path=info.get(packages_path_input),
                        timing=updated_info.get("timing"),
                        allow_renames=False,
-                       stop_at_error=info.get("stop_at_error", False)) as model:
+                       stop_at_error=info.get("stop_at_error", False),
+                       component_threads=info.get("component_threads")) as model:
                 # Re-dump the updated info, now containing parameter routes and version
                 updated_info = recursive_update(updated_info, model.info())
                 out.check_and_dump_info(None, updated_info, check_compatible=False)
@@ -155,7 +157,20 @@ def run(info_or_yaml_or_file: Union[InputDict, str, os.PathLike],
                                     "You can probably run now without `--%s`.", "test")
                     return InfoSamplerTuple(updated_info, sampler)
                 # Run the sampler
-                sampler.run()
+                if info.get("trace"):
+                    tracing.start_tracing()
+                try:
+                    sampler.run()
+                except BaseException:
+                    # keep the timeline up to the error (one file per MPI process,
+                    # since the rest of the processes may not get here)
+                    tracer = tracing.stop_tracing()
+                    if tracer:
+                        tracer.dump(info["trace"], gather=False)
+                    raise
+                tracer = tracing.stop_tracing()
+                if tracer:
+                    tracer.dump(info["trace"])
 
     return InfoSamplerTuple(updated_info, sampler)
 
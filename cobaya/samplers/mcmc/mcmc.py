@@ -6,6 +6,11 @@
 """
 
 # Global
+import sys
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
 from itertools import chain
 import numpy as np
 from pandas import DataFrame
@@ -21,11 +26,30 @@ from cobaya.collection import SampleCollection, OneSamplePoint
 from cobaya.conventions import OutPar, Extension, line_width, get_version
 from cobaya.typing import empty_dict
 from cobaya.samplers.mcmc.proposal import BlockedProposer
-from cobaya.log import LoggedError, always_stop_exceptions
+from cobaya.log import LoggedError, always_stop_exceptions, logger_setup
 from cobaya.tools import get_external_function, NumberWithUnits, load_DataFrame
 from cobaya.yaml import yaml_dump_file
-from cobaya.model import LogPosterior
-from cobaya import mpi
+from cobaya.model import LogPosterior, get_model
+from cobaya import mpi, tracing
+
+# Model of the process, when evaluating speculative trial points in a pool of processes
+_process_model = None
+
+
+def _initialize_process(info_dump: bytes, debug=None):
+    global _process_model
+    logger_setup(debug)
+    try:
+        import dill
+    except ImportError:
+        info = pickle.loads(info_dump)
+    else:
+        info = dill.loads(info_dump)
+    _process_model = get_model(info)
+
+
+def _logposterior_in_process(point):
+    return _process_model.logposterior(point)
 
 
 class MCMC(CovmatSampler):
@@ -64,6 +88,8 @@ class MCMC(CovmatSampler):
     measure_speeds: bool
     oversample_thin: int
     oversample_power: float
+    speculative: Optional[int]
+    update_speeds: Optional[float]
 
     def set_instance_defaults(self):
         super().set_instance_defaults()
@@ -71,6 +97,7 @@ class MCMC(CovmatSampler):
         self.converged = False
         self.mpi_size = None
         self.Rminus1_last = np.inf
+        self._speculative_pool = None
 
     def initialize(self):
         """Initializes the sampler:
@@ -164,11 +191,48 @@ class MCMC(CovmatSampler):
             elif self.measure_speeds:
                 n = None if self.measure_speeds is True else int(self.measure_speeds)
                 self.model.measure_and_set_speeds(n=n, discard=0, random_state=self._rng)
+        # Requested dragging: may be disabled when computing the blocking
+        self._drag_requested = self.drag
         self.set_proposer_blocking()
         self.set_proposer_covmat(load=True)
+        # Periodic update of the speeds and the blocking (NB: when resuming, the blocking
+        # of the previous run is used as the starting point)
+        if self.speculative and sys.version_info < (3, 7):
+            self.log.warning("Speculative evaluation of trial points needs Python 3.7 "
+                             "or later. Evaluating them one at a time.")
+            self.speculative = None
+        self._update_blocking = False
+        if self.update_speeds:
+            if self.update_speeds <= 1:
+                raise LoggedError(self.log, "'update_speeds' must be a factor > 1.")
+            if self.blocking and not self.output.is_resuming():
+                self.mpi_warning("Parameter blocking manually fixed: "
+                                 "speeds will not be updated.")
+            elif self.speculative:
+                self.mpi_warning("Speeds cannot be measured when trial points are "
+                                 "evaluated speculatively by other processes: "
+                                 "speeds will not be updated.")
+            else:
+                self._update_blocking = True
+                self._timers_state = None
+                if not self.model.timing:
+                    self.model.set_timing_on(True)
 
         self.current_point.add(initial_point, results)
         self.log.info("Initial point: %s", self.current_point)
+        # Random numbers for the acceptance test: from an independent stream, so that the
+        # chain does not depend on the number of trial points evaluated speculatively
+        self._rng_accept = np.random.default_rng(self._rng.integers(2 ** 62))
+        if self.speculative:
+            if self.drag:
+                raise LoggedError(self.log, "Speculative evaluation of trial points is "
+                                            "not compatible with dragging.")
+            self.get_new_sample = self.get_new_sample_speculative
+            # Queues of trials being evaluated and of unused proposals, as tuples of
+            # (state of the proposer before drawing it, proposed step[, trial, future])
+            self._speculative_trials: deque = deque()
+            self._speculative_proposals: deque = deque()
+            self._speculative_covmat = self.proposer.propose_matrix
         # Max #(learn+convergence checks) to wait,
         # in case one process dies/hangs without raising error
         self.been_waiting = 0
@@ -369,12 +433,14 @@ class MCMC(CovmatSampler):
                                     self._msg_ready + " (waiting for the rest...)")
                             if state.all_ready():
                                 self.mpi_info("All chains are r%s", self._msg_ready[1:])
-                                self.check_convergence_and_learn_proposal()
+                                with tracing.span("convergence check", "sampler"):
+                                    self.check_convergence_and_learn_proposal()
                                 self.i_learn += 1
                         else:
                             if self.check_ready():
                                 self.log.debug(self._msg_ready)
-                                self.check_convergence_and_learn_proposal()
+                                with tracing.span("convergence check", "sampler"):
+                                    self.check_convergence_and_learn_proposal()
                                 self.i_learn += 1
                 elif self.current_point.weight % state_check_every == 0:
                     state.check_error()
@@ -387,10 +453,21 @@ class MCMC(CovmatSampler):
 
             # Write the last batch of samples ( < output_every (not in sec))
             self.collection.out_update()
+        self.close()
 
         ns = mpi.gather(self.n())
         self.mpi_info("Sampling complete after %d accepted steps.", sum(ns))
 
+    def close(self, *args):
+        """
+        Stops the pool of processes evaluating speculative trial points, if any.
+        """
+        if self._speculative_pool is not None:
+            for _, _, _, future in self._speculative_trials:
+                future.cancel()
+            self._speculative_pool.shutdown()
+            self._speculative_pool = None
+
     def n(self, burn_in=False):
         """
         Returns the total number of accepted steps taken, including or not burn-in steps
@@ -411,12 +488,88 @@ class MCMC(CovmatSampler):
            ``True`` for an accepted step, ``False`` for a rejected one.
         """
         trial = self.current_point.values.copy()
-        self.proposer.get_proposal(trial)
-        trial_results = self.model.logposterior(trial)
+        with tracing.span("proposal", "sampler"):
+            self.proposer.get_proposal(trial)
+        with tracing.span("logposterior", "posterior"):
+            trial_results = self.model.logposterior(trial)
         accept = self.metropolis_accept(trial_results.logpost, self.current_point.logpost)
         self.process_accept_or_reject(accept, trial, trial_results)
         return accept
 
+    def get_new_sample_speculative(self):
+        """
+        Like :meth:`~MCMC.get_new_sample_metropolis`, but the trial point is taken from
+        a set of ``speculative`` ones evaluated concurrently by a pool of processes, all of
+        them proposed from the current point (i.e. assuming that the previous ones are
+        rejected).
+
+        The resulting chain is the same as the one obtained when evaluating the trial
+        points one at a time: the steps proposed after an accepted one are used again,
+        from the new current point, and drawn again if the proposal covariance changes.
+
+        Returns:
+           ``True`` for an accepted step, ``False`` for a rejected one.
+        """
+        if self.proposer.propose_matrix is not self._speculative_covmat:
+            self._discard_speculative(redraw=True)
+            self._speculative_covmat = self.proposer.propose_matrix
+        if not self._speculative_trials:
+            with tracing.span("proposal", "sampler"):
+                self._submit_speculative()
+        _, _, trial, future = self._speculative_trials.popleft()
+        with tracing.span("logposterior", "posterior", speculative=True):
+            trial_results = future.result()
+        accept = self.metropolis_accept(trial_results.logpost, self.current_point.logpost)
+        self.process_accept_or_reject(accept, trial, trial_results)
+        if accept:
+            # The rest of the trial points were proposed from the old point
+            self._discard_speculative()
+        return accept
+
+    def _submit_speculative(self):
+        if self._speculative_pool is None:
+            self.mpi_info("Evaluating %d trial points concurrently per process.",
+                          self.speculative)
+            try:
+                import dill
+            except ImportError:
+                info_dump = pickle.dumps(self.model.info())
+            else:
+                info_dump = dill.dumps(self.model.info())
+            self._speculative_pool = ProcessPoolExecutor(
+                max_workers=self.speculative,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_process, initargs=(info_dump, self.is_debug()))
+        for _ in range(self.speculative):
+            if self._speculative_proposals:
+                state, delta = self._speculative_proposals.popleft()
+            else:
+                state = self.proposer.get_state()
+                delta = np.zeros(self.model.prior.d())
+                self.proposer.get_proposal(delta)
+            trial = self.current_point.values + delta
+            self._speculative_trials.append(
+                (state, delta, trial,
+                 self._speculative_pool.submit(_logposterior_in_process, trial)))
+
+    def _discard_speculative(self, redraw=False):
+        """
+        Discards the trial points being evaluated, keeping their proposed steps to be
+        used again, unless ``redraw=True`` (then, the proposer is rewound to before the
+        first one of them was drawn).
+        """
+        proposals = []
+        for state, delta, _, future in self._speculative_trials:
+            future.cancel()
+            proposals.append((state, delta))
+        self._speculative_trials.clear()
+        proposals.extend(self._speculative_proposals)
+        if redraw:
+            if proposals:
+                self.proposer.set_state(proposals[0][0])
+            proposals = []
+        self._speculative_proposals = deque(proposals)
+
     def get_new_sample_dragging(self):
         """
         Draws a new trial point in the slow subspace, and gets the corresponding trial
@@ -522,14 +675,16 @@ class MCMC(CovmatSampler):
         elif logp_trial > logp_current:
             return True
         else:
-            return self._rng.standard_exponential() > (logp_current - logp_trial)
+            return self._rng_accept.standard_exponential() > (logp_current - logp_trial)
 
     def process_accept_or_reject(self, accept_state, trial, trial_results):
         """Processes the acceptance/rejection of the new point."""
         if accept_state:
             # add the old point to the collection (if not burning or initial point)
             if self.burn_in_left <= 0:
-                if self.current_point.add_to_collection(self.collection):
+                with tracing.span("add", "collection"):
+                    added = self.current_point.add_to_collection(self.collection)
+                if added:
                     self.log.debug("New sample, #%d: \n   %s",
                                    self.n(), self.current_point)
                     # Update chain files, if output_every *not* in sec
@@ -595,8 +750,10 @@ class MCMC(CovmatSampler):
         learns a new covariance matrix for the proposal distribution from the covariance
         of the last samples.
         """
-        # Compute Rminus1 of means
         self.been_waiting = 0
+        if self._update_blocking:
+            self.update_speeds_and_blocking()
+        # Compute Rminus1 of means
         if more_than_one_process():
             # Compute and gather means and covs
             use_first = int(self.n() / 2)
@@ -771,6 +928,49 @@ class MCMC(CovmatSampler):
         # Save checkpoint info
         self.write_checkpoint()
 
+    def update_speeds_and_blocking(self):
+        """
+        Re-estimates the speeds of the components from the timing of their evaluations
+        since the last update (averaged over MPI processes) and, if the ratio between the
+        speeds of any two components has changed by more than a factor ``update_speeds``,
+        sets the new speeds and recomputes the parameter blocking and the oversampling or
+        dragging factors, keeping the current covariance matrix of the proposal.
+        """
+        times, self._timers_state = \
+            self.model.get_timed_evaluation_times(since=self._timers_state)
+        times = np.array([np.nan if time is None else time for time in times])
+        if more_than_one_process():
+            all_times = np.array(mpi.allgather(times))
+            n_timed = np.sum(np.isfinite(all_times), axis=0)
+            times = np.nansum(all_times, axis=0) / np.where(n_timed, n_timed, np.nan)
+        components = self.model.components
+        old_speeds = np.array([getattr(c, "speed", -1) or -1 for c in components],
+                              dtype=float)
+        new_speeds = 1 / (1e-7 + times)
+        measured = np.isfinite(new_speeds)
+        if not np.any(measured):
+            return
+        # Drift of the log-speeds: changes of all speeds by a common factor do not alter
+        # the blocking; newly defined speeds always trigger an update
+        known = measured & (old_speeds > 0)
+        log_drifts = np.log(new_speeds[known]) - np.log(old_speeds[known])
+        if np.all(known[measured]) and (
+                len(log_drifts) < 2 or
+                np.max(log_drifts) - np.min(log_drifts) <= np.log(self.update_speeds)):
+            return
+        for component, speed, is_measured in zip(components, new_speeds, measured):
+            if is_measured:
+                component.set_measured_speed(speed)
+        self.mpi_info("Speeds changed significantly. Setting measured speeds (per sec): "
+                      "%r", {component: float("%.3g" % speed) for component, speed, is_new
+                             in zip(components, new_speeds, measured) if is_new})
+        covmat = self.proposer.get_covariance()
+        self.blocking = None
+        self.drag = self._drag_requested
+        self.get_new_sample = self.get_new_sample_metropolis
+        self.set_proposer_blocking()
+        self.proposer.set_covariance(covmat)
+
     def do_output(self, date_time):
         self.collection.out_update()
         msg = "Progress @ %s : " % date_time.strftime("%Y-%m-%d %H:%M:%S")
@@ -251,6 +251,35 @@ class BlockedProposer(HasLogger):
         P[self.i_of_j[self.j_start[iblock]:]] += (self.transform[iblock]
                                                   .dot(vec_standardized))
 
+    def get_state(self) -> tuple:
+        """
+        Returns the state of the generation of proposals (not including the covariance),
+        so that the next proposals can be drawn again by passing it to
+        :meth:`~BlockedProposer.set_state`.
+        """
+        return (self.random_state.bit_generator.state,
+                self.nsamples_slow, self.nsamples_fast,
+                [(c.loop_index, getattr(c, "indices", None), getattr(c, "R", None))
+                 for c in self._cyclers()])
+
+    def set_state(self, state: tuple):
+        """
+        Restores the state of the generation of proposals returned by
+        :meth:`~BlockedProposer.get_state`.
+        """
+        (self.random_state.bit_generator.state,
+         self.nsamples_slow, self.nsamples_fast, cyclers_state) = state
+        for cycler, (loop_index, indices, R) in zip(self._cyclers(), cyclers_state):
+            cycler.loop_index = loop_index
+            if indices is not None:
+                cycler.indices = indices
+            if R is not None:
+                cycler.R = R
+
+    def _cyclers(self) -> list:
+        return [self.parameter_cycler, self.parameter_cycler_slow,
+                self.parameter_cycler_fast] + self.proposer
+
     def set_covariance(self, propose_matrix):
         """
         Take covariance of sampled parameters (propose_matrix), and construct orthonormal
@@ -69,6 +69,13 @@ and the products described below in the method
 It is recommended to run a couple of parallel MPI processes:
 it will finally pick the best among the results.
 
+The different starting points of each process can also be minimized concurrently by a
+pool of local processes, by setting ``processes: [N]`` (each of them initializes its own
+copy of the model). The best minimum found so far by any of them is shared, and if
+``discard_worse_by`` is set, minimizations that stall at a value of :math:`-\log(p)`
+worse than the best one so far by more than that amount are stopped early. This also
+applies when minimizing from the starting points sequentially (``processes: 1``).
+
 .. warning::
 
    Since Cobaya is often used on likelihoods featuring numerical noise (e.g. Cosmology),
@@ -81,6 +88,11 @@ it will finally pick the best among the results.
 
 # Global
 import os
+import sys
+import pickle
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from scipy import optimize
 from typing import Optional, Union
@@ -93,7 +105,8 @@ from itertools import chain
 from cobaya.sampler import Minimizer
 from cobaya.conventions import undo_chi2_name
 from cobaya.collection import OnePoint, SampleCollection
-from cobaya.log import LoggedError
+from cobaya.log import LoggedError, is_debug, logger_setup
+from cobaya.model import get_model
 from cobaya.tools import read_dnumber, recursive_update
 from cobaya.sampler import CovmatSampler
 from cobaya import mpi
@@ -125,6 +138,149 @@ _bobyqa_errors = {
         "singular linear system."}
 
 
+class _WorseMinimum(Exception):
+    """
+    Raised to stop a minimization converging to a worse minimum than the best so far.
+    """
+
+
+class _LocalIncumbent:
+    """
+    Best value of ``-logp`` found so far, with the interface of a
+    ``multiprocessing.Value``, when minimizing in a single process.
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+
+def get_logp(model, ignore_prior=False):
+    """
+    Returns the function to be maximized: the log-posterior, or the log-likelihood if
+    ``ignore_prior=True``.
+    """
+    method = model.loglike if ignore_prior else model.logpost
+    kwargs = {"make_finite": True}
+    if ignore_prior:
+        kwargs["return_derived"] = False
+    return lambda x: method(x, **kwargs)
+
+
+def minimize_from(logp, initial_point, scales, bounds, method, max_iter, override,
+                  log, incumbent=None, discard_worse_by=None):
+    """
+    Maximizes ``logp`` starting from ``initial_point``, in the affine-transformed space
+    in which the starting point is at the origin and the parameters are normalised by
+    ``scales``.
+
+    The best value of ``-logp`` found so far is shared by means of ``incumbent`` (a
+    ``multiprocessing.Value``, if given). If ``discard_worse_by`` is given, the
+    minimization is stopped early when it has stalled at a value worse than the best one
+    by more than that amount (every ``10 * (dim + 1)`` evaluations, it is stopped if
+    the value is worse by more than ``discard_worse_by``, and it improved by less than
+    a tenth of the difference since the last check).
+
+    Returns the raw result object, whether the minimization succeeded, and whether it
+    was stopped early (in that case, the result is ``None``).
+    """
+
+    def inv_affine_transform(x):
+        # fix up rounding errors on bounds to avoid -np.inf likelihoods
+        return np.clip(x * scales + initial_point, bounds[:, 0], bounds[:, 1])
+
+    check_every = 10 * (len(initial_point) + 1)
+    n_evals = 0
+    best = np.inf
+    best_last_check = np.inf
+
+    def minuslogp_transf(x):
+        nonlocal n_evals, best, best_last_check
+        minuslogp = -logp(inv_affine_transform(x))
+        n_evals += 1
+        best = min(best, minuslogp)
+        if incumbent is None:
+            return minuslogp
+        with incumbent.get_lock():
+            incumbent.value = min(incumbent.value, best)
+            best_so_far = incumbent.value
+        if discard_worse_by is not None and not n_evals % check_every:
+            gap = best - best_so_far
+            if gap > discard_worse_by and best_last_check - best < gap / 10:
+                raise _WorseMinimum()
+            best_last_check = best
+        return minuslogp
+
+    x0 = np.zeros(len(initial_point))
+    bounds_transf = (bounds - initial_point[:, None]) / scales[:, None]
+    try:
+        # Configure method
+        if method.lower() == "bobyqa":
+            kwargs = {
+                "objfun": minuslogp_transf,
+                "x0": x0,
+                "bounds": np.array(list(zip(*bounds_transf))),
+                "maxfun": max_iter,
+                "rhobeg": 1.,
+                "do_logging": is_debug(log)}
+            kwargs = recursive_update(kwargs, override or {})
+            log.debug("Arguments for pybobyqa.solve:\n%r",
+                      {k: v for k, v in kwargs.items() if k != "objfun"})
+            result = pybobyqa.solve(**kwargs)
+            success = result.flag == result.EXIT_SUCCESS
+            if not success:
+                log.error("Finished unsuccessfully. Reason: "
+                          + _bobyqa_errors[result.flag])
+        else:
+            kwargs = {
+                "fun": minuslogp_transf,
+                "x0": x0,
+                "bounds": bounds_transf,
+                "options": {
+                    "maxiter": max_iter,
+                    "disp": is_debug(log)}}
+            kwargs = recursive_update(kwargs, override or {})
+            log.debug("Arguments for scipy.optimize.Minimize:\n%r",
+                      {k: v for k, v in kwargs.items() if k != "fun"})
+            result = optimize.minimize(**kwargs)
+            success = result.success
+            if not success:
+                log.error("Finished unsuccessfully.")
+    except _WorseMinimum:
+        log.info("Stopped after %d evaluations: converging to a minimum worse than "
+                 "the best one so far by %g.", n_evals, best - incumbent.value)
+        return None, False, True
+    except:
+        log.error("Minimizer '%s' raised an unexpected error:", method)
+        raise
+    return result, success, False
+
+
+# Target of the process, when minimizing with a local pool of processes
+_process_logp = None
+_process_incumbent = None
+
+
+def _initialize_process(info_dump: bytes, ignore_prior, incumbent, debug=None):
+    global _process_logp, _process_incumbent
+    logger_setup(debug)
+    try:
+        import dill
+    except ImportError:
+        info = pickle.loads(info_dump)
+    else:
+        info = dill.loads(info_dump)
+    _process_logp = get_logp(get_model(info), ignore_prior)
+    _process_incumbent = incumbent
+
+
+def _minimize_in_process(*args, **kwargs):
+    return minimize_from(_process_logp, *args, incumbent=_process_incumbent, **kwargs)
+
+
 class Minimize(Minimizer, CovmatSampler):
     file_base_name = 'minimize'
 
@@ -135,6 +291,8 @@ class Minimize(Minimizer, CovmatSampler):
     override_bobyqa: Optional[dict]
     override_scipy: Optional[dict]
     max_evals: Union[str, int]
+    processes: int
+    discard_worse_by: Optional[float]
 
     def initialize(self):
         if self.method not in evals_attr:
@@ -144,11 +302,7 @@ class Minimize(Minimizer, CovmatSampler):
         self.mpi_info("Initializing")
         self.max_iter = int(read_dnumber(self.max_evals, self.model.prior.d()))
         # Configure target
-        method = self.model.loglike if self.ignore_prior else self.model.logpost
-        kwargs = {"make_finite": True}
-        if self.ignore_prior:
-            kwargs["return_derived"] = False
-        self.logp = lambda x: method(x, **kwargs)
+        self.logp = get_logp(self.model, self.ignore_prior)
 
         # Try to load info from previous samples.
         # If none, sample from reference (make sure that it has finite like/post)
@@ -228,63 +382,46 @@ class Minimize(Minimizer, CovmatSampler):
         """
         Runs `scipy.Minimize`
         """
-        results = []
-        successes = []
-
-        def minuslogp_transf(x):
-            return -self.logp(self.inv_affine_transform(x))
-
-        for i, initial_point in enumerate(self.initial_points):
-
-            self.log.debug("Starting minimization for starting point %s.", i)
-
-            self._affine_transform_baseline = initial_point
-            initial_point = self.affine_transform(initial_point)
-            np.testing.assert_allclose(initial_point, np.zeros(initial_point.shape))
-            bounds = np.array(
-                [self.affine_transform(self._bounds[:, i]) for i in range(2)]).T
-
+        use_pool = self.processes > 1 and len(self.initial_points) > 1
+        if use_pool and sys.version_info < (3, 7):
+            self.log.warning("A pool of local processes needs Python 3.7 or later. "
+                             "Minimizing from the starting points sequentially.")
+            use_pool = False
+        # Best -log(p) found so far, shared between starting points
+        incumbent = (multiprocessing.get_context("spawn").Value("d", np.inf) if use_pool
+                     else _LocalIncumbent(np.inf))
+        kwargs = {"scales": self._scales, "bounds": self._bounds,
+                  "method": self.method, "max_iter": self.max_iter,
+                  "override": (self.override_bobyqa if self.method.lower() == "bobyqa"
+                               else self.override_scipy),
+                  "log": self.log, "discard_worse_by": self.discard_worse_by}
+        if use_pool:
+            self.log.info("Starting a pool of %d processes.", self.processes)
             try:
-                # Configure method
-                if self.method.lower() == "bobyqa":
-                    self.kwargs = {
-                        "objfun": minuslogp_transf,
-                        "x0": initial_point,
-                        "bounds": np.array(list(zip(*bounds))),
-                        "maxfun": self.max_iter,
-                        "rhobeg": 1.,
-                        "do_logging": self.is_debug()}
-                    self.kwargs = recursive_update(self.kwargs,
-                                                   self.override_bobyqa or {})
-                    self.log.debug("Arguments for pybobyqa.solve:\n%r",
-                                   {k: v for k, v in self.kwargs.items() if
-                                    k != "objfun"})
-                    result = pybobyqa.solve(**self.kwargs)
-                    success = result.flag == result.EXIT_SUCCESS
-                    if not success:
-                        self.log.error("Finished unsuccessfully. Reason: "
-                                       + _bobyqa_errors[result.flag])
-                else:
-                    self.kwargs = {
-                        "fun": minuslogp_transf,
-                        "x0": initial_point,
-                        "bounds": bounds,
-                        "options": {
-                            "maxiter": self.max_iter,
-                            "disp": self.is_debug()}}
-                    self.kwargs = recursive_update(self.kwargs, self.override_scipy or {})
-                    self.log.debug("Arguments for scipy.optimize.Minimize:\n%r",
-                                   {k: v for k, v in self.kwargs.items() if k != "fun"})
-                    result = optimize.minimize(**self.kwargs)
-                    success = result.success
-                    if not success:
-                        self.log.error("Finished unsuccessfully.")
-            except:
-                self.log.error("Minimizer '%s' raised an unexpected error:", self.method)
-                raise
-            results += [result]
-            successes += [success]
-
+                import dill
+            except ImportError:
+                info_dump = pickle.dumps(self.model.info())
+            else:
+                info_dump = dill.dumps(self.model.info())
+            with ProcessPoolExecutor(
+                    max_workers=min(self.processes, len(self.initial_points)),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialize_process,
+                    initargs=(info_dump, self.ignore_prior, incumbent,
+                              self.is_debug())) as pool:
+                futures = [pool.submit(_minimize_in_process, initial_point, **kwargs)
+                           for initial_point in self.initial_points]
+                outcomes = [future.result() for future in futures]
+        else:
+            outcomes = []
+            for i, initial_point in enumerate(self.initial_points):
+                self.log.debug("Starting minimization for starting point %s.", i)
+                outcomes.append(minimize_from(self.logp, initial_point,
+                                              incumbent=incumbent, **kwargs))
+        results, successes, stopped = (list(x) for x in zip(*outcomes))
+        if any(stopped):
+            self.log.info("%d minimizations stopped early (converging to worse minima)",
+                          sum(stopped))
         self.process_results(*mpi.zip_gather(
             [results, successes, self.initial_points,
              [self._inv_affine_transform_matrix] * len(self.initial_points)]))
@@ -318,11 +455,13 @@ class Minimize(Minimizer, CovmatSampler):
             raise LoggedError(
                 self.log, "Minimization failed! Here is the raw result object:\n%s",
                 str(self.result))
-        elif not all(successes):
+        # (results of minimizations stopped early are None, and not failures)
+        elif not all(s for r, s in zip(results, successes) if r is not None):
             self.log.warning('Some minimizations failed!')
         elif len(results) > 1:
             self.log.info('Finished successfully!')
             # noinspection PyUnboundLocalVariable
+            mins = [m for r, m in zip(results, mins) if r is not None]
             if max(mins) - min(mins) > 1:
                 self.log.warning('Big spread in minima: %r', mins)
             elif max(mins) - min(mins) > 0.2:
@@ -452,10 +452,10 @@ class classy(BoltzmannBase):
         return cls
 
     def get_Cl(self, ell_factor=False, units="FIRASmuK2"):
-        return self._get_Cl(ell_factor=ell_factor, units=units, lensed=True)
+        return self._get_Cl_views(ell_factor=ell_factor, units=units, lensed=True)
 
     def get_unlensed_Cl(self, ell_factor=False, units="FIRASmuK2"):
-        return self._get_Cl(ell_factor=ell_factor, units=units, lensed=False)
+        return self._get_Cl_views(ell_factor=ell_factor, units=units, lensed=False)
 
     def _get_z_dependent(self, quantity, z):
         try:
@@ -1 +1,2 @@
-from .boltzmannbase import BoltzmannBase, PowerSpectrumInterpolator
+from .boltzmannbase import BoltzmannBase, PowerSpectrumInterpolator, \
+    PowerSpectrumEvaluator
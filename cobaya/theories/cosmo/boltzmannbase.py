@@ -8,6 +8,7 @@
 """
 import numpy as np
 from scipy.interpolate import RectBivariateSpline
+from scipy.sparse import csr_matrix
 from typing import Mapping, Iterable, Callable
 
 # Local
@@ -243,6 +244,23 @@ class BoltzmannBase(Theory):
             raise LoggedError(self.log, "Units '%s' not recognized. Use one of %s.",
                               units, list(units_factors))
 
+    def _get_Cl_views(self, ell_factor=False, units="FIRASmuK2", lensed=True):
+        """
+        Returns the CMB power spectra computed by ``_get_Cl``, as read-only arrays.
+
+        The conversion is done once per state and combination of arguments, and re-used
+        in subsequent calls (e.g. by different likelihoods, or at fast-parameter steps).
+        """
+        key = ("Cl", bool(lensed), bool(ell_factor), units)
+        cls = self.current_state.get(key)
+        if cls is None:
+            cls = self._get_Cl(ell_factor=ell_factor, units=units, lensed=lensed)
+            for cl in cls.values():
+                cl.flags.writeable = False
+            self.current_state[key] = cls
+        # new dict, so that adding spectra to it does not modify the stored one
+        return dict(cls)
+
     @abstract
     def get_Cl(self, ell_factor=False, units="FIRASmuK2"):
         r"""
@@ -259,6 +277,9 @@ class BoltzmannBase(Theory):
         If ``ell_factor=True`` (default: ``False``), multiplies the spectra by
         :math:`\ell(\ell+1)/(2\pi)` (or by :math:`\ell^2(\ell+1)^2/(2\pi)` in the case of
         the lensing potential ``pp`` spectrum).
+
+        The spectra are returned as read-only arrays shared by all callers for the
+        current state: copy them before modifying them in place.
         """
 
     @abstract
@@ -270,6 +291,9 @@ class BoltzmannBase(Theory):
 
         If ``ell_factor=True`` (default: ``False``), multiplies the spectra by
         :math:`\ell(\ell+1)/(2\pi)`.
+
+        As for :func:`~BoltzmannBase.get_Cl`, the spectra are returned as read-only
+        arrays.
         """
 
     def get_Hubble(self, z, units="km/s/Mpc"):
@@ -510,3 +534,134 @@ class PowerSpectrumInterpolator(RectBivariateSpline):
             return self(z, np.log(k), grid=grid)
         else:
             return np.log(self(z, np.log(k), grid=grid))
+
+
+def _bspline_basis(x, t, k):
+    """
+    Values at ``x`` (rows) of the ``k + 1`` B-splines of degree ``k`` and knots ``t``
+    that are non-zero there, and the index of the first of them.
+
+    Points outside the base interval are moved to its closest end, as FITPACK does.
+    """
+    x = np.clip(x, t[k], t[-k - 1])
+    i = np.clip(np.searchsorted(t, x, side="right") - 1, k, len(t) - k - 2)
+    basis = np.zeros((len(x), k + 1))
+    basis[:, 0] = 1
+    left = np.empty((k + 1, len(x)))
+    right = np.empty((k + 1, len(x)))
+    # Cox-de Boor recursion, for all points at once
+    for j in range(1, k + 1):
+        left[j] = x - t[i + 1 - j]
+        right[j] = t[i + j] - x
+        saved = 0
+        for r in range(j):
+            temp = basis[:, r] / (right[r + 1] + left[j - r])
+            basis[:, r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        basis[:, j] = saved
+    return i - k, basis
+
+
+class PowerSpectrumEvaluator:
+    r"""
+    Evaluates :class:`PowerSpectrumInterpolator` instances at a fixed set of points,
+    re-using the B-spline basis of the interpolators at those points, so that only the
+    (linear) combination with the spline coefficients of each new interpolator is
+    computed.
+
+    The points are the pairs of broadcast ``z`` and ``k`` values (as for
+    ``grid=False`` in :meth:`PowerSpectrumInterpolator.P`; for a grid, pass
+    ``z[:, None]`` and ``k[None, :]``). If ``k`` is not given, only the redshifts are
+    fixed, and the wavenumbers are passed at evaluation time.
+
+    The basis is computed for the knots of the first interpolator evaluated, and
+    recomputed only when evaluating interpolators with different knots, i.e. sampled at
+    different :math:`(z, k)`.
+
+    :param z: values of z at which the power spectra will be evaluated.
+    :param k: values of k (in :math:`1/\mathrm{Mpc}`) at which the power spectra will be
+        evaluated (optional).
+    """
+
+    def __init__(self, z, k=None):
+        self.z = np.atleast_1d(z)
+        self.k = None if k is None else np.atleast_1d(k)
+        self._knots = None
+
+    def _set_knots(self, knots, degrees):
+        self._knots = knots
+        self._degrees = degrees
+        self._n_coeffs = tuple(len(t) - d - 1 for t, d in zip(knots, degrees))
+        self._z_first, self._z_basis = _bspline_basis(
+            self.z.ravel(), knots[0], degrees[0])
+        if self.k is None:
+            return
+        shape = np.broadcast(self.z, self.k).shape
+        i_z = np.broadcast_to(np.arange(self.z.size).reshape(self.z.shape), shape).ravel()
+        k_first, k_basis = _bspline_basis(
+            np.log(np.broadcast_to(self.k, shape).ravel()), knots[1], degrees[1])
+        z_indices = self._z_first[i_z, None] + np.arange(degrees[0] + 1)
+        k_indices = k_first[:, None] + np.arange(degrees[1] + 1)
+        indices = (z_indices[:, :, None] * self._n_coeffs[1] + k_indices[:, None, :])
+        weights = self._z_basis[i_z, :, None] * k_basis[:, None, :]
+        n_row = weights[0].size
+        self._shape = shape
+        self._operator = csr_matrix(
+            (weights.ravel(), indices.ravel(), np.arange(0, n_row * len(i_z) + 1, n_row)),
+            shape=(len(i_z), np.prod(self._n_coeffs)))
+
+    def _values(self, interpolators, k):
+        knots = interpolators[0].get_knots()
+        if any(any(not np.array_equal(t, t0) for t, t0 in zip(interp.get_knots(), knots))
+               for interp in interpolators[1:]):
+            return np.array([self._values([interp], k)[0] for interp in interpolators])
+        if self._knots is None or \
+                any(not np.array_equal(t, t0) for t, t0 in zip(knots, self._knots)):
+            self._set_knots(knots, interpolators[0].degrees)
+        coeffs = np.array([interp.get_coeffs() for interp in interpolators])
+        if k is None:
+            if self.k is None:
+                raise ValueError("No fixed k's: they must be passed at evaluation.")
+            return (self._operator.dot(coeffs.T)).T.reshape((-1,) + self._shape)
+        # fixed z: reduce to splines in log(k), one per redshift
+        coeffs = coeffs.reshape((len(interpolators),) + self._n_coeffs)
+        z_coeffs = np.einsum(
+            "zr,mzrk->mzk", self._z_basis,
+            coeffs[:, self._z_first[:, None] + np.arange(self._degrees[0] + 1)])
+        shape = np.broadcast(self.z, k).shape
+        i_z = np.broadcast_to(np.arange(self.z.size).reshape(self.z.shape), shape).ravel()
+        k_first, k_basis = _bspline_basis(
+            np.log(np.broadcast_to(k, shape).ravel()), self._knots[1], self._degrees[1])
+        values = np.einsum("mnr,nr->mn", z_coeffs[
+            :, i_z[:, None], k_first[:, None] + np.arange(self._degrees[1] + 1)], k_basis)
+        return values.reshape((-1,) + shape)
+
+    def logP(self, interpolators, k=None):
+        """
+        Get the log power spectra (see :meth:`PowerSpectrumInterpolator.logP`) of the
+        given interpolator, or list of interpolators (then stacked along the first axis),
+        at the fixed redshifts and the fixed or given ``k``.
+        """
+        single = isinstance(interpolators, PowerSpectrumInterpolator)
+        if single:
+            interpolators = [interpolators]
+        values = self._values(interpolators, k)
+        for i, interp in enumerate(interpolators):
+            if not interp.islog:
+                values[i] = np.log(values[i])
+        return values[0] if single else values
+
+    def P(self, interpolators, k=None):
+        """
+        Get the power spectra of the given interpolator, or list of interpolators (then
+        stacked along the first axis), at the fixed redshifts and the fixed or given
+        ``k``.
+        """
+        single = isinstance(interpolators, PowerSpectrumInterpolator)
+        if single:
+            interpolators = [interpolators]
+        values = self._values(interpolators, k)
+        for i, interp in enumerate(interpolators):
+            if interp.islog:
+                values[i] = interp.logsign * np.exp(values[i])
+        return values[0] if single else values
@@ -30,8 +30,10 @@ see :doc:`theories_and_dependencies`.
 
 """
 
-from collections import deque
-from typing import Sequence, Optional, Union, Tuple, Dict, Iterable, Set, Any, List
+from collections import OrderedDict
+import numpy as np
+from typing import Sequence, Optional, Union, Tuple, Dict, Iterable, Set, Any, List, \
+    Mapping
 # Local
 from cobaya.typing import TheoryDictIn, TheoriesDict, InfoDict, ParamValuesDict, \
     ParamsDict, empty_dict, unset_params
@@ -39,6 +41,73 @@ from cobaya.component import CobayaComponent, ComponentCollection
 from cobaya.tools import get_resolved_class, str_to_list
 from cobaya.log import LoggedError, always_stop_exceptions
 from cobaya.tools import get_class_methods
+from cobaya.persistent_cache import PersistentCache
+from cobaya import tracing
+
+
+class StateCache:
+    """
+    Least-recently-used cache of computed states, indexed by the values of the input
+    parameters and of the parameters of the dependencies of a component.
+
+    Keeps count of hits, misses and evictions.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._states: 'OrderedDict[tuple, Dict]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(params_values_dict, dependency_params) -> tuple:
+        return (tuple(params_values_dict.items()),
+                None if dependency_params is None else tuple(dependency_params))
+
+    def get(self, key: tuple, want_derived=False) -> Optional[Dict]:
+        """
+        Returns the state cached with this key, or None if not cached (or if derived
+        parameters are wanted but were not computed for the cached state).
+        """
+        try:
+            state = self._states[key]
+        except (KeyError, TypeError):  # not cached or unhashable values
+            self.misses += 1
+            return None
+        if want_derived and state["derived"] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._states.move_to_end(key, last=False)
+        return state
+
+    def add(self, key: tuple, state: Dict):
+        """
+        Puts the state in the cache as the most recently used one, evicting the least
+        recently used one if the cache is full.
+        """
+        try:
+            self._states[key] = state
+        except TypeError:  # unhashable values: cannot be cached
+            return
+        self._states.move_to_end(key, last=False)
+        if len(self._states) > self.size:
+            self._states.popitem(last=True)
+            self.evictions += 1
+
+    def clear(self):
+        self._states.clear()
+
+    def stats(self) -> InfoDict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "cached": len(self._states), "size": self.size}
+
+    def __len__(self):
+        return len(self._states)
+
+    def __iter__(self):
+        return iter(self._states.values())
 
 
 class Theory(CobayaComponent):
@@ -47,14 +116,20 @@ class Theory(CobayaComponent):
     speed: float = -1
     stop_at_error: bool = False
     version: Optional[Union[dict, str]] = None
+    persistent_cache: Union[None, bool, str, InfoDict] = None
     params: ParamsDict
 
+    _at_resume_prefer_new = CobayaComponent._at_resume_prefer_new + [
+        "persistent_cache"]
+    # category of the computations of this component in traces (see tracing module)
+    _trace_category = "theory"
+
     # special components set by the dependency resolver;
     # (for Theory included in updated yaml but not in defaults)
     input_params: Sequence[str] = unset_params
     output_params: Sequence[str] = unset_params
 
-    _states: deque
+    _states: StateCache
 
     def __init__(self, info: TheoryDictIn = empty_dict,
                  name: Optional[str] = None, timing: Optional[bool] = None,
@@ -62,6 +137,7 @@ class Theory(CobayaComponent):
                  initialize=True, standalone=True):
 
         self._measured_speed = None
+        self._persistent_cache: Optional[PersistentCache] = None
         super().__init__(info, name=name, timing=timing,
                          packages_path=packages_path, initialize=initialize,
                          standalone=standalone)
@@ -219,7 +295,59 @@ class Theory(CobayaComponent):
         """
         Set how many states to cache
         """
-        self._states = deque(maxlen=n)
+        self._states = StateCache(n)
+
+    def get_cache_stats(self) -> InfoDict:
+        """
+        Get the statistics of the cache of computed states: number of ``hits``,
+        ``misses`` and ``evictions``, and number of states ``cached`` out of the
+        maximum ``size``.
+
+        :return: dictionary of cache statistics
+        """
+        return self._states.stats()
+
+    def set_persistent_cache(self, signature: str):
+        """
+        Opens the on-disk cache of computed states, if enabled with the
+        ``persistent_cache`` option, for the computation identified by ``signature``
+        (a hash of everything but the parameter values that determines the results, see
+        :meth:`~model.Model.get_component_signature`).
+
+        The option can be ``True`` (use the default cache folder), a path to a folder or
+        database file, or a dictionary with ``path`` and ``max_size_mb`` keys.
+        """
+        self.close_persistent_cache()
+        if not self.persistent_cache:
+            return
+        options = self.persistent_cache
+        if isinstance(options, str):
+            options = {"path": options}
+        elif not isinstance(options, Mapping):
+            options = {}
+        unknown = set(options).difference({"path", "max_size_mb"})
+        if unknown:
+            raise LoggedError(
+                self.log, "Unknown options for 'persistent_cache': %r. "
+                          "Valid ones are 'path' and 'max_size_mb'.", unknown)
+        try:
+            self._persistent_cache = PersistentCache(self.get_name(), signature,
+                                                     **options)
+        except OSError as excpt:
+            raise LoggedError(
+                self.log, "Could not open persistent cache: %r", excpt)
+
+    def close_persistent_cache(self):
+        """
+        Closes the on-disk cache of computed states, if open.
+        """
+        if self._persistent_cache is not None:
+            self._persistent_cache.close()
+        self._persistent_cache = None
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        super().__exit__(exception_type, exception_value, traceback)
+        self.close_persistent_cache()
 
     def check_cache_and_compute(self, params_values_dict,
                                 dependency_params=None, want_derived=False, cached=True):
@@ -238,15 +366,13 @@ class Theory(CobayaComponent):
                     self.provider.get_param(self._input_params_extra)))
         self.log.debug("Got parameters %r", params_values_dict)
         state = None
+        key = self._states.get_key(params_values_dict, dependency_params)
         if cached:
-            for _state in self._states:
-                if _state["params"] == params_values_dict and \
-                        _state["dependency_params"] == dependency_params \
-                        and (not want_derived or _state["derived"] is not None):
-                    state = _state
-                    self.log.debug("Re-using computed results")
-                    self._states.remove(_state)
-                    break
+            state = self._states.get(key, want_derived)
+            if state:
+                self.log.debug("Re-using computed results")
+            elif self._persistent_cache is not None:
+                state = self._persistent_cache.get(key, want_derived)
         if not state:
             self.log.debug("Computing new state")
             state = {"params": params_values_dict,
@@ -254,27 +380,130 @@ class Theory(CobayaComponent):
                      "derived": {} if want_derived else None}
             if self.timer:
                 self.timer.start()
+            with tracing.span(self.get_name(), self._trace_category):
+                try:
+                    success = self.calculate(state, want_derived,
+                                             **params_values_dict) is not False
+                except always_stop_exceptions:
+                    raise
+                except Exception as excpt:
+                    if self.stop_at_error:
+                        self.log.error(
+                            "Error at evaluation. See error information below.")
+                        raise
+                    else:
+                        self.log.debug(
+                            "Ignored error at evaluation and assigned 0 likelihood "
+                            "(set 'stop_at_error: True' as an option for this component "
+                            "to stop here and print a traceback). Error message: %r",
+                            excpt)
+                        success = False
+            if not success:
+                if self.timer:
+                    self.timer.increment_failed()
+                return False
+            if self.timer:
+                self.timer.increment(self.log)
+            if self._persistent_cache is not None:
+                self._persistent_cache.add(key, state)
+        # make this state the current one
+        self._states.add(key, state)
+        self._current_state = state
+        return True
+
+    def calculate_batch(self, states, want_derived=True, **params_values_arrays):
+        """
+        Optional vectorized version of :meth:`Theory.calculate`, used by
+        :meth:`~model.Model.logposterior_batch` to compute many points at once.
+
+        Takes a list of state dictionaries (one per point) to store the results into,
+        and the parameter values as arrays with one element per point.
+
+        It is only used for components that neither depend on other components nor
+        compute requirements for them. Not implemented by default.
+
+        :param states: list of dictionaries to store results, one per point
+        :param want_derived: whether to set state['derived'] derived parameters
+        :param params_values_arrays: parameter values, as arrays
+        :return: None or True if success, False if failed for all points, or an array
+                 of booleans flagging the successful points
+        """
+        raise NotImplementedError
+
+    def can_calculate_batch(self) -> bool:
+        """
+        Whether this component implements :meth:`Theory.calculate_batch`.
+        """
+        return type(self).calculate_batch is not Theory.calculate_batch
+
+    def check_cache_and_compute_batch(self, params_values_dicts, dependency_params=None,
+                                      want_derived=False, cached=True) \
+            -> List[Optional[Dict]]:
+        """
+        Batch version of :meth:`Theory.check_cache_and_compute`, for components
+        implementing :meth:`Theory.calculate_batch`.
+
+        Takes a list of dictionaries of parameter values (and optionally one list of
+        dependency parameter values per point), computes in a single call the states
+        that are not already cached, and returns the list of states, with ``None`` for
+        the points whose calculation failed.
+        """
+        n_points = len(params_values_dicts)
+        if dependency_params is None:
+            dependency_params = [None] * n_points
+        states: List[Optional[Dict]] = [None] * n_points
+        keys = [self._states.get_key(params_values_dict, depend_list)
+                for params_values_dict, depend_list
+                in zip(params_values_dicts, dependency_params)]
+        new_states = []
+        for i, (params_values_dict, depend_list) in enumerate(
+                zip(params_values_dicts, dependency_params)):
+            state = None
+            if cached:
+                state = self._states.get(keys[i], want_derived)
+                if not state and self._persistent_cache is not None:
+                    state = self._persistent_cache.get(keys[i], want_derived)
+            if not state:
+                state = {"params": params_values_dict,
+                         "dependency_params": depend_list,
+                         "derived": {} if want_derived else None}
+                new_states.append((i, state))
+            states[i] = state
+        if new_states:
+            self.log.debug("Computing %d new states", len(new_states))
+            params_values_arrays = {
+                p: np.array([state["params"][p] for _, state in new_states])
+                for p in params_values_dicts[0]}
             try:
-                if self.calculate(state, want_derived, **params_values_dict) is False:
-                    return False
+                success = self.calculate_batch([state for _, state in new_states],
+                                               want_derived, **params_values_arrays)
             except always_stop_exceptions:
                 raise
             except Exception as excpt:
                 if self.stop_at_error:
                     self.log.error("Error at evaluation. See error information below.")
                     raise
-                else:
-                    self.log.debug(
-                        "Ignored error at evaluation and assigned 0 likelihood "
-                        "(set 'stop_at_error: True' as an option for this component "
-                        "to stop here and print a traceback). Error message: %r", excpt)
-                    return False
-            if self.timer:
-                self.timer.increment(self.log)
-        # make this state the current one
-        self._states.appendleft(state)
-        self._current_state = state
-        return True
+                self.log.debug(
+                    "Ignored error at evaluation and assigned 0 likelihood "
+                    "(set 'stop_at_error: True' as an option for this component "
+                    "to stop here and print a traceback). Error message: %r", excpt)
+                success = False
+            if success is not None and success is not True:
+                success = np.broadcast_to(np.asarray(success, dtype=bool),
+                                          len(new_states))
+                for (i, _), point_success in zip(new_states, success):
+                    if not point_success:
+                        states[i] = None
+            if self._persistent_cache is not None:
+                for i, _ in new_states:
+                    if states[i]:
+                        self._persistent_cache.add(keys[i], states[i])
+        # put the computed states in the cache, making the last one the current one
+        for key, state in zip(keys, states):
+            if state:
+                self._states.add(key, state)
+                self._current_state = state
+        return states
 
     @property
     def current_state(self) -> Dict:
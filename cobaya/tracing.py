@@ -0,0 +1,124 @@
+"""
+.. module:: tracing
+
+:Synopsis: Timeline of the evaluation of the posterior, in Chrome-trace format
+
+Records the time spent in the different phases of a run (proposal of new points by the
+sampler, evaluation of the prior, theory codes and likelihoods, writing of the samples
+to disk, convergence checks...) as a timeline in the Chrome-trace JSON format, that can
+be inspected with e.g. ``chrome://tracing`` or https://ui.perfetto.dev.
+
+Tracing is off by default, and then :func:`span` does nothing. To bound the memory used in
+long runs, only the most recent events are kept (see :class:`Tracer`).
+
+"""
+
+# Global
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Deque
+
+# Local
+from cobaya import mpi
+
+_tracer: Optional['Tracer'] = None
+
+# Max number of events kept per process (the oldest ones are discarded)
+default_max_events = 200000
+
+
+class _NoSpan:
+    # does nothing when tracing is off (contextlib.nullcontext needs Python 3.7)
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_no_span = _NoSpan()
+
+
+class Tracer:
+    """
+    Records a list of events, one per traced span of time (with the name, category and
+    duration of the span), tagged with the MPI rank and the thread that produced them.
+
+    Only the last ``max_events`` events are kept.
+    """
+
+    def __init__(self, max_events: int = default_max_events):
+        self.events: Deque[dict] = deque(maxlen=max_events)
+        self._pid = mpi.rank()
+        # wall-clock origin, so that timelines of different MPI processes can be merged
+        self._origin = time.time() - time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            # deque.append is thread-safe: components may be computed in threads
+            self.events.append(
+                {"name": name, "cat": category, "ph": "X",
+                 "ts": 1e6 * (self._origin + start), "dur": 1e6 * (end - start),
+                 "pid": self._pid, "tid": threading.get_ident(), "args": args})
+
+    def dump(self, filename: str, gather: bool = True):
+        """
+        Writes the recorded events to a file in Chrome-trace JSON format.
+
+        If running with MPI and ``gather=True`` (default), the events of all processes
+        are written by the main process in a single file. Otherwise, each process writes
+        its own file, with its rank appended to the file name (before the extension).
+        """
+        events = list(self.events)
+        if mpi.more_than_one_process():
+            if gather:
+                all_events = mpi.gather(events)
+                if not mpi.is_main_process():
+                    return
+                events = [event for process_events in all_events
+                          for event in process_events]
+            else:
+                filename = ("%s.%d" % (os.path.splitext(filename)[0], mpi.rank()) +
+                            os.path.splitext(filename)[1])
+        with open(filename, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+
+def start_tracing(max_events: int = default_max_events) -> Tracer:
+    """
+    Starts recording spans of time (keeping the last ``max_events`` of them), and
+    returns the :class:`Tracer` recording them.
+    """
+    global _tracer
+    _tracer = Tracer(max_events)
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """
+    Stops recording spans of time, and returns the :class:`Tracer` that recorded them,
+    if tracing was on.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name: str, category: str, **args):
+    """
+    Context manager recording the time spent inside it as an event with the given name,
+    category and arguments, if tracing is on (see :func:`start_tracing`).
+    """
+    if _tracer is None:
+        return _no_span
+    return _tracer.span(name, category, **args)
@@ -86,9 +86,11 @@ if sys.version_info >= (3, 8):
         add: Optional[ModelDict]
         remove: Union[None, ModelDict, Dict[str, Union[str, Sequence[str]]]]
         output: Optional[str]
+        output_format: Optional[str]
         suffix: Optional[str]
         skip: Union[None, float, int]
         thin: Optional[int]
+        processes: Optional[int]
         packages_path: Optional[str]
 
 
@@ -102,8 +104,11 @@ if sys.version_info >= (3, 8):
         stop_at_error: bool
         test: bool
         timing: bool
+        component_threads: Optional[int]
+        trace: Optional[str]
         packages_path: Optional[str]
         output: Optional[str]
+        output_format: Optional[str]
         version: Optional[Union[str, InfoDict]]
 
 else:
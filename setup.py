@@ -73,6 +73,7 @@ setup(
             'cobaya-run=cobaya.run:run_script',
             'cobaya-doc=cobaya.doc:doc_script',
             'cobaya-bib=cobaya.bib:bib_script',
+            'cobaya-bench=cobaya.bench:bench_script',
             'cobaya-grid-create=cobaya.grid_tools:make_grid_script',
             'cobaya-grid-run=cobaya.grid_tools.runbatch:run',
             'cobaya-run-job=cobaya.grid_tools.runMPI:run_single',
@@ -0,0 +1,65 @@
+"""
+Tests the evaluation of the BAO theory vector (each theory quantity fetched once for all
+redshifts) with a stub provider, comparing it with the prediction for each data point.
+"""
+
+# Global
+import numpy as np
+import pytest
+# Local
+from cobaya.likelihoods.base_classes import BAO
+
+observables = ["DV_over_rs", "rs_over_DV", "DM_over_rs", "DA_over_rs", "DH_over_rs",
+               "Hz_rs", "f_sigma8", "F_AP"]
+
+
+class Provider:
+
+    def __init__(self, rdrag=None):
+        self.rdrag = rdrag
+        self.calls = []
+
+    def get_angular_diameter_distance(self, z):
+        self.calls.append("angular_diameter_distance")
+        return 1000 * np.arctan(z) + 10 * z ** 2
+
+    def get_Hubble(self, z, units="km/s/Mpc"):
+        assert units == "km/s/Mpc"
+        self.calls.append("Hubble")
+        return 68 * np.sqrt(0.3 * (1 + np.asarray(z)) ** 3 + 0.7)
+
+    def get_fsigma8(self, z):
+        self.calls.append("fsigma8")
+        return 0.5 - 0.1 * np.asarray(z)
+
+    def get_param(self, p):
+        assert p == "rdrag"
+        if self.rdrag is None:
+            raise AssertionError("rdrag requested, but not needed")
+        return self.rdrag
+
+
+def bao_likelihood(tmpdir, data, rdrag):
+    like = BAO({"data": data, "path": str(tmpdir), "rs_fid": 147.})
+    like.provider = Provider(rdrag)
+    return like
+
+
+@pytest.mark.parametrize("with_rdrag", [True, False])
+def test_bao_theory_vector(tmpdir, with_rdrag):
+    used = observables if with_rdrag else ["f_sigma8", "F_AP"]
+    # repeated redshifts, within and across observables, in no particular order
+    zs = [0.38, 0.51, 0.38, 1.48, 0.51, 2.33, 0.15]
+    data = [[z, 1., 0.1, "bao_" + used[(i + j) % len(used)]]
+            for j, z in enumerate(zs) for i in range(2)]
+    like = bao_likelihood(tmpdir, data, 150. if with_rdrag else None)
+    theory = like.theory_vector()
+    expected = [like.theory_fun(z, obs)
+                for z, obs in zip(like.data["z"], like.data["observable"])]
+    assert np.allclose(theory, expected, rtol=1e-13, atol=0)
+    assert set(like.data["observable"]) == set(used)
+    # the theory is called once per quantity
+    like.provider.calls = []
+    like.theory_vector()
+    assert sorted(like.provider.calls) == sorted(set(like.provider.calls))
+    assert np.isfinite(like.logp())
@@ -0,0 +1,35 @@
+"""
+Tests the benchmark suite and the comparison with baselines.
+"""
+
+import json
+import os
+import pytest
+
+from cobaya.bench import run_benchmarks, compare, bench_script
+from cobaya.log import LoggedError
+
+
+def test_bench(tmpdir):
+    results = run_benchmarks(["collection"], quick=True)
+    assert results["quick"]
+    assert results["results"]["collection_add_per_s"] > 0
+    baseline = {"results": {"collection_add_per_s":
+                                2 * results["results"]["collection_add_per_s"],
+                            "get_model_s": 1}}
+    results["results"]["get_model_s"] = 1.1
+    regressions = compare(results, baseline, tolerance=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("collection_add_per_s")
+    with pytest.raises(LoggedError):
+        run_benchmarks(["nonexistent"])
+    # script: saves results, and fails when compared with a much better baseline
+    output = os.path.join(tmpdir, "results.json")
+    bench_script(["collection", "--quick", "--output", output])
+    with open(output, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert set(saved["results"]) == {"collection_add_per_s"}
+    saved["results"]["collection_add_per_s"] *= 100
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    with pytest.raises(SystemExit):
+        bench_script(["collection", "--quick", "--baseline", output])
@@ -0,0 +1,52 @@
+"""
+Tests the conversion of the CMB power spectra of the Boltzmann codes once per theory
+state (and combination of arguments), with the spectra returned as read-only arrays.
+"""
+
+# Global
+import numpy as np
+import pytest
+# Local
+from cobaya.theories.camb import CAMB
+from cobaya.theories.classy import classy
+
+
+def fake_get_Cl(theory, calls):
+    # conversion of the raw spectra of the current state, counting the calls
+    def _get_Cl(ell_factor=False, units="FIRASmuK2", lensed=True):
+        calls.append((ell_factor, units, lensed))
+        factor = ((1 + ell_factor) * (2 if units == "muK2" else 1) *
+                  (1 if lensed else 0.5))
+        return {cl: factor * raw.copy() for cl, raw in theory.current_state["raw"].items()}
+
+    return _get_Cl
+
+
+@pytest.mark.parametrize("theory_class", [CAMB, classy])
+def test_boltzmann_cl_views(theory_class):
+    theory = theory_class.__new__(theory_class)
+    calls = []
+    theory._get_Cl = fake_get_Cl(theory, calls)
+    theory._current_state = {"raw": {"tt": np.arange(10.), "ee": np.ones(10)}}
+    cls = theory.get_Cl(ell_factor=True)
+    # repeated calls in the same state return the same arrays, converted once
+    again = theory.get_Cl(ell_factor=True)
+    assert again is not cls and all(again[cl] is cls[cl] for cl in cls)
+    assert len(calls) == 1
+    # different arguments do not collide
+    others = [theory.get_Cl(), theory.get_Cl(units="muK2"),
+              theory.get_unlensed_Cl(ell_factor=True)]
+    assert len(calls) == 4
+    for factor, other in zip([0.5, 1, 0.5], others):
+        assert np.array_equal(other["tt"], factor * cls["tt"])
+    # the arrays are read-only, and adding to the returned dict does not modify them
+    with pytest.raises(ValueError):
+        cls["tt"][2] = 0
+    cls["bb"] = np.zeros(10)
+    assert "bb" not in theory.get_Cl(ell_factor=True)
+    assert len(calls) == 4
+    # a new state recomputes the spectra
+    theory._current_state = {"raw": {"tt": 2 * np.arange(10.), "ee": np.ones(10)}}
+    new_cls = theory.get_Cl(ell_factor=True)
+    assert len(calls) == 5
+    assert np.array_equal(new_cls["tt"], 2 * cls["tt"])
@@ -0,0 +1,92 @@
+"""
+Tests the batched evaluation of the CMBlikes likelihood terms (HL transformation, exact
+chi squared and binning of the stacked theory spectra) on synthetic matrices, comparing
+it with the evaluation bin by bin.
+"""
+
+# Global
+from types import SimpleNamespace
+import numpy as np
+from scipy.linalg import sqrtm
+# Local
+from cobaya.likelihoods.base_classes.cmblikes import CMBlikes, BinWindows
+
+rng = np.random.default_rng(1)
+
+
+def random_covs(nbins, nmaps):
+    factor = rng.normal(0, 1, (nbins, nmaps, nmaps))
+    return factor @ np.swapaxes(factor, -1, -2) + nmaps * np.eye(nmaps)
+
+
+def transform_reference(C, Chat, Cfhalf):
+    # HL transformation of a single matrix, as computed before for each bin
+    if C.shape[0] == 1:
+        rat = Chat[0, 0] / C[0, 0]
+        C[0, 0] = (np.sign(rat - 1) * np.sqrt(2 * np.maximum(0, rat - np.log(rat) - 1)) *
+                   Cfhalf[0, 0] ** 2)
+        return
+    diag, U = np.linalg.eigh(C)
+    rot = U.T.dot(Chat).dot(U)
+    roots = np.sqrt(diag)
+    for i, root in enumerate(roots):
+        rot[i, :] /= root
+        rot[:, i] /= root
+    U.dot(rot.dot(U.T), rot)
+    diag, rot = np.linalg.eigh(rot)
+    diag = np.sign(diag - 1) * np.sqrt(2 * np.maximum(0, diag - np.log(diag) - 1))
+    Cfhalf.dot(rot, U)
+    for i, d in enumerate(diag):
+        rot[:, i] = U[:, i] * d
+    rot.dot(U.T, C)
+
+
+def test_cmblikes_transform_and_exact_chi_sq():
+    nbins = 6
+    for nmaps in [1, 3]:
+        C = random_covs(nbins, nmaps)
+        Chat = C + 0.1 * random_covs(nbins, nmaps)
+        Cfhalf = np.array([np.real(sqrtm(cov)) for cov in random_covs(nbins, nmaps)])
+        transformed = C.copy()
+        CMBlikes.transform(transformed, Chat, Cfhalf)
+        for b in range(nbins):
+            expected = C[b].copy()
+            transform_reference(expected, Chat[b], Cfhalf[b])
+            assert np.allclose(transformed[b], expected, rtol=1e-10, atol=1e-12)
+        like = SimpleNamespace(fsky=0.7, nmaps=nmaps)
+        ells = 30 + np.arange(nbins)
+        chi_sqs = CMBlikes.exact_chi_sq(like, C, Chat, ells)
+        for b, L in enumerate(ells):
+            M = np.linalg.inv(C[b]).dot(Chat[b])
+            expected = ((2 * L + 1) * like.fsky *
+                        (np.trace(M) - nmaps - np.linalg.slogdet(M)[1]))
+            assert np.isclose(chi_sqs[b], expected, rtol=1e-10, atol=1e-12)
+
+
+def test_cmblikes_binning_operator():
+    nmaps, nbins, n_ell, lmin = 3, 5, 40, 2
+    like = CMBlikes.__new__(CMBlikes)
+    like.map_fields = [0, 1, 1]
+    like.pcl_lmin, like.pcl_lmax = lmin, lmin + n_ell - 1
+    stack = rng.normal(0, 1, (nmaps * (nmaps + 1) // 2, n_ell))
+    map_cls = like.init_map_cls(nmaps, [0, 1, 2], stack=stack)
+    # spectra are views of the rows of the stack, in the order of numpy.tril_indices
+    for k, (i, j) in enumerate(zip(*np.tril_indices(nmaps))):
+        assert np.shares_memory(map_cls[i, j].CL, stack[k])
+        assert np.array_equal(map_cls[i, j].CL, stack[k])
+    # windows from pairs of maps (some unused, one repeated) to the output bandpowers
+    cols_in = np.array([[0, 1, 1, 2, 2, 2, -1, 2], [0, 0, 1, 0, 1, 2, 0, 1]])
+    cols_out = np.array([0, 1, 2, 3, 4, 5, 1, 4])
+    bins = BinWindows(lmin, lmin + n_ell - 1, nbins, ncl=6)
+    bins.cols_in, bins.cols_out = cols_in, cols_out
+    bins.binning_matrix = rng.uniform(0, 1, (len(cols_out), nbins, n_ell))
+    bins.binning_matrix[bins.binning_matrix < 0.5] = 0
+    bins.init_operator(nmaps)
+    # compared with binning the spectra of each pair of maps one by one
+    expected = bins.bin(map_cls)
+    assert np.allclose(bins.bin(stack), expected, rtol=1e-12, atol=1e-12)
+    assert np.allclose(bins.bin(stack, np.ones((nbins, 6))), expected + 1,
+                       rtol=1e-12, atol=1e-12)
+    # the window of the unused map is ignored
+    bins.binning_matrix[6] = 0
+    assert np.allclose(bins.bin(map_cls), expected, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,101 @@
+"""
+Tests the storage of samples in a SampleCollection.
+"""
+
+# Global
+import os
+import numpy as np
+# Local
+from cobaya.model import get_model
+from cobaya.collection import SampleCollection, RunningMoments
+from cobaya.output import get_output
+from cobaya.conventions import OutPar
+
+info = {"likelihood": {"one": None},
+        "params": {"a": {"prior": {"min": 0, "max": 1}},
+                   "b": {"prior": {"min": 0, "max": 1}},
+                   "c": {"derived": "lambda a, b: a + b"}}}
+
+
+def test_collection_growth():
+    model = get_model(info)
+    collection = SampleCollection(model, cache_size=3)
+    rng = np.random.default_rng(0)
+    points = rng.random((50, 2))
+    for i, point in enumerate(points):
+        collection.add(point, derived=[sum(point)], weight=i % 3 + 1,
+                       logpriors=[0], loglikes=[-i])
+    assert len(collection) == len(collection.data) == 50
+    assert np.allclose(collection[["a", "b"]].to_numpy(), points)
+    assert np.allclose(collection["c"], points.sum(axis=1))
+    assert np.allclose(collection[OutPar.chi2], 2 * np.arange(50))
+    assert np.allclose(collection.to_numpy(), collection.data.to_numpy())
+    assert len(collection[10:20]) == 10
+    # Appending and reweighting
+    collection.append(collection[:10])
+    assert len(collection) == 60
+    assert np.allclose(collection[["a", "b"]].to_numpy()[50:], points[:10])
+    weights = np.ones(60)
+    weights[::2] = 0
+    collection.reweight(weights)
+    assert len(collection) == 30
+    assert np.allclose(collection["a"].to_numpy()[:25], points[1::2, 0])
+    collection.add(points[0], derived=[sum(points[0])], logpriors=[0], loglikes=[0])
+    assert len(collection) == 31
+    assert np.allclose(collection["a"].to_numpy()[-1], points[0, 0])
+
+
+def add_points(collection, points):
+    for point in points:
+        collection.add(point, derived=[sum(point)], logpriors=[0], loglikes=[-1])
+
+
+def test_collection_npy(tmpdir):
+    model = get_model(info)
+    output = get_output(prefix=os.path.join(tmpdir, "chain"), output_format="npy")
+    collection = SampleCollection(model, output, name="1")
+    assert collection.file_name.endswith(".1.npy")
+    points = np.random.default_rng(0).random((30, 2))
+    add_points(collection, points[:10])
+    collection.out_update()
+    add_points(collection, points[10:25])
+    collection.out_update()
+    loaded = output.load_collections(model)[0]
+    assert list(loaded.data.columns) == collection.columns
+    assert np.allclose(loaded.to_numpy(), collection.to_numpy())
+    # Standard numpy file
+    assert np.allclose(
+        np.load(collection.file_name)["a"], points[:25, 0])
+    # Resuming: appends to the existing file
+    resumed = SampleCollection(model, output, name="1", resuming=True)
+    assert len(resumed) == 25
+    add_points(resumed, points[25:])
+    resumed.out_update()
+    loaded = output.load_collections(model, skip=0.5)[0]
+    assert np.allclose(loaded[["a", "b"]].to_numpy(), points[15:])
+
+
+def test_collection_running_moments(monkeypatch):
+    monkeypatch.setattr(RunningMoments, "block_size", 7)
+    model = get_model(info)
+    collection = SampleCollection(model)
+    rng = np.random.default_rng(1)
+    points = 1e3 + rng.random((60, 2))
+    weights = rng.integers(1, 5, len(points))
+    for i, point in enumerate(points):
+        collection.add(point, derived=[sum(point)], weight=weights[i],
+                       logpriors=[0], loglikes=[-1])
+        if i in (5, 30):  # partial accumulation while adding
+            collection.mean()
+    for first, last in [(None, None), (0, 10), (3, 4), (8, 50), (-25, None), (30, -7)]:
+        assert np.allclose(collection.mean(first, last),
+                           np.average(points[first:last], weights=weights[first:last],
+                                      axis=0))
+        assert np.allclose(collection.cov(first, last),
+                           np.cov(points[first:last].T, fweights=weights[first:last]))
+        assert np.allclose(collection.cov(first, last),
+                           collection.cov(first, last, derived=True)[:2, :2])
+    # non-integer weights
+    collection.reweight(np.full(len(points), 0.5))
+    assert np.allclose(collection.cov(10, 40),
+                       np.cov(points[10:40].T, aweights=weights[10:40] / 2))
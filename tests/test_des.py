@@ -0,0 +1,73 @@
+"""
+Tests the precomputed projection operators of the DES Y1 likelihood (lensing kernel,
+Limber power and the interpolation composed with the Bessel transforms) on synthetic
+inputs, comparing them with the previous evaluation distance by distance or multipole
+by multipole.
+"""
+
+# Global
+import numpy as np
+# Local
+from cobaya.likelihoods.base_classes import DES
+from cobaya.likelihoods.base_classes.des import _spline
+from cobaya.theories.cosmo import PowerSpectrumInterpolator
+
+rng = np.random.default_rng(3)
+
+
+def power_spectrum(amplitude, kmax):
+    z = np.linspace(0, 4.5, 30)
+    k = np.exp(np.linspace(np.log(1e-5), np.log(kmax), 80))
+    logP = (np.log(amplitude / (1 + k ** 2)) - k)[None, :] - 2 * np.log1p(z)[:, None]
+    return PowerSpectrumInterpolator(z, k, logP, logP=True)
+
+
+def synthetic_des():
+    like = DES.__new__(DES)
+    like.acc, like.l_max, like.use_hankel = 1, 1000, False
+    like.zs = np.linspace(0.01, 4, 40)
+    like.data_types = ["xip", "gammat"]
+    like.bin_pairs = [[(0, 0), (0, 1), (1, 1)], [(0, 1), (1, 0)]]
+    like.ls_bessel = np.exp(np.linspace(np.log(3.), np.log(990.), 60))
+    like.bessel_cache = tuple(rng.normal(0, 1, (3, len(like.ls_bessel), 7)))
+    like.init_projection()
+    return like
+
+
+def test_des_lensing_and_limber():
+    like = synthetic_des()
+    chis = np.linspace(50, 30000, len(like.zs))
+    dchis = np.gradient(chis)
+    n_chi = rng.uniform(0, 1, (3, len(chis)))
+    wq = like.lensing_efficiencies(chis, dchis, n_chi)
+    for b in range(len(n_chi)):
+        for i, chi in enumerate(chis):
+            assert np.isclose(wq[b, i], np.dot(n_chi[b, i:],
+                                               (1 - chi / chis[i:]) * dchis[i:]),
+                              rtol=1e-12, atol=1e-12 * np.abs(wq[b]).max())
+    PKs = [power_spectrum(1., 5.), power_spectrum(2., 3.)]
+    dchifac = dchis / chis ** 2
+    powers = like.limber_power(PKs, chis, dchifac)
+    for PK, PK_powers in zip(PKs, powers):
+        for ix, ell in enumerate(like.ls_cl):
+            k = (ell + 0.5) / chis
+            weight = dchifac.copy()
+            weight[k < 1e-4] = 0
+            weight[k >= PK.kmax] = 0
+            assert np.allclose(PK_powers[ix], weight * PK.P(like.zs, k, grid=False),
+                               rtol=1e-12, atol=0)
+    # both cuts in k are exercised
+    assert np.any(powers == 0) and np.any(powers != 0)
+
+
+def test_des_cl_to_corrs():
+    like = synthetic_des()
+    assert [len(pairs) for pairs in like._pairs["xip"]] == [3, 3]
+    assert np.array_equal(like._pairs["gammat"][1], [1, 0])
+    cls = rng.uniform(0.5, 1, (4, len(like.ls_cl))) / (1 + like.ls_cl) ** 2
+    for cl_to_corrs, js in zip(like._cl_to_corrs, like.bessel_cache):
+        corrs = cls.dot(cl_to_corrs)
+        for cl, corr in zip(cls, corrs):
+            expected = _spline(like.ls_cl, cl)(like.ls_bessel).dot(js)
+            assert np.allclose(corr, expected, rtol=1e-10,
+                               atol=1e-12 * np.abs(expected).max())
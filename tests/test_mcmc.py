@@ -133,6 +133,53 @@ sampler:
   mcmc: 
 """
 
+
+def test_mcmc_speculative():
+    if mpi.more_than_one_process():
+        pytest.skip("Speculative trials are evaluated by local processes.")
+    info: InputDict = yaml_load(yaml)
+    samples = []
+    for speculative in [None, 1, 4]:
+        # learning often, to check that proposals are redrawn after a new covariance
+        info['sampler']['mcmc'] = {'max_samples': 120, 'seed': 3, 'burn_in': 0,
+                                   'learn_every': 20, 'Rminus1_single_split': 2,
+                                   'learn_proposal_Rminus1_max': 1e10,
+                                   'measure_speeds': False, 'speculative': speculative,
+                                   'update_speeds': 2 if speculative else None}
+        updated_info, sampler = run(info)
+        # the speeds cannot be measured from the evaluations in other processes
+        assert not sampler._update_blocking
+        samples.append(sampler.products()["sample"])
+    # The same chain as evaluating the trial points one at a time, independently of the
+    # number of them evaluated at once
+    assert all(len(sample) == 120 for sample in samples)
+    for sample in samples[1:]:
+        assert np.array_equal(samples[0].to_numpy(), sample.to_numpy())
+
+
+class SlowGaussLike2(GaussLike2):
+    # much slower than stated
+    def logp(self, **params_values_dict):
+        time.sleep(0.01)
+        return super().logp(**params_values_dict)
+
+
+def test_mcmc_update_speeds():
+    info: InputDict = yaml_load(yaml)
+    info['likelihood'] = {'g1': {'external': GaussLike},
+                          'g2': {'external': SlowGaussLike2}}
+    info['sampler']['mcmc'] = {'max_samples': 60, 'learn_every': 20, 'seed': 1,
+                               'measure_speeds': False, 'update_speeds': 2}
+    updated_info, sampler = run(info)
+    # stated speeds: [a] slower than [b] (oversampled); measured: similar cost
+    assert sampler.model.likelihood['g2'].speed < 150
+    assert sampler.model.likelihood['g1'].speed > 5 * sampler.model.likelihood['g2'].speed
+    assert list(sampler.oversampling_factors) == [1, 1]
+    assert [list(b) for _, b in updated_info['sampler']['mcmc']['blocking']] == \
+           [['a'], ['b']]
+    assert len(sampler.products()["sample"]) == 60
+
+
 logger = logging.getLogger('test')
 
 
@@ -3,9 +3,12 @@
 import numpy as np
 import pytest
 import os
+import multiprocessing
 
 from cobaya import mpi, run, InputDict, Likelihood
+from cobaya.log import get_logger
 from cobaya.samplers.minimize import valid_methods
+from cobaya.samplers.minimize.minimize import minimize_from
 
 pytestmark = pytest.mark.mpi
 
@@ -59,3 +62,28 @@ def test_run_minimize(tmpdir):
     min_info: InputDict = dict(info, sampler={'minimize': None})
     output_info, sampler = run(min_info, force=True)
     assert (abs(sampler.products()["minimum"]["b"] - mean[1]) < 0.01)
+
+
+@mpi.sync_errors
+def test_minimize_processes():
+    NoisyCovLike.noise = 0
+    info: InputDict = {'likelihood': {'like': NoisyCovLike},
+                       "sampler": {"minimize": {"ignore_prior": True, "best_of": 3,
+                                                "processes": 2,
+                                                "discard_worse_by": 1}}}
+    products = run(info).sampler.products()
+    assert abs(products["minimum"]["minuslogpost"]) < 0.01
+    assert np.allclose([products["minimum"][p] for p in "abc"], mean, atol=0.01)
+
+
+def test_minimize_stop_worse():
+    # A minimization stalling at a value much worse than the best so far is stopped
+    incumbent = multiprocessing.Value("d", -100)
+    bounds = np.array([[-5, 5], [-5, 5]])
+    logp = lambda x: -(1 - x[0]) ** 2 - 100 * (x[1] - x[0] ** 2) ** 2  # Rosenbrock
+    for discard_worse_by, stopped in [(None, False), (1, True)]:
+        result, success, was_stopped = minimize_from(
+            logp, np.array([-1.5, 2.]), np.ones(2), bounds, "scipy", 1000, None,
+            get_logger("test"), incumbent=incumbent, discard_worse_by=discard_worse_by)
+        assert was_stopped == stopped
+        assert (result is None) == stopped
@@ -0,0 +1,287 @@
+"""
+Tests some model-level evaluation functionality, comparing it with the standard
+point-by-point evaluation of the posterior.
+"""
+
+# Global
+import os
+import json
+import time
+import pickle
+import sqlite3
+import threading
+from copy import deepcopy
+from fractions import Fraction
+from typing import Optional
+import numpy as np
+from scipy.stats import norm
+import pytest
+# Local
+from cobaya.model import get_model
+from cobaya.theory import Theory
+from cobaya.likelihood import Likelihood
+from cobaya.persistent_cache import PersistentCache
+from cobaya import tracing
+
+mean = [0.1, -0.2]
+cov = [[0.5, 0.1], [0.1, 0.3]]
+
+
+def loglike_external(y, c):
+    return norm.logpdf(y, loc=c, scale=0.5), {"yy": y ** 2}
+
+
+info = {
+    "likelihood": {
+        "gaussian_mixture": {"means": [mean], "covs": [cov], "derived": True,
+                             "input_params_prefix": "x", "output_params_prefix": "z"},
+        "external": {"external": loglike_external, "output_params": ["yy"]}},
+    "prior": {"gauss_y": "lambda y: -y ** 2"},
+    "params": {
+        "x_0": {"prior": {"min": -1, "max": 1}},
+        "x_1": {"prior": {"dist": "norm", "loc": 0, "scale": 1}},
+        "y": {"prior": {"min": -2, "max": 2}},
+        "c": {"value": "lambda y: y / 2", "derived": False},
+        "z_0": None, "z_1": None, "yy": None,
+        "sum_x": {"derived": "lambda x_0, x_1, yy: x_0 + x_1 + yy"}}}
+
+
+def test_model_logposterior_batch():
+    model = get_model(info)
+    assert model.likelihood["gaussian_mixture"] in model._batch_components
+    assert model.likelihood["external"] not in model._batch_components
+    rng = np.random.default_rng(1)
+    points = np.column_stack([rng.uniform(-1.2, 1.2, 20), rng.normal(0, 1, 20),
+                              rng.uniform(-2.2, 2.2, 20)])
+    batch = model.logposterior_batch(points)
+    assert np.isinf(batch.logpost).any()
+    for i, point in enumerate(points):
+        single = model.logposterior(point)
+        assert np.isclose(batch.logpost[i], single.logpost)
+        assert np.allclose(batch.logpriors[i], single.logpriors)
+        if single.logpost != -np.inf:
+            assert np.allclose(batch.loglikes[i], single.loglikes)
+            assert np.allclose(batch.derived[i], single.derived)
+        else:
+            assert np.all(np.isnan(batch.loglikes[i]))
+    # Re-evaluating the same points in a single batch must use the cached states
+    cached_batch = model.logposterior_batch(points[-3:], return_derived=False)
+    assert np.allclose(cached_batch.logpost, batch.logpost[-3:])
+    assert cached_batch.derived.shape == (3, 0)
+
+
+def test_model_cache():
+    model = get_model(info)
+    model.set_cache_size(2)
+    points = [[0.1, 0.2, 0.3], [0.2, 0.3, 0.4], [0.3, 0.4, 0.5]]
+    logposts = [model.logpost(point) for point in points]
+    # last two cached, first one evicted
+    assert np.isclose(model.logpost(points[1]), logposts[1])
+    stats = model.get_cache_stats()["gaussian_mixture"]
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert np.isclose(model.logpost(points[0]), logposts[0])
+    stats = model.get_cache_stats()["external"]
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 2)
+    assert stats["cached"] == stats["size"] == 2
+    # the cache is least-recently-used: the point re-used above is kept
+    assert np.isclose(model.logpost(points[1]), logposts[1])
+    assert model.get_cache_stats()["external"]["hits"] == 2
+
+
+def test_model_persistent_cache(tmpdir):
+    calls = []
+
+    def get_loglike_counted():
+        def loglike_counted(y, c):
+            calls.append(y)
+            return loglike_external(y, c)
+
+        return loglike_counted
+
+    cache_info = {"path": str(tmpdir), "max_size_mb": 1}
+
+    def get_info_cached():
+        return dict(info, likelihood={
+            "gaussian_mixture": dict(info["likelihood"]["gaussian_mixture"],
+                                     persistent_cache=cache_info),
+            "external": {"external": get_loglike_counted(), "output_params": ["yy"],
+                         "persistent_cache": cache_info}})
+
+    points = [[0.1, 0.2, 0.3], [0.2, 0.3, 0.4]]
+    model = get_model(get_info_cached())
+    logposts = [model.logposterior(point) for point in points]
+    assert len(calls) == 2
+    # A new model (with empty in-memory cache, and a new closure defined by the same
+    # code, as in a different process) re-uses the states stored on disk
+    info_cached = get_info_cached()
+    model = get_model(info_cached)
+    for point, logpost in zip(points, logposts):
+        assert np.isclose(model.logpost(point), logpost.logpost)
+        assert np.allclose(model.logposterior(point).derived, logpost.derived)
+    assert len(calls) == 2
+    assert len(model.likelihood["external"]._persistent_cache) == 2
+    # Different options for a component make for a different computation
+    info_cached["likelihood"]["external"]["stop_at_error"] = True
+    info_cached["likelihood"]["gaussian_mixture"]["covs"] = [[1, 0], [0, 1]]
+    model = get_model(info_cached)
+    assert not np.isclose(model.logpost(points[0]), logposts[0].logpost)
+    assert len(calls) == 2
+    # Different code for a component makes for a different computation too
+    info_cached = get_info_cached()
+    info_cached["likelihood"]["external"]["external"] = \
+        lambda y, c: (calls.append(y) or loglike_external(y, c))
+    model = get_model(info_cached)
+    model.logpost(points[0])
+    assert len(calls) == 3
+    # Closing the model closes the connections to the on-disk caches
+    persistent_cache = model.likelihood["external"]._persistent_cache
+    model.close()
+    assert model.likelihood["external"]._persistent_cache is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        persistent_cache._connection.execute("SELECT COUNT(*) FROM states")
+
+
+def test_persistent_cache_size_and_stale_states(tmpdir):
+    def stored_size(cache):
+        return [cache._connection.execute(query).fetchone()[0] for query in
+                ["SELECT size FROM total_size", "SELECT SUM(size) FROM states"]]
+
+    cache = PersistentCache("test", "signature", path=str(tmpdir), max_size_mb=0.01)
+    for i in range(20):
+        cache.add((i,), {"derived": None, "values": np.full(100, i)})
+    cache.add((19,), {"derived": None, "values": np.zeros(200)})  # replaced
+    total, expected = stored_size(cache)
+    assert total == expected <= cache.max_size and 0 < len(cache) < 20
+    assert cache.get((19,))["values"].shape == (200,)
+    # states that cannot be loaded any more (e.g. module renamed) are discarded
+    blob = pickle.dumps({"derived": None, "values": Fraction(1, 2)}).replace(
+        b"fractions", b"fractionz")
+    with cache._connection:
+        cache._connection.execute("UPDATE states SET state=? WHERE key=?",
+                                  (blob, cache._hash((19,))))
+    n = len(cache)
+    assert cache.get((19,)) is None
+    assert len(cache) == n - 1
+    total, expected = stored_size(cache)
+    assert total == expected
+    cache.close()
+    # the total is re-used when opening the file again
+    cache = PersistentCache("test", "signature", path=str(tmpdir), max_size_mb=0.01)
+    assert stored_size(cache)[0] == total
+    cache.close()
+
+
+calls_log = []
+
+
+class Square(Theory):
+    params = {"w": None}
+
+    def calculate(self, state, want_derived=True, **params_values_dict):
+        time.sleep(0.05)
+        state["square"] = params_values_dict["w"] ** 2
+        calls_log.append(("square", threading.current_thread().name))
+
+    def get_square(self):
+        return self.current_state["square"]
+
+
+class SleepyLike(Likelihood):
+    offset = 0
+    barrier: Optional[threading.Barrier] = None
+
+    def get_requirements(self):
+        return {"square": None}
+
+    def logp(self, **params_values):
+        calls_log.append((self.get_name(), threading.current_thread().name))
+        if self.barrier:  # waits for the other likelihood to be computing too
+            self.barrier.wait()
+        else:
+            time.sleep(0.1)
+        if self.offset < 0:
+            raise ValueError("Failed!")
+        return -self.provider.get_square() - self.offset
+
+
+def test_model_component_threads():
+    info_threads = {"params": {"w": {"prior": {"min": -1, "max": 1}}},
+                    "theory": {"square": Square},
+                    "likelihood": {"like_a": SleepyLike,
+                                   "like_b": {"external": SleepyLike, "offset": 1}}}
+    model = get_model(info_threads)
+    logposts = [model.logposterior([w]) for w in [0.1, 0.2]]
+    model_threads = get_model(dict(info_threads, component_threads=2))
+    # copies of the model get their own pool
+    model_threads = deepcopy(model_threads)
+    calls_log.clear()
+    # the likelihoods can only pass the barrier if computed concurrently
+    SleepyLike.barrier = threading.Barrier(2, timeout=10)
+    try:
+        for w, logpost in zip([0.1, 0.2], logposts):
+            logpost_threads = model_threads.logposterior([w])
+            assert np.isclose(logpost_threads.logpost, logpost.logpost)
+            assert np.allclose(logpost_threads.loglikes, logpost.loglikes)
+            assert np.allclose(logpost_threads.derived, logpost.derived)
+        # cached: not recomputed, also by a (pickled) copy
+        assert np.isclose(model_threads.logpost([0.2]), logposts[1].logpost)
+        model_copy = pickle.loads(pickle.dumps(model_threads))
+        assert np.isclose(model_copy.logpost([0.2]), logposts[1].logpost)
+        model_copy.close()
+        assert len(calls_log) == 6
+        for i in [0, 3]:
+            # the likelihoods start after the theory has been computed,
+            # in different threads
+            assert [name for name, _ in calls_log[i:i + 3]][0] == "square"
+            assert {name for name, _ in calls_log[i + 1:i + 3]} == {"like_a", "like_b"}
+            assert calls_log[i + 1][1] != calls_log[i + 2][1]
+            assert all(thread.startswith("component")
+                       for _, thread in calls_log[i:i + 3])
+        model_threads.close()
+        # failed calculations
+        info_threads["likelihood"]["like_b"]["offset"] = -1
+        model_threads = get_model(dict(info_threads, component_threads=2))
+        assert model_threads.logpost([0.3]) == -np.inf
+        model_threads.close()
+    finally:
+        SleepyLike.barrier = None
+
+
+def test_model_timing_trace(tmpdir):
+    info_timing = {"params": {"w": {"prior": {"min": -1, "max": 1}}},
+                   "theory": {"square": Square},
+                   "likelihood": {"like_a": SleepyLike,
+                                  "like_b": {"external": SleepyLike, "offset": -1}},
+                   "timing": True}
+    model = get_model(info_timing)
+    tracing.start_tracing()
+    try:
+        for w in [0.1, 0.2, 0.1]:
+            assert model.logpost([w]) == -np.inf
+    finally:
+        tracer = tracing.stop_tracing()
+    stats = model.get_timing_stats()
+    assert (stats["square"]["hits"], stats["square"]["misses"]) == (1, 2)
+    assert stats["square"]["n"] == 1 and stats["square"]["failed"] == 0
+    assert 0.05 <= stats["square"]["p50"] <= stats["square"]["p99"] < 0.1
+    # failed states are not cached
+    assert (stats["like_b"]["n"], stats["like_b"]["failed"]) == (0, 3)
+    assert stats["like_b"]["p50"] is None
+    trace_file = os.path.join(tmpdir, "trace.json")
+    tracer.dump(trace_file)
+    with open(trace_file, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    assert [(e["name"], e["cat"]) for e in events if e["name"] != "prior"] == \
+           2 * [("square", "theory"), ("like_a", "likelihood"),
+                ("like_b", "likelihood")] + [("like_b", "likelihood")]
+    assert sum(e["name"] == "prior" for e in events) == 3
+    assert all(e["dur"] >= 1e5 for e in events if e["name"] == "like_a")
+    # only the most recent events are kept
+    tracing.start_tracing(max_events=2)
+    try:
+        for name in ["first", "second", "third"]:
+            with tracing.span(name, "test"):
+                pass
+    finally:
+        tracer = tracing.stop_tracing()
+    assert [e["name"] for e in tracer.events] == ["second", "third"]
@@ -15,6 +15,7 @@ from cobaya.tools import get_external_function
 from cobaya.likelihood import Likelihood
 from cobaya.model import get_model
 from cobaya.log import LoggedError
+from cobaya.parameterization import Parameterization
 
 x_func = lambda _: _ / 3
 e_func = lambda _: _ + 1
@@ -170,3 +171,35 @@ def test_parameterization_dependencies():
     with pytest.raises(LoggedError) as e:
         get_model(test_info)
     assert "that are output derived parameters" in str(e.value)
+
+
+def test_parameterization_batch():
+    params = yaml_load("""
+       a: 0.01
+       bprime:
+         prior: [-1, 1]
+       cprime:
+         prior: [-1, 1]
+       # not vectorizable: evaluated point by point
+       b: "lambda a, bprime: a + bprime if bprime > 0 else a"
+       c:
+         value: "lambda a, cprime: a + 3 * np.sin(cprime)"
+         derived: True
+       e:
+       f:
+         derived: "lambda b, x: b * x"
+       g:
+         derived: "lambda f, c: np.maximum(f, c)"
+    """)
+    parameterization = Parameterization(params)
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1, 1, (10, 2))
+    outputs = rng.normal(size=(10, len(parameterization.output_params())))
+    input_values = parameterization.to_input_batch(points)
+    derived_values = np.zeros((10, len(parameterization.derived_params())))
+    assert parameterization.to_derived_batch(
+        outputs, input_values, out=derived_values) is derived_values
+    for point, output, input_row, derived_row in zip(
+            points, outputs, input_values, derived_values):
+        assert np.allclose(input_row, list(parameterization.to_input(point).values()))
+        assert np.allclose(derived_row, list(parameterization.to_derived(output).values()))
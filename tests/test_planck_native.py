@@ -0,0 +1,103 @@
+"""
+Tests the assembly of the theory vector and the chi squared of the python-native Planck
+likelihoods (plik_lite and CamSpec) on synthetic data, comparing it with the previous
+evaluation bin by bin (or spectrum by spectrum) and the inverse covariance.
+"""
+
+# Global
+import os
+import numpy as np
+# Local
+from cobaya.likelihoods.base_classes import PlanckPlikLite, Planck2018CamSpecPython
+
+rng = np.random.default_rng(2)
+
+
+def random_cov(n):
+    factor = rng.normal(0, 1, (n, n))
+    return factor.dot(factor.T) + n * np.eye(n)
+
+
+def write_pliklite_dataset(path, use_cl, use_bins):
+    nbins_cl, offset, maxbin = [8, 6, 7], 2, 8
+    widths = rng.integers(1, 6, maxbin)
+    blmin = np.concatenate([[0], np.cumsum(widths)[:-1]])
+    blmax = blmin + widths - 1
+    lmax = blmax[-1] + offset
+    np.savetxt(os.path.join(path, "blmin.txt"), blmin, fmt="%d")
+    np.savetxt(os.path.join(path, "blmax.txt"), blmax, fmt="%d")
+    np.savetxt(os.path.join(path, "weights.txt"), rng.uniform(0.5, 1, lmax - offset + 1))
+    nbins = sum(nbins_cl)
+    np.savetxt(os.path.join(path, "data.txt"), np.array(
+        [np.arange(nbins), rng.normal(1, 0.1, nbins), rng.uniform(0.1, 0.2, nbins)]).T)
+    np.savetxt(os.path.join(path, "cov.txt"), random_cov(nbins))
+    dataset = ["use_cl = %s" % use_cl, "nbintt = %d" % nbins_cl[0],
+               "nbinte = %d" % nbins_cl[1], "nbinee = %d" % nbins_cl[2],
+               "lmax = %d" % lmax, "bin_lmin_offset = %d" % offset,
+               "use_bins = %s" % use_bins, "data = data.txt", "blmin = blmin.txt",
+               "blmax = blmax.txt", "weights = weights.txt", "cov_file = cov.txt",
+               "cov_file_binary = cov.bin"]
+    dataset_file = os.path.join(path, "plik_lite.dataset")
+    with open(dataset_file, "w") as f:
+        f.write("\n".join(dataset) + "\n")
+    return dataset_file
+
+
+def test_pliklite_chi_squared(tmpdir):
+    for use_cl, use_bins in [("tt te ee", ""), ("tt ee", "1 2 3 6")]:
+        dataset_file = write_pliklite_dataset(str(tmpdir), use_cl, use_bins)
+        like = PlanckPlikLite({"dataset_file": dataset_file})
+        L0 = 1
+        cells = rng.normal(1, 0.1, (3, like.lmax - L0 + 1))
+        calPlanck = 1.01
+        chi2 = like.get_chi_squared(L0, *cells, calPlanck=calPlanck)
+        # previous evaluation, binning the spectra bin by bin
+        cl = np.empty(like.used_indices.shape)
+        ix = 0
+        for tp, cell in enumerate(cells):
+            for i in like.used_bins[tp]:
+                cl[ix] = np.dot(cell[like.blmin[i] - L0:like.blmax[i] - L0 + 1],
+                                like.weights[like.blmin[i]:like.blmax[i] + 1])
+                ix += 1
+        diff = like.X_data - cl / calPlanck ** 2
+        assert np.isclose(chi2, np.linalg.inv(like.cov).dot(diff).dot(diff),
+                          rtol=1e-12, atol=0)
+
+
+def test_camspec_chi_squared():
+    max_l = 40
+    like = Planck2018CamSpecPython.__new__(Planck2018CamSpecPython)
+    like.Nspec = 6
+    # ranges of used multipoles for each spectrum, one of them (143x217) unused
+    like.ell_ranges = np.empty(like.Nspec, dtype=object)
+    for i, (lmin, lmax) in enumerate([(10, 30), (5, 40), (12, 20), (0, -1),
+                                      (2, 25), (8, 40)]):
+        like.ell_ranges[i] = range(lmin, lmax + 1)
+    like.ell_ranges[1] = np.array([L for L in like.ell_ranges[1] if L % 3], dtype=int)
+    like.used_sizes = np.array([len(ells) for ells in like.ell_ranges], dtype=int)
+    like.cl_used = like.used_sizes > 0
+    n = np.sum(like.used_sizes)
+    like.data_vector = rng.normal(1, 0.1, n)
+    like.covinv = np.linalg.inv(random_cov(n))
+    like.init_theory_indices(max_l)
+    cals = rng.uniform(0.9, 1.1, like.Nspec)
+    foregrounds = rng.normal(0, 0.1, (4, max_l + 1))
+    like.get_cals = lambda data_params: cals
+    like.get_foregrounds = lambda data_params: foregrounds
+    CT, CTE, CEE = rng.normal(1, 0.1, (3, max_l + 1))
+    # previous evaluation, subtracting the theory spectrum by spectrum
+    delta_vector = like.data_vector.copy()
+    ix = 0
+    for i, (cal, n) in enumerate(zip(cals, like.used_sizes)):
+        if n > 0:
+            if i <= 3:
+                delta_vector[ix:ix + n] -= (CT[like.ell_ranges[i]] +
+                                            foregrounds[i][like.ell_ranges[i]]) / cal
+            elif i == 4:
+                delta_vector[ix:ix + n] -= CTE[like.ell_ranges[i]] / cal
+            elif i == 5:
+                delta_vector[ix:ix + n] -= CEE[like.ell_ranges[i]] / cal
+            ix += n
+    assert np.isclose(like.chi_squared(CT, CTE, CEE, {}),
+                      like.covinv.dot(delta_vector).dot(delta_vector),
+                      rtol=1e-12, atol=0)
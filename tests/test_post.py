@@ -1,4 +1,5 @@
 import os
+import sys
 from copy import deepcopy
 from scipy.stats import multivariate_normal
 from getdist.mcsamples import loadMCSamples, MCSamplesFromCobaya
@@ -95,6 +96,106 @@ def test_post_prior(tmpdir):
         assert np.allclose(new_cov, target_cov)
 
 
+def test_post_processes(tmpdir):
+    if mpi.more_than_one_process():
+        pytest.skip("Local pool of processes not used with MPI.")
+    info: InputDict = {
+        "output": os.path.join(tmpdir, "gaussian"), "force": True,
+        "params": info_params, "sampler": info_sampler,
+        "likelihood": {"gaussian": sampled_pdf}}
+    run(info)
+    orig_chunk_size = OutputOptions.chunk_size
+    try:
+        OutputOptions.chunk_size = 30
+        samples = []
+        for processes in [1, 2]:
+            info_post: InputDict = {
+                "output": info["output"], "force": True,
+                "post": {"suffix": "proc%d" % processes, "processes": processes,
+                         "remove": {"likelihood": {"gaussian": None}},
+                         "add": {"likelihood": {"target": target_pdf_prior}}}}
+            samples.append(post(info_post).products["sample"])
+    finally:
+        OutputOptions.chunk_size = orig_chunk_size
+    # Results assembled in the same order
+    assert len(samples[0]) > 30
+    assert np.array_equal(samples[0].to_numpy(), samples[1].to_numpy())
+
+
+def test_post_shared_chunks(tmpdir, monkeypatch):
+    if mpi.more_than_one_process():
+        pytest.skip("Faking a single MPI process.")
+    info: InputDict = {
+        "output": os.path.join(tmpdir, "gaussian"), "force": True,
+        "params": info_params, "sampler": info_sampler,
+        "likelihood": {"gaussian": sampled_pdf}}
+    run(info)
+    info_post: InputDict = {
+        "output": info["output"], "force": True,
+        "post": {"suffix": "foo", "remove": {"likelihood": {"gaussian": None}},
+                 "add": {"likelihood": {"target": target_pdf_prior}}}}
+    expected = post(info_post).products
+    # Chunks handed out by mpi.dynamic_range, as if running with MPI (see also
+    # test_post_shared_chunks_mpi)
+
+    class SingleRankMPI:
+        more_than_one_process = staticmethod(lambda: True)
+        dynamic_range = staticmethod(lambda n, root=0: iter(range(n)))
+
+        def __getattr__(self, name):
+            return getattr(mpi, name)
+
+    monkeypatch.setattr(sys.modules["cobaya.post"], "mpi", SingleRankMPI())
+    orig_chunk_size = OutputOptions.chunk_size
+    try:
+        OutputOptions.chunk_size = 30
+        products = post(info_post).products
+    finally:
+        OutputOptions.chunk_size = orig_chunk_size
+    assert np.array_equal(products["sample"].to_numpy(), expected["sample"].to_numpy())
+    assert products["stats"]["points"] == expected["stats"]["points"]
+
+
+@pytest.mark.mpionly
+@mpi.sync_errors
+def test_post_shared_chunks_mpi(tmpdir):
+    info: InputDict = {
+        "output": os.path.join(mpi.share(str(tmpdir) if mpi.is_main_process() else None),
+                               "gaussian"), "force": True,
+        "params": info_params, "sampler": info_sampler,
+        "likelihood": {"gaussian": sampled_pdf}}
+    _, sampler = run(info)
+    samples_in = mpi.gather(sampler.products()["sample"])
+    info_post: InputDict = {
+        "output": info["output"], "force": True,
+        "post": {"suffix": "foo", "remove": {"likelihood": {"gaussian": None}},
+                 "add": {"likelihood": {"target": target_pdf_prior}}}}
+    orig_chunk_size = OutputOptions.chunk_size
+    try:
+        OutputOptions.chunk_size = 30
+        products = post(info_post).products
+    finally:
+        OutputOptions.chunk_size = orig_chunk_size
+    # All processes get the same weights and stats, but only the root one the samples
+    all_products = mpi.gather(products)
+    if mpi.is_main_process():
+        for other in all_products[1:]:
+            assert other["sample"] == []
+            assert other["stats"] == products["stats"]
+            assert other["logpost_weight_offset"] == products["logpost_weight_offset"]
+            assert all(np.array_equal(w, w_root) for w, w_root in
+                       zip(other["weights"], products["weights"]))
+        # The points of all the input samples, in the original order
+        samples = products["sample"]
+        assert len(samples) == len(samples_in)
+        for sample, sample_in in zip(samples, samples_in):
+            assert np.allclose(sample[["a", "b"]].to_numpy(dtype=np.float64),
+                               sample_in[["a", "b"]].to_numpy(dtype=np.float64))
+            assert np.allclose(sample["chi2__target"].to_numpy(dtype=np.float64),
+                               [-2 * target_pdf_prior(a, b) for a, b in
+                                zip(sample["a"], sample["b"])])
+
+
 def test_post_likelihood():
     """
     Swaps likelihood "gaussian" for "target".
@@ -104,8 +205,11 @@ def test_post_likelihood():
     """
     # Generate original chain
     orig_interval = OutputOptions.output_inteveral_s
+    orig_chunk_size = OutputOptions.chunk_size
     try:
         OutputOptions.output_inteveral_s = 0
+        # small chunks, to reweight the first ones and then continue
+        OutputOptions.chunk_size = 50
         info_params_local = deepcopy(info_params)
         info_params_local["dummy"] = 0
         dummy_loglike_add = 0.1
@@ -159,6 +263,7 @@ def test_post_likelihood():
                         products_post["sample"]["chi2__dummy_add"])
     finally:
         OutputOptions.output_inteveral_s = orig_interval
+        OutputOptions.chunk_size = orig_chunk_size
 
 
 def test_post_params():
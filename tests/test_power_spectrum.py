@@ -0,0 +1,41 @@
+"""
+Tests the evaluation of power spectrum interpolators at fixed points, comparing it with
+the direct evaluation of the interpolators.
+"""
+
+# Global
+import numpy as np
+# Local
+from cobaya.theories.cosmo import PowerSpectrumInterpolator, PowerSpectrumEvaluator
+
+z = np.linspace(0, 4, 30)
+k = np.logspace(-4, 1, 150)
+pk = np.outer(1 / (1 + z) ** 2, k / (1 + (k / 0.02) ** 2.5))
+
+
+def test_power_spectrum_evaluator():
+    interpolators = [
+        PowerSpectrumInterpolator(z, k, np.log(pk), logP=True, extrap_kmax=100),
+        PowerSpectrumInterpolator(z, k, np.log(2 * pk), logP=True, extrap_kmax=100),
+        PowerSpectrumInterpolator(z, k, pk)]
+    # out of the range in z, to check the same extrapolation
+    zs = np.linspace(-0.1, 4.1, 40)
+    ks = np.outer(np.arange(2, 2000, 10), 1 / (50 + 5000 * (zs + 0.1)))
+    evaluator = PowerSpectrumEvaluator(zs)
+    fixed_evaluator = PowerSpectrumEvaluator(zs, ks)
+    for interp in interpolators:
+        expected = interp.P(zs, ks, grid=False)
+        assert np.allclose(evaluator.P(interp, ks), expected, rtol=1e-12, atol=0)
+        assert np.allclose(fixed_evaluator.P(interp), expected, rtol=1e-12, atol=0)
+        assert np.allclose(fixed_evaluator.logP(interp), interp.logP(zs, ks, grid=False),
+                           rtol=1e-12, atol=0)
+    # batched, with the last one sampled at different k's
+    interpolators[-1] = PowerSpectrumInterpolator(z, k[::2], pk[:, ::2])
+    batch = evaluator.P(interpolators, ks)
+    assert batch.shape == (3,) + ks.shape
+    for interp, values in zip(interpolators, batch):
+        assert np.allclose(values, interp.P(zs, ks, grid=False), rtol=1e-12, atol=0)
+    # grid evaluation
+    grid_evaluator = PowerSpectrumEvaluator(zs[:, np.newaxis], k[np.newaxis, :])
+    assert np.allclose(grid_evaluator.P(interpolators[0]), interpolators[0].P(zs, k),
+                       rtol=1e-12, atol=0)
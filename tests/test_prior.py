@@ -0,0 +1,43 @@
+"""
+Tests the evaluation of the 1d priors, for single points and arrays of points.
+"""
+
+# Global
+import numpy as np
+from scipy import stats
+# Local
+from cobaya.parameterization import Parameterization
+from cobaya.prior import Prior
+
+params_info = {
+    "a": {"prior": {"min": -1, "max": 2}},
+    "b": {"prior": {"dist": "norm", "loc": 0.5, "scale": 2}},
+    "c": {"prior": {"dist": "lognorm", "s": 0.5, "scale": 1.5}},
+    "d": {"prior": {"dist": "norm", "loc": -1, "scale": 0.3}},
+    "e": {"prior": {"dist": "beta", "a": 2, "b": 3, "min": 0, "max": 2}},
+    "f": {"prior": {"dist": "lognorm", "s": 1, "loc": 0.1}},
+    "g": {"value": "lambda a, b: a + b"}}
+
+scipy_pdfs = [stats.uniform(loc=-1, scale=3), stats.norm(loc=0.5, scale=2),
+              stats.lognorm(0.5, scale=1.5), stats.norm(loc=-1, scale=0.3),
+              stats.beta(2, 3, loc=0, scale=2), stats.lognorm(1, loc=0.1)]
+
+
+def test_prior_logp_points():
+    prior = Prior(Parameterization(params_info),
+                  {"ext": "lambda a, g: -(a - g) ** 2"})
+    assert len(prior._non_uniform_families) == 3
+    rng = np.random.default_rng(0)
+    points = np.column_stack([pdf.rvs(50, random_state=rng) for pdf in scipy_pdfs])
+    points[::7, 0] = 3  # out of bounds
+    points[::11, 4] = -0.5  # out of bounds
+    expected = np.sum([pdf.logpdf(points[:, i]) for i, pdf in enumerate(scipy_pdfs)],
+                      axis=0)
+    assert np.allclose(prior.logps_internal(points), expected)
+    for point, logp in zip(points, expected):
+        assert np.isclose(prior.logps_internal(point), logp)
+    logps = prior.logps(points)
+    assert logps.shape == (len(points), 2)
+    for point, point_logps in zip(points, logps):
+        assert np.allclose(prior.logps(point), point_logps)
+    assert np.allclose(prior.logp(points), np.sum(logps, axis=-1))
@@ -0,0 +1,128 @@
+"""
+Tests the evaluation of the chi squared of the SN likelihoods (marginalized over a grid
+of alpha, beta values, or with alpha, beta sampled) on a small synthetic sample,
+comparing it with the direct inversion of the covariance matrix for each alpha, beta.
+"""
+
+# Global
+import os
+import numpy as np
+import pytest
+# Local
+from cobaya.likelihoods.sn.jla import jla
+from cobaya.likelihoods.sn.jla_lite import jla_lite
+
+nsn = 12
+covmat_names = ["mag", "stretch", "colour", "mag_stretch", "mag_colour", "stretch_colour"]
+
+
+def write_synthetic_sample(path, twoscriptmfit):
+    rng = np.random.default_rng(1)
+    zcmb = np.sort(rng.uniform(0.01, 1.2, nsn))
+    columns = {
+        "zcmb": zcmb, "zhel": zcmb + rng.normal(0, 1e-4, nsn), "dz": np.zeros(nsn),
+        "mb": 24 + 5 * np.log10(zcmb) + rng.normal(0, 0.1, nsn),
+        "dmb": rng.uniform(0.05, 0.2, nsn), "x1": rng.normal(0, 1, nsn),
+        "dx1": rng.uniform(0.05, 0.5, nsn), "color": rng.normal(0, 0.1, nsn),
+        "dcolor": rng.uniform(0.01, 0.05, nsn), "3rdvar": rng.uniform(9, 11, nsn),
+        "d3rdvar": rng.uniform(0.01, 0.1, nsn), "cov_m_s": rng.normal(0, 1e-3, nsn),
+        "cov_m_c": rng.normal(0, 1e-3, nsn), "cov_s_c": rng.normal(0, 1e-3, nsn),
+        "set": np.ones(nsn)}
+    with open(os.path.join(path, "sn.txt"), "w") as data_file:
+        data_file.write("#name " + " ".join(columns) + "\n")
+        for i in range(nsn):
+            data_file.write("sn%d " % i + " ".join(
+                "%.12g" % values[i] for values in columns.values()) + "\n")
+    dataset = ["data_file = sn.txt", "pecz = 0.001",
+               "twoscriptmfit = %s" % ("T" if twoscriptmfit else "F"), "scriptmcut = 10"]
+    for name in covmat_names:
+        factor = rng.normal(0, 1, (nsn, nsn))
+        amplitude = 1e-3 if name in covmat_names[:3] else 1e-5
+        np.savetxt(os.path.join(path, "%s.txt" % name), np.concatenate(
+            [[nsn], amplitude * factor.dot(factor.T).flatten()]))
+        dataset += ["has_%s_covmat = T" % name, "%s_covmat_file = %s.txt" % (name, name)]
+    dataset_file = os.path.join(path, "sn.dataset")
+    with open(dataset_file, "w") as f:
+        f.write("\n".join(dataset) + "\n")
+    return dataset_file
+
+
+def reference_chi2(like, lumdists, alpha, beta):
+    # previous evaluation: direct inversion of the covariance matrix
+    invcovmat = np.linalg.inv(like.covariance_matrix(alpha, beta))
+    invvars = 1.0 / (like.pre_vars + alpha ** 2 * like.stretch_var +
+                     beta ** 2 * like.colour_var + 2.0 * alpha * like.cov_mag_stretch -
+                     2.0 * beta * like.cov_mag_colour -
+                     2.0 * alpha * beta * like.cov_stretch_colour)
+    estimated_scriptm = np.sum((like.mag - lumdists) * invvars) / np.sum(invvars)
+    diffmag = (like.mag - lumdists + alpha * like.stretch - beta * like.colour -
+               estimated_scriptm)
+    invvars = invcovmat.dot(diffmag)
+    amarg_A = invvars.dot(diffmag)
+    if like.twoscriptmfit:
+        amarg_B = invvars.dot(like.A1)
+        amarg_C = invvars.dot(like.A2)
+        amarg_D = invcovmat.dot(like.A1).dot(like.A2)
+        amarg_E = invcovmat.dot(like.A1).dot(like.A1)
+        amarg_F = invcovmat.dot(like.A2).dot(like.A2)
+        tempG = amarg_F - amarg_D * amarg_D / amarg_E
+        return (amarg_A + np.log(amarg_E / 2 / np.pi) + np.log(tempG / 2 / np.pi) -
+                amarg_C * amarg_C / tempG -
+                amarg_B * amarg_B * amarg_F / (amarg_E * tempG) +
+                2.0 * amarg_B * amarg_C * amarg_D / (amarg_E * tempG))
+    amarg_B = np.sum(invvars)
+    amarg_E = np.sum(invcovmat)
+    return amarg_A + np.log(amarg_E / 2 / np.pi) - amarg_B ** 2 / amarg_E
+
+
+class Provider:
+
+    def __init__(self, lumdists):
+        self.lumdists = lumdists
+
+    def get_angular_diameter_distance(self, z):
+        return self.lumdists
+
+
+def set_provider(like):
+    # theory giving distance moduli close to the synthetic magnitudes
+    lumdists = like.mag - 19 + 0.05 * np.sin(np.arange(nsn))
+    like.provider = Provider(
+        10 ** (lumdists / 5) / ((1 + like.zhel) * (1 + like.zcmb)))
+    return lumdists
+
+
+@pytest.mark.parametrize("twoscriptmfit", [False, True])
+def test_sn_marginalized(tmpdir, twoscriptmfit):
+    dataset_file = write_synthetic_sample(str(tmpdir), twoscriptmfit)
+    logps = []
+    for precompute in [True, False]:
+        like = jla_lite({"dataset_file": dataset_file, "precompute_covmats": precompute})
+        assert like.twoscriptmfit == twoscriptmfit
+        lumdists = set_provider(like)
+        chi2s = np.array([reference_chi2(like, lumdists, alpha, beta)
+                          for alpha, beta in zip(like.alpha_grid, like.beta_grid)])
+        if precompute:
+            assert np.allclose(like.grid_chi2s(like.mag - lumdists), chi2s,
+                               rtol=1e-10, atol=0)
+        else:
+            like._grid_chunk = 10  # evaluated in chunks of grid points
+        logps.append(like.logp())
+        best = np.min(chi2s / 2)
+        assert np.isclose(logps[-1], - best + np.log(
+            np.sum(np.exp(- chi2s / 2 + best)) *
+            like.step_width_alpha * like.step_width_beta), rtol=1e-10, atol=0)
+    assert np.isclose(logps[0], logps[1], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("covmat_cache_size", [1, 4])
+def test_sn_alpha_beta(tmpdir, covmat_cache_size):
+    dataset_file = write_synthetic_sample(str(tmpdir), twoscriptmfit=True)
+    like = jla({"dataset_file": dataset_file, "covmat_cache_size": covmat_cache_size})
+    lumdists = set_provider(like)
+    # going back to previous values, to use (or not, if evicted) the cached ones
+    for alpha, beta in [(0.14, 3.1), (0.15, 3.), (0.14, 3.1), (0.13, 3.2), (0.15, 3.)]:
+        assert np.isclose(like.logp(alpha_jla=alpha, beta_jla=beta),
+                          - reference_chi2(like, lumdists, alpha, beta) / 2,
+                          rtol=1e-10, atol=0)
+        assert len(like._factorizations) <= covmat_cache_size